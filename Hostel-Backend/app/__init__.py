@@ -1,3 +1,4 @@
+import os
 from flask import Flask
 from config import Config
 from flask_cors import CORS
@@ -7,6 +8,7 @@ from flask_migrate import Migrate
 from .extensions.db import db
 from .extensions.jwt import jwt
 from .extensions.mail import mail
+from .extensions.email_templates import email_templates
 
 def create_app():
     """Create and configure the Flask application."""
@@ -24,6 +26,7 @@ def create_app():
     migrate = Migrate(app, db)
     jwt.init_app(app)
     mail.init_app(app)
+    email_templates.init_app(app)
 
     # Register blueprints inside function to avoid circular imports
     from .routes.auth import auth_bp
@@ -46,4 +49,15 @@ def create_app():
     app.register_blueprint(admin_bp, url_prefix="/admin")
     app.register_blueprint(upload_bp)
 
+    # Register CLI maintenance commands
+    from .commands import register_commands
+    register_commands(app)
+
+    # In-process job scheduler for web server processes; every worker starts one, only the advisory-lock
+    # holder runs jobs. Flask CLI processes (email-worker, run-job, migrations...) never start it, and
+    # `flask scheduler` runs its own loop in the foreground.
+    if app.config.get('SCHEDULER_ENABLED') and os.environ.get('FLASK_RUN_FROM_CLI') != 'true':
+        from .services.scheduler_service import SchedulerService
+        SchedulerService.start(app)
+
     return app
\ No newline at end of file
@@ -0,0 +1,219 @@
+import click
+from flask.cli import with_appcontext
+
+
+@click.command("repair-ratings")
+@with_appcontext
+def repair_ratings_command():
+    """Backfill / repair the denormalized hostel rating aggregates."""
+    from .services.review_service import ReviewService
+
+    repaired = ReviewService.repair_hostel_ratings()
+    click.echo(f"Repaired rating aggregates for {repaired} hostel(s)")
+
+
+@click.command("check-occupancy")
+@click.option("--fix", is_flag=True, help="Correct drifted counters instead of only reporting them.")
+@with_appcontext
+def check_occupancy_command(fix):
+    """Compare hostel occupancy counters with the bookings table."""
+    from .services.booking_service import BookingService
+
+    drift = BookingService.check_occupancy(fix=fix)
+    for row in drift:
+        click.echo(f"Hostel {row['hostel_id']}: stored={row['stored']} actual={row['actual']}")
+
+    action = "Fixed" if fix else "Found"
+    click.echo(f"{action} occupancy drift on {len(drift)} hostel(s)")
+
+
+@click.command("rollover-occupancy")
+@click.option("--days", default=1, show_default=True, help="How many days of past check-outs to release.")
+@with_appcontext
+def rollover_occupancy_command(days):
+    """Release occupancy held by bookings that have checked out (run daily)."""
+    from .services.booking_service import BookingService
+
+    updated = BookingService.rollover_occupancy(days=days)
+    click.echo(f"Rolled over occupancy for {updated} hostel(s)")
+
+
+@click.command("rebuild-occupancy-ledger")
+@with_appcontext
+def rebuild_occupancy_ledger_command():
+    """Rebuild the per-night occupancy ledger from active bookings."""
+    from .services.booking_service import BookingService
+
+    rows = BookingService.rebuild_ledger()
+    click.echo(f"Rebuilt occupancy ledger with {rows} hostel-night row(s)")
+
+
+@click.command("load-campuses")
+@click.argument("path", required=False, type=click.Path(exists=True, dir_okay=False))
+@with_appcontext
+def load_campuses_command(path):
+    """Load campus reference data (defaults to CAMPUS_DATA_FILE) and refresh distances."""
+    from .services.campus_service import CampusService
+
+    created, updated = CampusService.load_campuses(path)
+    click.echo(f"Loaded campuses: {created} created, {updated} updated")
+
+
+@click.command("rebuild-campus-distances")
+@with_appcontext
+def rebuild_campus_distances_command():
+    """Recompute the hostel -> campus distance table from hostel coordinates."""
+    from .extensions import db
+    from .services.campus_service import CampusService
+
+    rows = CampusService.rebuild_distances()
+    db.session.commit()
+    click.echo(f"Rebuilt campus distances with {rows} hostel-campus row(s)")
+
+
+@click.command("geocode-hostels")
+@click.option("--batch-size", default=100, show_default=True, help="Hostels committed per batch.")
+@click.option("--workers", default=None, type=int, help="Concurrent geocoder lookups (default GEOCODER_WORKERS).")
+@click.option("--limit", default=None, type=int, help="Stop after scanning this many hostels.")
+@click.option("--retry-misses", is_flag=True, help="Re-geocode locations cached as not found.")
+@with_appcontext
+def geocode_hostels_command(batch_size, workers, limit, retry_misses):
+    """Backfill missing hostel coordinates from their location strings (safe to re-run)."""
+    from .services.geocode_service import GeocodeService
+
+    def progress(last_id, stats):
+        click.echo(f"... up to hostel {last_id}: {stats['updated']} updated, {stats['unresolved']} unresolved")
+
+    stats = GeocodeService.backfill(
+        batch_size=batch_size, workers=workers, limit=limit,
+        retry_misses=retry_misses, on_batch=progress
+    )
+    click.echo(
+        f"Scanned {stats['scanned']} hostel(s): {stats['updated']} geocoded, {stats['unresolved']} unresolved "
+        f"({stats['looked_up']} lookup(s), {stats['cache_hits']} cache hit(s))"
+    )
+
+
+@click.command("send-search-alerts")
+@click.option("--batch-size", default=500, show_default=True, help="Queued matches delivered per run.")
+@with_appcontext
+def send_search_alerts_command(batch_size):
+    """Email users their queued saved-search matches as one digest each."""
+    from .services.saved_search_service import SavedSearchService
+
+    sent, delivered = SavedSearchService.send_pending_alerts(batch_size=batch_size)
+    click.echo(f"Sent {sent} digest(s) covering {delivered} match(es)")
+
+
+@click.command("refresh-similar-hostels")
+@click.option("--full", is_flag=True, help="Recompute every hostel instead of only what changed.")
+@with_appcontext
+def refresh_similar_hostels_command(full):
+    """Recompute precomputed similar-hostel neighbours (run periodically)."""
+    from .services.similarity_service import SimilarityService
+
+    updated = SimilarityService.refresh_neighbours(full=full)
+    click.echo(f"Recomputed neighbours for {updated} hostel(s)")
+
+
+@click.command("email-worker")
+@click.option("--batch-size", default=50, show_default=True, help="Outbox emails claimed per batch.")
+@click.option("--poll-interval", default=None, type=float, help="Seconds to sleep when idle (default EMAIL_OUTBOX_POLL_SECONDS).")
+@click.option("--once", is_flag=True, help="Exit once nothing is due instead of polling forever.")
+@with_appcontext
+def email_worker_command(batch_size, poll_interval, once):
+    """Send queued outbox emails with retries (run as its own process)."""
+    from .services.outbox_service import OutboxService
+
+    def progress(stats):
+        click.echo(f"... {stats['sent']} sent, {stats['retried']} to retry, {stats['failed']} failed")
+
+    totals = OutboxService.run_worker(batch_size=batch_size, poll_interval=poll_interval, once=once, on_batch=progress)
+    click.echo(f"Sent {totals['sent']} email(s): {totals['retried']} retry(ies) scheduled, {totals['failed']} failed")
+
+
+@click.command("smtp-sink")
+@click.option("--host", default="127.0.0.1", show_default=True)
+@click.option("--port", default=1025, show_default=True)
+def smtp_sink_command(host, port):
+    """Run a local SMTP server that accepts and logs mail instead of delivering it (development only)."""
+    from .utils.smtp_sink import SMTPSink
+
+    class EchoSink(SMTPSink):
+        def record(self, sender, recipients, data):
+            super().record(sender, recipients, data)
+            click.echo(f"{sender} -> {', '.join(recipients)}: {self.messages[-1]['message']['Subject']}")
+
+    click.echo(f"SMTP sink listening on {host}:{port} (MAIL_SERVER={host} MAIL_PORT={port} MAIL_USE_TLS=False)")
+    EchoSink(host, port).serve_forever()
+
+
+def _run_counts(run):
+    """What a job run did: email jobs report sent/failed, the others rows touched"""
+    if run['sent'] is not None:
+        return f"{run['sent']} sent, {run['failed']} failed"
+    return f"{run['rows']} row(s)"
+
+
+@click.command("run-job")
+@click.argument("name")
+@with_appcontext
+def run_job_command(name):
+    """Run one scheduled maintenance job now and record the run (see list-jobs)."""
+    from .services.scheduler_service import SchedulerService
+
+    try:
+        run = SchedulerService.run_job(name, trigger='cli')
+    except ValueError as e:
+        raise click.UsageError(str(e))
+    if run is None:
+        click.echo(f"Job {name} is already running elsewhere; skipped")
+        return
+
+    click.echo(f"Job {name} {run['status']}: {_run_counts(run)} in {run['duration_seconds']:.2f}s")
+    if run['error']:
+        raise click.ClickException(run['error'])
+
+
+@click.command("list-jobs")
+@with_appcontext
+def list_jobs_command():
+    """Show the scheduled maintenance jobs and their last runs."""
+    from .services.scheduler_service import SchedulerService
+
+    for job in SchedulerService.list_jobs():
+        run = job['last_run']
+        last = f"{run['status']} at {run['started_at']} ({_run_counts(run)})" if run else "never run"
+        click.echo(f"{job['name']:<20} {job['schedule']:<22} {last}")
+
+
+@click.command("scheduler")
+@with_appcontext
+def scheduler_command():
+    """Run the job scheduler in the foreground (alternative to SCHEDULER_ENABLED in the web workers)."""
+    from flask import current_app
+    from .services.scheduler_service import SchedulerService
+
+    click.echo("Scheduler running; Ctrl+C to stop")
+    try:
+        SchedulerService.run_forever(current_app._get_current_object())
+    except KeyboardInterrupt:
+        pass
+
+
+def register_commands(app):
+    """Attach the maintenance CLI commands to the app (run with `flask <command>`)."""
+    app.cli.add_command(repair_ratings_command)
+    app.cli.add_command(check_occupancy_command)
+    app.cli.add_command(rollover_occupancy_command)
+    app.cli.add_command(rebuild_occupancy_ledger_command)
+    app.cli.add_command(load_campuses_command)
+    app.cli.add_command(rebuild_campus_distances_command)
+    app.cli.add_command(geocode_hostels_command)
+    app.cli.add_command(send_search_alerts_command)
+    app.cli.add_command(refresh_similar_hostels_command)
+    app.cli.add_command(email_worker_command)
+    app.cli.add_command(smtp_sink_command)
+    app.cli.add_command(run_job_command)
+    app.cli.add_command(list_jobs_command)
+    app.cli.add_command(scheduler_command)
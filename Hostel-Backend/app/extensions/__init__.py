@@ -1,8 +1,9 @@
 from .db import db
 from .jwt import jwt
+from .email_templates import email_templates
 try:
 	from .mail import mail
 except Exception:
 	mail = None
 
-__all__ = ["db", "jwt", "mail"]
+__all__ = ["db", "jwt", "mail", "email_templates"]
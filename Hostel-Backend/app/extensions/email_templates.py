@@ -0,0 +1,3 @@
+from ..utils.email_templates import TemplateRegistry
+
+email_templates = TemplateRegistry()
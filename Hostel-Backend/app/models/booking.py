@@ -3,6 +3,10 @@ from datetime import datetime
 
 class Booking(db.Model):
     __tablename__ = "bookings"
+    __table_args__ = (
+        # Serves per-hostel overlap and status lookups (availability, occupancy, reminders)
+        db.Index('ix_bookings_hostel_status_dates', 'hostel_id', 'status', 'check_in', 'check_out'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
@@ -0,0 +1,43 @@
+from ..extensions import db
+
+class Campus(db.Model):
+    """University campus that students search hostels around"""
+    __tablename__ = "campuses"
+
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(150), nullable=False, unique=True)
+    aliases = db.Column(db.JSON, default=list)  # e.g. ["JKUAT", "Juja"]
+    city = db.Column(db.String(100))
+    latitude = db.Column(db.Float, nullable=False)
+    longitude = db.Column(db.Float, nullable=False)
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "name": self.name,
+            "aliases": self.aliases or [],
+            "city": self.city,
+            "latitude": self.latitude,
+            "longitude": self.longitude
+        }
+
+class HostelCampusDistance(db.Model):
+    """Precomputed distance from a hostel to a nearby campus"""
+    __tablename__ = "hostel_campus_distances"
+    __table_args__ = (
+        db.UniqueConstraint('hostel_id', 'campus_id', name='uq_hostel_campus_distance'),
+        # "within X km of campus Y, nearest first" is a range scan on this index
+        db.Index('ix_hostel_campus_distance_campus_distance', 'campus_id', 'distance_km'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    hostel_id = db.Column(db.Integer, db.ForeignKey('hostels.id', ondelete='CASCADE'), nullable=False, index=True)
+    campus_id = db.Column(db.Integer, db.ForeignKey('campuses.id', ondelete='CASCADE'), nullable=False)
+    distance_km = db.Column(db.Float, nullable=False)
+
+    def to_dict(self):
+        return {
+            "hostel_id": self.hostel_id,
+            "campus_id": self.campus_id,
+            "distance_km": self.distance_km
+        }
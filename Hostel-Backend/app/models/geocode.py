@@ -0,0 +1,26 @@
+from datetime import datetime
+from ..extensions import db
+
+class GeocodeCache(db.Model):
+    """Resolved coordinates for a normalized location string (misses are cached with null coordinates)"""
+    __tablename__ = "geocode_cache"
+
+    id = db.Column(db.Integer, primary_key=True)
+    location = db.Column(db.String(255), nullable=False, unique=True, index=True)  # normalized
+    latitude = db.Column(db.Float)
+    longitude = db.Column(db.Float)
+    provider = db.Column(db.String(50))
+    resolved_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    @property
+    def found(self):
+        return self.latitude is not None and self.longitude is not None
+
+    def to_dict(self):
+        return {
+            "location": self.location,
+            "latitude": self.latitude,
+            "longitude": self.longitude,
+            "provider": self.provider,
+            "resolved_at": self.resolved_at.isoformat() if self.resolved_at else None
+        }
@@ -3,6 +3,10 @@ from datetime import datetime
 
 class Hostel(db.Model):
     __tablename__ = "hostels"
+    __table_args__ = (
+        # sort_by=rating: ORDER BY rating_avg DESC, rating_count DESC is a backward scan of this index
+        db.Index('ix_hostels_rating', 'rating_avg', 'rating_count'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(150), nullable=False)
@@ -10,7 +14,7 @@ class Hostel(db.Model):
     location = db.Column(db.String(150), nullable=False)
     latitude = db.Column(db.Float)
     longitude = db.Column(db.Float)
-    price = db.Column(db.Float, nullable=False)
+    price = db.Column(db.Float, nullable=False, index=True)
     currency = db.Column(db.String(3), default="KES")
     capacity = db.Column(db.Integer, nullable=False)
     room_type = db.Column(db.String(50), nullable=False)
@@ -21,6 +25,14 @@ class Hostel(db.Model):
     availability = db.Column(db.JSON)
     is_verified = db.Column(db.Boolean, default=False)
     is_featured = db.Column(db.Boolean, default=False)
+    # Denormalized review aggregates, maintained by ReviewService (never NULL, so the rating index needs no NULLS ordering)
+    rating_sum = db.Column(db.Integer, default=0, server_default='0', nullable=False)
+    rating_count = db.Column(db.Integer, default=0, server_default='0', nullable=False)
+    rating_avg = db.Column(db.Float, default=0.0, server_default='0', nullable=False)
+    # Guests on active (confirmed/upcoming) bookings that have not checked out yet
+    occupied_guests = db.Column(db.Integer, default=0)
+    # Set when a feature used for similar-hostel neighbours changes; cleared by SimilarityService
+    neighbours_stale = db.Column(db.Boolean, default=True, index=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
@@ -31,26 +43,18 @@ class Hostel(db.Model):
 
     @property
     def available_rooms(self):
-        """Calculate available rooms based on capacity minus current confirmed bookings"""
-        from ..models.booking import Booking
-        from datetime import date
+        """Available rooms: capacity minus the occupancy counter kept by BookingService"""
+        return max(0, self.capacity - (self.occupied_guests or 0))
 
-        current_bookings = Booking.query.filter(
-            Booking.hostel_id == self.id,
-            Booking.status.in_(['confirmed', 'upcoming']),
-            Booking.check_out >= date.today()
-        ).all()
+    def to_dict(self, include_landlord=True):
+        available_rooms = self.available_rooms
 
-        occupied_guests = sum(booking.guests for booking in current_bookings)
-        return max(0, self.capacity - occupied_guests)
-
-    def to_dict(self):
         # Retrieve stored availability settings
         avail_settings = self.availability or {}
         
         # AUTO-UPDATE: If capacity is 0, force availability to False
         is_available = avail_settings.get('available', True)
-        if self.available_rooms <= 0:
+        if available_rooms <= 0:
             is_available = False
 
         return {
@@ -63,7 +67,7 @@ class Hostel(db.Model):
             "price": self.price,
             "currency": self.currency,
             "capacity": self.capacity,
-            "available_rooms": self.available_rooms,
+            "available_rooms": available_rooms,
             "room_type": self.room_type,
             "landlord_id": self.landlord_id,
             "images": self.images or [],
@@ -78,5 +82,5 @@ class Hostel(db.Model):
             "is_featured": self.is_featured,
             "created_at": self.created_at.isoformat(),
             "updated_at": self.updated_at.isoformat(),
-            "landlord": self.landlord.to_dict() if self.landlord else None
+            "landlord": (self.landlord.to_dict() if self.landlord else None) if include_landlord else None
         }
\ No newline at end of file
@@ -0,0 +1,36 @@
+from datetime import datetime
+from ..extensions import db
+
+class JobRun(db.Model):
+    """One execution of a periodic maintenance job, with its timing and row (or sent/failed email) counts"""
+    __tablename__ = "job_runs"
+    __table_args__ = (
+        db.Index('ix_job_runs_job_started', 'job', 'started_at'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    job = db.Column(db.String(100), nullable=False)
+    trigger = db.Column(db.String(20), default='scheduler')  # scheduler, cli
+    status = db.Column(db.String(20), default='running', nullable=False)  # running, success, failed
+    started_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    finished_at = db.Column(db.DateTime)
+    duration_seconds = db.Column(db.Float)
+    rows = db.Column(db.Integer)  # rows/emails/hostels the job touched
+    sent = db.Column(db.Integer)  # email jobs: messages sent
+    failed = db.Column(db.Integer)  # email jobs: messages that failed to render or send
+    error = db.Column(db.Text)
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "job": self.job,
+            "trigger": self.trigger,
+            "status": self.status,
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+            "duration_seconds": self.duration_seconds,
+            "rows": self.rows,
+            "sent": self.sent,
+            "failed": self.failed,
+            "error": self.error
+        }
@@ -0,0 +1,23 @@
+from ..extensions import db
+
+class HostelNeighbour(db.Model):
+    """Precomputed most-similar hostels, ranked from 1 (closest)"""
+    __tablename__ = "hostel_neighbours"
+    __table_args__ = (
+        db.UniqueConstraint('hostel_id', 'neighbour_id', name='uq_hostel_neighbour'),
+        db.Index('ix_hostel_neighbours_hostel_rank', 'hostel_id', 'rank'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    hostel_id = db.Column(db.Integer, db.ForeignKey('hostels.id', ondelete='CASCADE'), nullable=False)
+    neighbour_id = db.Column(db.Integer, db.ForeignKey('hostels.id', ondelete='CASCADE'), nullable=False, index=True)
+    rank = db.Column(db.Integer, nullable=False)
+    distance = db.Column(db.Float, nullable=False)
+
+    def to_dict(self):
+        return {
+            "hostel_id": self.hostel_id,
+            "neighbour_id": self.neighbour_id,
+            "rank": self.rank,
+            "distance": self.distance
+        }
@@ -0,0 +1,20 @@
+from ..extensions import db
+
+class HostelOccupancy(db.Model):
+    """Guests staying in a hostel on a given night (check-in inclusive, check-out exclusive)"""
+    __tablename__ = "hostel_occupancy"
+    __table_args__ = (
+        db.UniqueConstraint('hostel_id', 'day', name='uq_hostel_occupancy_hostel_day'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    hostel_id = db.Column(db.Integer, db.ForeignKey('hostels.id', ondelete='CASCADE'), nullable=False)
+    day = db.Column(db.Date, nullable=False)
+    guests = db.Column(db.Integer, nullable=False, default=0)
+
+    def to_dict(self):
+        return {
+            "hostel_id": self.hostel_id,
+            "day": self.day.isoformat(),
+            "guests": self.guests
+        }
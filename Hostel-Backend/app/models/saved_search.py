@@ -0,0 +1,49 @@
+from ..extensions import db
+from datetime import datetime
+
+class SavedSearch(db.Model):
+    """A student's stored /search/hostels query, alerted on when new listings match it"""
+    __tablename__ = "saved_searches"
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, index=True)
+    name = db.Column(db.String(100))
+    params = db.Column(db.JSON, nullable=False)  # same parameter dict as SearchService.search_hostels
+    is_active = db.Column(db.Boolean, default=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    last_notified_at = db.Column(db.DateTime)
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "user_id": self.user_id,
+            "name": self.name,
+            "params": self.params,
+            "is_active": self.is_active,
+            "created_at": self.created_at.isoformat() if self.created_at else None,
+            "last_notified_at": self.last_notified_at.isoformat() if self.last_notified_at else None
+        }
+
+class SavedSearchMatch(db.Model):
+    """A hostel that matched a saved search, queued until the next alert batch"""
+    __tablename__ = "saved_search_matches"
+    __table_args__ = (
+        db.UniqueConstraint('saved_search_id', 'hostel_id', name='uq_saved_search_match'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    saved_search_id = db.Column(db.Integer, db.ForeignKey('saved_searches.id', ondelete='CASCADE'), nullable=False)
+    hostel_id = db.Column(db.Integer, db.ForeignKey('hostels.id', ondelete='CASCADE'), nullable=False)
+    matched_at = db.Column(db.DateTime, default=datetime.utcnow)
+    notified_at = db.Column(db.DateTime, index=True)  # null while queued
+    attempts = db.Column(db.Integer, default=0, nullable=False, server_default='0')  # failed digest sends
+    next_attempt_at = db.Column(db.DateTime)  # after a failed send, skipped until then
+
+    def to_dict(self):
+        return {
+            "saved_search_id": self.saved_search_id,
+            "hostel_id": self.hostel_id,
+            "matched_at": self.matched_at.isoformat() if self.matched_at else None,
+            "notified_at": self.notified_at.isoformat() if self.notified_at else None,
+            "attempts": self.attempts
+        }
@@ -4,6 +4,10 @@ from ..services.user_service import UserService
 from ..services.hostel_service import HostelService
 from ..services.booking_service import BookingService
 from ..services.review_service import ReviewService
+from ..services.cache_service import CacheService
+from ..services.geocode_service import GeocodeService
+from ..services.outbox_service import OutboxService
+from ..services.scheduler_service import SchedulerService
 from ..middleware.auth_middleware import admin_required
 
 admin_bp = Blueprint("admin", __name__, url_prefix="/admin")
@@ -25,10 +29,15 @@ def get_users():
 
         # Remove None values
         filters = {k: v for k, v in filters.items() if v is not None}
+        cursor = request.args.get('cursor')  # opt-in keyset pagination; empty value starts at page one
+        include_total = request.args.get('include_total', 'false').lower() in ('true', '1', 'yes')
 
-        result = UserService.get_users_list(page=page, per_page=per_page, filters=filters)
+        result = UserService.get_users_list(page=page, per_page=per_page, filters=filters,
+                                            cursor=cursor, include_total=include_total)
         return jsonify(result), 200
 
+    except ValueError as e:
+        return jsonify({"message": str(e)}), 400
     except Exception as e:
         return jsonify({"message": "Failed to fetch users", "error": str(e)}), 500
 
@@ -138,6 +147,59 @@ def get_admin_stats():
     except Exception as e:
         return jsonify({"message": "Failed to get admin stats", "error": str(e)}), 500
 
+@admin_bp.get("/search-cache")
+@jwt_required()
+@admin_required
+def get_search_cache_stats():
+    """Get search result cache hit/miss counters for this worker (admin only)"""
+    try:
+        return jsonify(CacheService.stats()), 200
+    except Exception as e:
+        return jsonify({"message": "Failed to get search cache stats", "error": str(e)}), 500
+
+@admin_bp.get("/geocoding")
+@jwt_required()
+@admin_required
+def get_geocoding_status():
+    """Get hostel coordinate backfill progress (admin only)"""
+    try:
+        return jsonify(GeocodeService.status()), 200
+    except Exception as e:
+        return jsonify({"message": "Failed to get geocoding status", "error": str(e)}), 500
+
+@admin_bp.get("/email-outbox")
+@jwt_required()
+@admin_required
+def get_email_outbox_status():
+    """Get queued/sent/failed email counts for the outbox worker (admin only)"""
+    try:
+        return jsonify(OutboxService.status()), 200
+    except Exception as e:
+        return jsonify({"message": "Failed to get email outbox status", "error": str(e)}), 500
+
+@admin_bp.get("/jobs")
+@jwt_required()
+@admin_required
+def get_jobs():
+    """Get the scheduled maintenance jobs and their last runs (admin only)"""
+    try:
+        return jsonify({"jobs": SchedulerService.list_jobs()}), 200
+    except Exception as e:
+        return jsonify({"message": "Failed to get jobs", "error": str(e)}), 500
+
+@admin_bp.get("/jobs/runs")
+@jwt_required()
+@admin_required
+def get_job_runs():
+    """Get recorded job runs, newest first (admin only)"""
+    try:
+        page = int(request.args.get('page', 1))
+        per_page = int(request.args.get('per_page', 20))
+        job = request.args.get('job')
+        return jsonify(SchedulerService.get_runs(job=job, page=page, per_page=per_page)), 200
+    except Exception as e:
+        return jsonify({"message": "Failed to get job runs", "error": str(e)}), 500
+
 @admin_bp.delete("/reviews/<int:review_id>")
 @jwt_required()
 @admin_required
@@ -1,7 +1,6 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from ..services.booking_service import BookingService
-from ..services.notification_service import NotificationService
 from ..services.payment_service import PaymentService
 from ..middleware.auth_middleware import landlord_required, student_required
 from ..utils.validator import is_valid_phone
@@ -41,9 +40,6 @@ def create_booking():
             guests=data['guests']
         )
 
-        # Send notifications
-        NotificationService.notify_booking_created(booking)
-
         return jsonify({"message": "Booking created successfully", "booking": booking}), 201
 
     except ValueError as e:
@@ -61,15 +57,21 @@ def get_user_bookings():
         page = int(request.args.get('page', 1))
         per_page = int(request.args.get('per_page', 20))
         status = request.args.get('status')
+        cursor = request.args.get('cursor')  # opt-in keyset pagination; empty value starts at page one
+        include_total = request.args.get('include_total', 'false').lower() in ('true', '1', 'yes')
 
         result = BookingService.get_user_bookings(
             user_id=user_id,
             page=page,
             per_page=per_page,
-            status=status
+            status=status,
+            cursor=cursor,
+            include_total=include_total
         )
         return jsonify(result), 200
 
+    except ValueError as e:
+        return jsonify({"message": str(e)}), 400
     except Exception as e:
         return jsonify({"message": "Failed to fetch bookings", "error": str(e)}), 500
 
@@ -94,9 +96,6 @@ def cancel_booking(booking_id):
     try:
         booking = BookingService.cancel_booking(booking_id, user_id)
 
-        # Send cancellation notifications
-        NotificationService.notify_booking_cancelled(booking)
-
         return jsonify({"message": "Booking cancelled successfully", "booking": booking}), 200
 
     except ValueError as e:
@@ -158,15 +157,21 @@ def get_landlord_bookings():
         page = int(request.args.get('page', 1))
         per_page = int(request.args.get('per_page', 20))
         status = request.args.get('status')
+        cursor = request.args.get('cursor')  # opt-in keyset pagination; empty value starts at page one
+        include_total = request.args.get('include_total', 'false').lower() in ('true', '1', 'yes')
 
         result = BookingService.get_landlord_bookings(
             user_id=user_id,
             page=page,
             per_page=per_page,
-            status=status
+            status=status,
+            cursor=cursor,
+            include_total=include_total
         )
         return jsonify(result), 200
 
+    except ValueError as e:
+        return jsonify({"message": str(e)}), 400
     except Exception as e:
         return jsonify({"message": "Failed to fetch landlord bookings", "error": str(e)}), 500
 
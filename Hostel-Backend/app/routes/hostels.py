@@ -26,9 +26,14 @@ def get_hostels():
         }
 
         filters = {k: v for k, v in filters.items() if v is not None}
-        result = HostelService.get_all_hostels(page=page, per_page=per_page, filters=filters)
+        cursor = request.args.get('cursor')  # opt-in keyset pagination; empty value starts at page one
+        include_total = request.args.get('include_total', 'false').lower() in ('true', '1', 'yes')
+        result = HostelService.get_all_hostels(page=page, per_page=per_page, filters=filters,
+                                               cursor=cursor, include_total=include_total)
         return jsonify(result), 200
 
+    except ValueError as e:
+        return jsonify({"message": str(e)}), 400
     except Exception as e:
         return jsonify({"message": "Failed to fetch hostels", "error": str(e)}), 500
 
@@ -36,7 +41,11 @@ def get_hostels():
 def get_hostel(hostel_id):
     """Get a specific hostel by ID"""
     try:
-        hostel = HostelService.get_hostel_by_id(hostel_id)
+        hostel = HostelService.get_hostel_by_id(
+            hostel_id,
+            lat=request.args.get('lat', type=float),
+            lng=request.args.get('lng', type=float)
+        )
         return jsonify(hostel), 200
     except Exception as e:
         return jsonify({"message": "Hostel not found"}), 404
@@ -80,14 +80,20 @@ def get_hostel_reviews(hostel_id):
     try:
         page = int(request.args.get('page', 1))
         per_page = int(request.args.get('per_page', 20))
+        cursor = request.args.get('cursor')  # opt-in keyset pagination; empty value starts at page one
+        include_total = request.args.get('include_total', 'false').lower() in ('true', '1', 'yes')
 
         result = ReviewService.get_hostel_reviews(
             hostel_id=hostel_id,
             page=page,
-            per_page=per_page
+            per_page=per_page,
+            cursor=cursor,
+            include_total=include_total
         )
         return jsonify(result), 200
 
+    except ValueError as e:
+        return jsonify({"message": str(e)}), 400
     except Exception as e:
         return jsonify({"message": "Failed to fetch reviews", "error": str(e)}), 500
 
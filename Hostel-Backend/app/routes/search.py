@@ -1,5 +1,9 @@
 from flask import Blueprint, request, jsonify
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from werkzeug.exceptions import NotFound
 from ..services.search_service import SearchService
+from ..services.campus_service import CampusService
+from ..services.saved_search_service import SavedSearchService
 
 search_bp = Blueprint("search", __name__, url_prefix="/search")
 
@@ -23,9 +27,36 @@ def search_hostels():
         result = SearchService.search_hostels(processed_params, page=page, per_page=per_page)
         return jsonify(result), 200
 
+    except ValueError as e:
+        return jsonify({"message": str(e)}), 400
     except Exception as e:
         return jsonify({"message": "Search failed", "error": str(e)}), 500
 
+@search_bp.get("/map")
+def get_map_view():
+    """Get hostel clusters or markers for a map viewport"""
+    try:
+        bbox = request.args.get('bbox')
+        zoom = request.args.get('zoom', 12)
+
+        view = SearchService.get_map_view(bbox, zoom)
+        return jsonify(view), 200
+
+    except ValueError as e:
+        return jsonify({"message": str(e)}), 400
+    except Exception as e:
+        return jsonify({"message": "Failed to get map view", "error": str(e)}), 500
+
+@search_bp.get("/campuses")
+def get_campuses():
+    """Get the campuses hostels can be searched around"""
+    try:
+        campuses = CampusService.list_campuses()
+        return jsonify({"campuses": campuses}), 200
+
+    except Exception as e:
+        return jsonify({"message": "Failed to get campuses", "error": str(e)}), 500
+
 @search_bp.get("/suggestions")
 def get_search_suggestions():
     """Get search suggestions"""
@@ -70,3 +101,63 @@ def get_filter_options():
 
     except Exception as e:
         return jsonify({"message": "Failed to get filter options", "error": str(e)}), 500
+
+@search_bp.post("/saved")
+@jwt_required()
+def create_saved_search():
+    """Save a search to be alerted about new matching hostels"""
+    user_id = get_jwt_identity()
+    data = request.get_json() or {}
+
+    try:
+        search = SavedSearchService.create_saved_search(user_id, data)
+        return jsonify({"message": "Search saved", "saved_search": search}), 201
+    except ValueError as e:
+        return jsonify({"message": str(e)}), 400
+    except Exception as e:
+        return jsonify({"message": "Failed to save search", "error": str(e)}), 500
+
+@search_bp.get("/saved")
+@jwt_required()
+def get_saved_searches():
+    """Get the current user's saved searches"""
+    user_id = get_jwt_identity()
+
+    try:
+        searches = SavedSearchService.get_user_saved_searches(user_id)
+        return jsonify({"saved_searches": searches}), 200
+    except Exception as e:
+        return jsonify({"message": "Failed to get saved searches", "error": str(e)}), 500
+
+@search_bp.get("/saved/<int:search_id>/matches")
+@jwt_required()
+def get_saved_search_matches(search_id):
+    """Get hostels that matched a saved search"""
+    user_id = get_jwt_identity()
+
+    try:
+        page = int(request.args.get('page', 1))
+        per_page = int(request.args.get('per_page', 20))
+
+        matches = SavedSearchService.get_matches(search_id, user_id, page, per_page)
+        return jsonify(matches), 200
+    except NotFound:
+        return jsonify({"message": "Saved search not found"}), 404
+    except ValueError as e:
+        return jsonify({"message": str(e)}), 400
+    except Exception as e:
+        return jsonify({"message": "Failed to get saved search matches", "error": str(e)}), 500
+
+@search_bp.delete("/saved/<int:search_id>")
+@jwt_required()
+def delete_saved_search(search_id):
+    """Delete a saved search"""
+    user_id = get_jwt_identity()
+
+    try:
+        SavedSearchService.delete_saved_search(search_id, user_id)
+        return jsonify({"message": "Saved search deleted"}), 200
+    except NotFound:
+        return jsonify({"message": "Saved search not found"}), 404
+    except Exception as e:
+        return jsonify({"message": "Failed to delete saved search", "error": str(e)}), 500
@@ -100,9 +100,13 @@ class HostelSearchSchema(Schema):
     radius = fields.Float(required=False, validate=validate.Range(min=0.1, max=100))
     check_in = fields.Date(required=False)
     check_out = fields.Date(required=False)
+    guests = fields.Int(required=False, validate=validate.Range(min=1))
+    campus = fields.Str(required=False, validate=validate.Length(max=150))
+    campus_radius = fields.Float(required=False, validate=validate.Range(min=0.1, max=100))
+    facets = fields.Str(required=False, validate=validate.Length(max=100))
     sort_by = fields.Str(
         required=False,
-        validate=validate.OneOf(['price_asc', 'price_desc', 'rating', 'newest', 'relevance'])
+        validate=validate.OneOf(['price_asc', 'price_desc', 'rating', 'newest', 'relevance', 'distance'])
     )
     page = fields.Int(required=False, default=1, validate=validate.Range(min=1))
     per_page = fields.Int(required=False, default=20, validate=validate.Range(min=1, max=100))
@@ -1,8 +1,15 @@
 from ..extensions import db
 from ..models.booking import Booking
 from ..models.hostel import Hostel
-from datetime import datetime, date
-from sqlalchemy import and_, or_
+from ..models.occupancy import HostelOccupancy
+from ..utils.pagination import keyset_paginate
+from .cache_service import CacheService
+from .notification_service import NotificationService
+from datetime import datetime, date, timedelta
+from sqlalchemy import func
+
+# Booking statuses that hold beds in a hostel
+ACTIVE_STATUSES = ['confirmed', 'upcoming']
 
 class BookingService:
     @staticmethod
@@ -18,19 +25,19 @@ class BookingService:
         if check_in_date < date.today():
             raise ValueError("Check-in date cannot be in the past")
 
-        # Check availability
-        if not BookingService.check_availability(hostel_id, check_in_date, check_out_date, guests):
-            raise ValueError("Hostel is not available for the selected dates")
+        try:
+            # Lock the hostel row so concurrent bookings for it are serialized
+            hostel = Hostel.query.filter_by(id=hostel_id).with_for_update().first_or_404()
 
-        # Get hostel for pricing
-        hostel = Hostel.query.get_or_404(hostel_id)
+            # Check availability
+            if not BookingService.check_availability(hostel_id, check_in_date, check_out_date, guests):
+                raise ValueError("Hostel is not available for the selected dates")
 
-        # Calculate total price (per month per person)
-        days = (check_out_date - check_in_date).days
-        months = max(1, round(days / 30))  # At least 1 month, round to nearest month
-        total_price = hostel.price * months * guests
+            # Calculate total price (per month per person)
+            days = (check_out_date - check_in_date).days
+            months = max(1, round(days / 30))  # At least 1 month, round to nearest month
+            total_price = hostel.price * months * guests
 
-        try:
             booking = Booking(
                 user_id=user_id,
                 hostel_id=hostel_id,
@@ -42,46 +49,232 @@ class BookingService:
             )
 
             db.session.add(booking)
+            BookingService.apply_to_ledger(hostel_id, check_in_date, check_out_date, guests)
+            BookingService.adjust_occupancy(hostel_id, guests)
+            db.session.flush()
+
+            # Confirmation emails commit (or roll back) together with the booking
+            booking_data = booking.to_dict()
+            NotificationService.notify_booking_created(booking_data, queue=True)
             db.session.commit()
-            return booking.to_dict()
+            CacheService.bump('bookings')
+            return booking_data
+        except Exception as e:
+            db.session.rollback()
+            raise e
+
+    @staticmethod
+    def counts_towards_occupancy(status, check_out):
+        """Whether a booking in this state is part of its hostel's current occupancy"""
+        return status in ACTIVE_STATUSES and check_out >= date.today()
+
+    @staticmethod
+    def adjust_occupancy(hostel_id, delta):
+        """Add delta guests to a hostel's occupancy counter inside the caller's transaction"""
+        if not delta:
+            return
+
+        hostel = Hostel.query.filter_by(id=hostel_id).with_for_update().first()
+        if hostel:
+            hostel.occupied_guests = max(0, (hostel.occupied_guests or 0) + delta)
+
+    @staticmethod
+    def actual_occupancy(hostel_ids=None):
+        """Recompute occupancy from the bookings table as {hostel_id: guests}"""
+        query = db.session.query(Booking.hostel_id, func.sum(Booking.guests)).filter(
+            Booking.status.in_(ACTIVE_STATUSES),
+            Booking.check_out >= date.today()
+        )
+        if hostel_ids is not None:
+            query = query.filter(Booking.hostel_id.in_(hostel_ids))
+
+        return {hostel_id: int(guests or 0) for hostel_id, guests in query.group_by(Booking.hostel_id)}
+
+    @staticmethod
+    def check_occupancy(fix=False, hostel_ids=None):
+        """
+        Compare every hostel's occupancy counter with the bookings table.
+
+        Returns a list of {'hostel_id', 'stored', 'actual'} for each hostel that
+        has drifted; with fix=True the counters are corrected as well.
+        """
+        actual = BookingService.actual_occupancy(hostel_ids)
+
+        query = Hostel.query
+        if hostel_ids is not None:
+            query = query.filter(Hostel.id.in_(hostel_ids))
+        if fix:
+            query = query.with_for_update()
+
+        drift = []
+        try:
+            for hostel in query:
+                expected = actual.get(hostel.id, 0)
+                if hostel.occupied_guests != expected:
+                    drift.append({
+                        'hostel_id': hostel.id,
+                        'stored': hostel.occupied_guests,
+                        'actual': expected
+                    })
+                    if fix:
+                        hostel.occupied_guests = expected
+
+            if fix:
+                db.session.commit()
+                CacheService.bump('bookings')
+            return drift
+        except Exception as e:
+            db.session.rollback()
+            raise e
+
+    @staticmethod
+    def rollover_occupancy(days=1):
+        """
+        Release occupancy held by bookings whose check-out has passed (run daily).
+
+        Only hostels with an active booking that checked out in the last `days`
+        days are recomputed; check_occupancy catches anything older.
+        """
+        today = date.today()
+        hostel_ids = [
+            row[0] for row in db.session.query(Booking.hostel_id).filter(
+                Booking.status.in_(ACTIVE_STATUSES),
+                Booking.check_out < today,
+                Booking.check_out >= today - timedelta(days=days)
+            ).distinct()
+        ]
+
+        if not hostel_ids:
+            return 0
+
+        return len(BookingService.check_occupancy(fix=True, hostel_ids=hostel_ids))
+
+    @staticmethod
+    def complete_past_bookings():
+        """
+        Mark active bookings whose check-out has passed as completed (run daily),
+        which is what lets guests review their stay. Returns how many changed.
+        """
+        past = Booking.query.filter(
+            Booking.status.in_(ACTIVE_STATUSES),
+            Booking.check_out < date.today()
+        )
+        hostel_ids = [row[0] for row in past.with_entities(Booking.hostel_id).distinct()]
+        if not hostel_ids:
+            return 0
+
+        try:
+            completed = past.update(
+                {Booking.status: 'completed', Booking.updated_at: datetime.utcnow()},
+                synchronize_session=False
+            )
+            # Recount those hostels in the same transaction so no occupancy stays held (commits)
+            BookingService.check_occupancy(fix=True, hostel_ids=hostel_ids)
+            return completed
         except Exception as e:
             db.session.rollback()
             raise e
 
     @staticmethod
     def check_availability(hostel_id, check_in, check_out, guests=1):
-        """Check if a hostel is available for the given dates and number of guests"""
+        """
+        Check if a hostel is available for the given dates and number of guests.
+
+        Uses the per-night ledger, so the test is against peak concurrent
+        occupancy over the stay rather than the sum of every overlapping booking.
+        Callers that go on to book must hold the hostel row lock (see create_booking).
+        """
         # Get hostel capacity
         hostel = Hostel.query.get_or_404(hostel_id)
-        max_capacity = hostel.capacity
-
-        # Check for overlapping bookings and sum their guests
-        overlapping_bookings = Booking.query.filter(
-            and_(
-                Booking.hostel_id == hostel_id,
-                Booking.status.in_(['confirmed', 'upcoming']),
-                or_(
-                    and_(Booking.check_in <= check_in, Booking.check_out > check_in),
-                    and_(Booking.check_in < check_out, Booking.check_out >= check_out),
-                    and_(Booking.check_in >= check_in, Booking.check_out <= check_out)
-                )
+
+        peak_guests = db.session.query(func.max(HostelOccupancy.guests)).filter(
+            HostelOccupancy.hostel_id == hostel_id,
+            HostelOccupancy.day >= check_in,
+            HostelOccupancy.day < check_out
+        ).scalar() or 0
+
+        # Check if adding new guests would exceed capacity on the busiest night
+        return (peak_guests + guests) <= hostel.capacity
+
+    @staticmethod
+    def apply_to_ledger(hostel_id, check_in, check_out, delta):
+        """
+        Add delta guests to every night of a stay in the occupancy ledger.
+
+        Runs inside the caller's transaction with the hostel row already locked,
+        which is what makes the read-modify-write of the ledger rows safe.
+        """
+        if not delta or check_in >= check_out:
+            return
+
+        existing = {
+            row.day: row for row in HostelOccupancy.query.filter(
+                HostelOccupancy.hostel_id == hostel_id,
+                HostelOccupancy.day >= check_in,
+                HostelOccupancy.day < check_out
             )
-        ).all()
+        }
+
+        day = check_in
+        while day < check_out:
+            row = existing.get(day)
+            if row is None:
+                if delta > 0:
+                    db.session.add(HostelOccupancy(hostel_id=hostel_id, day=day, guests=delta))
+            else:
+                row.guests = max(0, row.guests + delta)
+            day += timedelta(days=1)
+
+    @staticmethod
+    def rebuild_ledger(hostel_ids=None):
+        """Rebuild the occupancy ledger from active bookings; returns the number of ledger rows"""
+        query = Booking.query.filter(
+            Booking.status.in_(ACTIVE_STATUSES),
+            Booking.check_out > date.today()
+        )
+        delete_query = HostelOccupancy.query
+        if hostel_ids is not None:
+            query = query.filter(Booking.hostel_id.in_(hostel_ids))
+            delete_query = delete_query.filter(HostelOccupancy.hostel_id.in_(hostel_ids))
 
-        # Sum guests from overlapping bookings
-        total_guests_booked = sum(booking.guests for booking in overlapping_bookings)
+        nights = {}
+        for hostel_id, check_in, check_out, guests in query.with_entities(
+            Booking.hostel_id, Booking.check_in, Booking.check_out, Booking.guests
+        ):
+            day = max(check_in, date.today())
+            while day < check_out:
+                nights[(hostel_id, day)] = nights.get((hostel_id, day), 0) + guests
+                day += timedelta(days=1)
 
-        # Check if adding new guests would exceed capacity
-        return (total_guests_booked + guests) <= max_capacity
+        try:
+            delete_query.delete(synchronize_session=False)
+            db.session.add_all([
+                HostelOccupancy(hostel_id=hostel_id, day=day, guests=guests)
+                for (hostel_id, day), guests in nights.items()
+            ])
+            db.session.commit()
+            CacheService.bump('bookings')
+            return len(nights)
+        except Exception as e:
+            db.session.rollback()
+            raise e
 
     @staticmethod
-    def get_user_bookings(user_id, page=1, per_page=20, status=None):
-        """Get all bookings for a user"""
+    def get_user_bookings(user_id, page=1, per_page=20, status=None, cursor=None, include_total=False):
+        """Get all bookings for a user (pass cursor for keyset pagination)"""
         query = Booking.query.filter_by(user_id=user_id)
 
         if status:
             query = query.filter_by(status=status)
 
+        if cursor is not None:
+            keyset = keyset_paginate(query, Booking.created_at, Booking.id, cursor, per_page,
+                                     include_total=include_total)
+            return {
+                'bookings': [booking.to_dict() for booking in keyset.items],
+                **keyset.meta()
+            }
+
         query = query.order_by(Booking.created_at.desc())
 
         bookings = query.paginate(page=page, per_page=per_page, error_out=False)
@@ -112,20 +305,31 @@ class BookingService:
             user_id=user_id
         ).first_or_404()
 
-        if booking.status not in ['confirmed', 'upcoming']:
-            raise ValueError("Cannot cancel this booking")
+        try:
+            # Lock the hostel row before touching its ledger (as create_booking does), then
+            # re-read the booking so a concurrent cancel can't release its nights twice
+            Hostel.query.filter_by(id=booking.hostel_id).with_for_update().first()
+            db.session.refresh(booking)
+
+            if booking.status not in ['confirmed', 'upcoming']:
+                raise ValueError("Cannot cancel this booking")
 
-        if booking.check_in <= date.today():
-            raise ValueError("Cannot cancel booking on or after check-in date")
+            if booking.check_in <= date.today():
+                raise ValueError("Cannot cancel booking on or after check-in date")
+
+            if booking.status in ACTIVE_STATUSES:
+                BookingService.apply_to_ledger(booking.hostel_id, booking.check_in, booking.check_out, -booking.guests)
+            if BookingService.counts_towards_occupancy(booking.status, booking.check_out):
+                BookingService.adjust_occupancy(booking.hostel_id, -booking.guests)
 
-        try:
             booking.status = 'cancelled'
             booking.updated_at = datetime.utcnow()
-            db.session.commit()
 
-            # Recalculate availability for the hostel (this will update the available_rooms property)
-            # The available_rooms property in Hostel model automatically recalculates based on current bookings
-            return booking.to_dict()
+            booking_data = booking.to_dict()
+            NotificationService.notify_booking_cancelled(booking_data, queue=True)
+            db.session.commit()
+            CacheService.bump('bookings')
+            return booking_data
         except Exception as e:
             db.session.rollback()
             raise e
@@ -167,17 +371,37 @@ class BookingService:
             raise ValueError(f"Invalid status. Must be one of: {', '.join(valid_statuses)}")
 
         try:
+            # Moving a booking into or out of an active status takes or releases its nights
+            was_active = booking.status in ACTIVE_STATUSES
+            is_active = status in ACTIVE_STATUSES
+            if was_active != is_active:
+                Hostel.query.filter_by(id=booking.hostel_id).with_for_update().first()
+                if is_active and not BookingService.check_availability(
+                    booking.hostel_id, booking.check_in, booking.check_out, booking.guests
+                ):
+                    raise ValueError("Hostel is not available for the selected dates")
+                BookingService.apply_to_ledger(
+                    booking.hostel_id, booking.check_in, booking.check_out,
+                    booking.guests if is_active else -booking.guests
+                )
+
+            was_counted = BookingService.counts_towards_occupancy(booking.status, booking.check_out)
+            is_counted = BookingService.counts_towards_occupancy(status, booking.check_out)
+            if was_counted != is_counted:
+                BookingService.adjust_occupancy(booking.hostel_id, booking.guests if is_counted else -booking.guests)
+
             booking.status = status
             booking.updated_at = datetime.utcnow()
             db.session.commit()
+            CacheService.bump('bookings')
             return booking.to_dict()
         except Exception as e:
             db.session.rollback()
             raise e
 
     @staticmethod
-    def get_landlord_bookings(user_id, page=1, per_page=20, status=None):
-        """Get all bookings for all hostels owned by a landlord"""
+    def get_landlord_bookings(user_id, page=1, per_page=20, status=None, cursor=None, include_total=False):
+        """Get all bookings for all hostels owned by a landlord (pass cursor for keyset pagination)"""
         # Get landlord profile to find landlord_id
         from ..models.user import User
         user = User.query.get_or_404(user_id)
@@ -191,6 +415,8 @@ class BookingService:
         hostel_ids = [h.id for h in hostels]
 
         if not hostel_ids:
+            if cursor is not None:
+                return {'bookings': [], 'next_cursor': None, 'has_more': False, 'per_page': per_page}
             return {
                 'bookings': [],
                 'total': 0,
@@ -203,26 +429,37 @@ class BookingService:
         if status:
             query = query.filter_by(status=status)
 
+        if cursor is not None:
+            keyset = keyset_paginate(query, Booking.created_at, Booking.id, cursor, per_page,
+                                     include_total=include_total)
+            return {
+                'bookings': BookingService._with_customer_info(keyset.items),
+                **keyset.meta()
+            }
+
         query = query.order_by(Booking.created_at.desc())
 
         bookings = query.paginate(page=page, per_page=per_page, error_out=False)
 
-        # Enhance booking data with hostel and user info
+        return {
+            'bookings': BookingService._with_customer_info(bookings.items),
+            'total': bookings.total,
+            'pages': bookings.pages,
+            'current_page': bookings.page
+        }
+
+    @staticmethod
+    def _with_customer_info(bookings):
+        """Serialize bookings with hostel name and customer details for landlord views"""
         enhanced_bookings = []
-        for booking in bookings.items:
+        for booking in bookings:
             booking_dict = booking.to_dict()
             # Add hostel name and user info
             booking_dict['hostel_name'] = booking.hostel.name if booking.hostel else 'Unknown'
             booking_dict['customer_name'] = booking.user.name if booking.user else 'Unknown'
             booking_dict['customer_email'] = booking.user.email if booking.user else 'Unknown'
             enhanced_bookings.append(booking_dict)
-
-        return {
-            'bookings': enhanced_bookings,
-            'total': bookings.total,
-            'pages': bookings.pages,
-            'current_page': bookings.page
-        }
+        return enhanced_bookings
 
     @staticmethod
     def get_booking_stats(hostel_id=None, landlord_id=None):
@@ -0,0 +1,111 @@
+import hashlib
+import json
+import threading
+from flask import current_app
+from werkzeug.utils import import_string
+from ..utils.cache import TTLCache
+
+class CacheService:
+    """
+    Result cache for SearchService.search_hostels.
+
+    Keys are the canonicalized query parameters plus page/per_page and the
+    current hostel, booking and review generations. Writes bump a generation
+    instead of hunting down affected entries; stale entries simply stop being
+    addressable and age out of the LRU.
+
+    The default backend is an in-process TTLCache. SEARCH_CACHE_BACKEND may name
+    a factory ("package.module:factory", called with the app) returning any object
+    with get(key, default), set(key, value, ttl) and incr(key), e.g. a wrapper
+    around a shared store so every worker sees the same entries and generations.
+    """
+    GENERATIONS = ('hostels', 'bookings', 'reviews')
+
+    _lock = threading.Lock()
+    _backend = None
+    _generations = None
+    _hits = 0
+    _misses = 0
+
+    @staticmethod
+    def _stores():
+        if CacheService._backend is None:
+            with CacheService._lock:
+                if CacheService._backend is None:
+                    config = current_app.config
+                    factory = config.get('SEARCH_CACHE_BACKEND')
+                    if factory:
+                        backend = import_string(factory)(current_app._get_current_object())
+                        CacheService._generations = backend
+                    else:
+                        backend = TTLCache(
+                            maxsize=config.get('SEARCH_CACHE_SIZE', 1024),
+                            ttl=config.get('SEARCH_CACHE_TTL', 60)
+                        )
+                        # Generations live outside the LRU so eviction can never reset them
+                        CacheService._generations = TTLCache(maxsize=0, ttl=0)
+                    CacheService._backend = backend
+        return CacheService._backend, CacheService._generations
+
+    @staticmethod
+    def canonicalize(query_params):
+        """Normalize query params so equivalent searches share a cache entry"""
+        canonical = {}
+        for key, value in query_params.items():
+            if isinstance(value, (list, tuple)):
+                values = sorted({str(v).strip() for v in value if str(v).strip()})
+                if not values:
+                    continue
+                canonical[key] = values[0] if len(values) == 1 else values
+            elif value is not None and str(value).strip():
+                canonical[key] = str(value).strip()
+        return canonical
+
+    @staticmethod
+    def search_key(query_params, page, per_page):
+        """Cache key for a search request at the current data generations"""
+        _, generations = CacheService._stores()
+        payload = json.dumps({
+            'params': CacheService.canonicalize(query_params),
+            'page': page,
+            'per_page': per_page,
+            'generations': [generations.get(f'gen:{name}', 0) for name in CacheService.GENERATIONS]
+        }, sort_keys=True)
+        return 'search:' + hashlib.sha1(payload.encode()).hexdigest()
+
+    @staticmethod
+    def get(key):
+        backend, _ = CacheService._stores()
+        value = backend.get(key)
+        if value is None:
+            CacheService._misses += 1
+        else:
+            CacheService._hits += 1
+        return value
+
+    @staticmethod
+    def set(key, value):
+        backend, _ = CacheService._stores()
+        backend.set(key, value, current_app.config.get('SEARCH_CACHE_TTL', 60))
+
+    @staticmethod
+    def bump(*names):
+        """Invalidate cached results that depend on the named data (hostels, bookings, reviews)"""
+        _, generations = CacheService._stores()
+        for name in names:
+            generations.incr(f'gen:{name}')
+
+    @staticmethod
+    def stats():
+        """Hit/miss counters for this process plus the current generations"""
+        backend, generations = CacheService._stores()
+        lookups = CacheService._hits + CacheService._misses
+        return {
+            'hits': CacheService._hits,
+            'misses': CacheService._misses,
+            'hit_rate': round(CacheService._hits / lookups, 4) if lookups else 0.0,
+            'entries': len(backend) if hasattr(backend, '__len__') else None,
+            'generations': {
+                name: generations.get(f'gen:{name}', 0) for name in CacheService.GENERATIONS
+            }
+        }
@@ -0,0 +1,146 @@
+import json
+from flask import current_app
+from ..extensions import db
+from ..models.campus import Campus, HostelCampusDistance
+from .index_service import IndexService
+from .cache_service import CacheService
+from ..utils.geo_index import haversine_km
+
+class CampusService:
+    """
+    Campus reference data and the precomputed hostel -> campus distance table.
+
+    Only pairs within CAMPUS_DISTANCE_MAX_KM are stored, so the table stays
+    proportional to the hostels actually near each campus, and "within X km of
+    campus Y, nearest first" is a range scan on (campus_id, distance_km).
+    """
+
+    @staticmethod
+    def list_campuses():
+        """Get every campus, alphabetically"""
+        return [campus.to_dict() for campus in Campus.query.order_by(Campus.name.asc()).all()]
+
+    @staticmethod
+    def resolve(name):
+        """Find a campus by id, name or alias (case-insensitive); None if unknown"""
+        value = str(name).strip()
+        if value.isdigit():
+            return db.session.get(Campus, int(value))
+
+        key = value.casefold()
+        for campus in Campus.query.all():
+            names = [campus.name] + list(campus.aliases or [])
+            if any(str(candidate).strip().casefold() == key for candidate in names):
+                return campus
+        return None
+
+    @staticmethod
+    def load_campuses(path=None):
+        """
+        Upsert campuses from a JSON file (a list of {name, aliases, city,
+        latitude, longitude}) and recompute distances for the ones that changed.
+        Returns (created, updated).
+        """
+        path = path or current_app.config['CAMPUS_DATA_FILE']
+        with open(path, encoding='utf-8') as handle:
+            entries = json.load(handle)
+
+        existing = {campus.name: campus for campus in Campus.query.all()}
+        created = 0
+        updated = 0
+        moved = []
+
+        for entry in entries:
+            name = (entry.get('name') or '').strip()
+            if not name or entry.get('latitude') is None or entry.get('longitude') is None:
+                raise ValueError(f"Campus entry needs name, latitude and longitude: {entry}")
+
+            latitude = float(entry['latitude'])
+            longitude = float(entry['longitude'])
+            campus = existing.get(name)
+            if campus is None:
+                campus = Campus(name=name, latitude=latitude, longitude=longitude)
+                db.session.add(campus)
+                moved.append(campus)
+                created += 1
+            elif (campus.latitude, campus.longitude) != (latitude, longitude):
+                campus.latitude = latitude
+                campus.longitude = longitude
+                moved.append(campus)
+                updated += 1
+            elif campus.aliases != entry.get('aliases', []) or campus.city != entry.get('city'):
+                updated += 1
+
+            campus.aliases = entry.get('aliases', [])
+            campus.city = entry.get('city')
+
+        db.session.flush()
+        if moved:
+            CampusService.rebuild_distances([campus.id for campus in moved])
+        db.session.commit()
+        CacheService.bump('hostels')
+
+        return created, updated
+
+    @staticmethod
+    def rebuild_distances(campus_ids=None):
+        """
+        Recompute the distance rows of the given campuses (all when None) within
+        the caller's transaction. Candidates come from a freshly built spatial
+        index, so each campus costs one radius query rather than a pass over
+        every hostel. Returns the number of rows written.
+        """
+        max_km = current_app.config.get('CAMPUS_DISTANCE_MAX_KM', 30)
+
+        campuses = Campus.query
+        if campus_ids is not None:
+            campuses = campuses.filter(Campus.id.in_(campus_ids))
+        campuses = campuses.all()
+
+        delete = HostelCampusDistance.query
+        if campus_ids is not None:
+            delete = delete.filter(HostelCampusDistance.campus_id.in_(campus_ids))
+        delete.delete(synchronize_session=False)
+
+        geo_index = IndexService.build_geo_index()
+        rows = []
+        for campus in campuses:
+            for hostel_id, distance in geo_index.query_radius(campus.latitude, campus.longitude, max_km):
+                rows.append({'hostel_id': hostel_id, 'campus_id': campus.id, 'distance_km': distance})
+
+        if rows:
+            db.session.bulk_insert_mappings(HostelCampusDistance, rows)
+        return len(rows)
+
+    @staticmethod
+    def refresh_hostel_distances(hostel):
+        """Recompute one hostel's distance rows within the caller's transaction (after its coordinates change)"""
+        HostelCampusDistance.query.filter_by(hostel_id=hostel.id).delete(synchronize_session=False)
+        if hostel.latitude is None or hostel.longitude is None:
+            return
+
+        max_km = current_app.config.get('CAMPUS_DISTANCE_MAX_KM', 30)
+        for campus in Campus.query.all():
+            distance = haversine_km(hostel.latitude, hostel.longitude, campus.latitude, campus.longitude)
+            if distance <= max_km:
+                db.session.add(HostelCampusDistance(hostel_id=hostel.id, campus_id=campus.id, distance_km=distance))
+
+    @staticmethod
+    def distances_for(campus_id, hostel_ids):
+        """Map hostel id -> distance_km to a campus for the given hostels"""
+        if not hostel_ids:
+            return {}
+        rows = db.session.query(HostelCampusDistance.hostel_id, HostelCampusDistance.distance_km).filter(
+            HostelCampusDistance.campus_id == campus_id,
+            HostelCampusDistance.hostel_id.in_(hostel_ids)
+        )
+        return dict(rows)
+
+    @staticmethod
+    def nearest_campus(hostel_id):
+        """Return (campus, distance_km) for the closest campus to a hostel, or None"""
+        return db.session.query(Campus, HostelCampusDistance.distance_km)\
+            .join(HostelCampusDistance, HostelCampusDistance.campus_id == Campus.id)\
+            .filter(HostelCampusDistance.hostel_id == hostel_id)\
+            .order_by(HostelCampusDistance.distance_km.asc())\
+            .first()
@@ -1,116 +1,147 @@
 import os
-from flask import render_template_string
-from ..extensions import mail
-from flask_mail import Message
+import smtplib
+import time
+from flask import current_app
+from ..extensions import mail, email_templates
+from flask_mail import Message, BadHeaderError
 
 class EmailService:
     @staticmethod
     def send_email(to, subject, html_body, text_body=None):
         """Send an email"""
         try:
-            msg = Message(
-                subject=subject,
-                recipients=[to] if isinstance(to, str) else to,
-                html=html_body,
-                body=text_body
-            )
-            mail.send(msg)
+            EmailService.deliver(to, subject, html_body, text_body)
             return True
         except Exception as e:
             print(f"Email sending failed: {e}")
             return False
 
     @staticmethod
-    def send_booking_confirmation(user_email, booking_data):
-        """Send booking confirmation email"""
-        subject = f"Booking Confirmed - {booking_data['hostel']['name']}"
+    def _message(to, subject, html_body, text_body=None):
+        return Message(
+            subject=subject,
+            recipients=[to] if isinstance(to, str) else to,
+            html=html_body,
+            body=text_body
+        )
 
-        html_template = """
-        <html>
-        <body>
-            <h2>Booking Confirmation</h2>
-            <p>Dear {{ booking.user.name }},</p>
-            <p>Your booking has been confirmed! Here are the details:</p>
-
-            <div style="border: 1px solid #ddd; padding: 15px; margin: 15px 0;">
-                <h3>{{ booking.hostel.name }}</h3>
-                <p><strong>Location:</strong> {{ booking.hostel.location }}</p>
-                <p><strong>Check-in:</strong> {{ booking.check_in }}</p>
-                <p><strong>Check-out:</strong> {{ booking.check_out }}</p>
-                <p><strong>Guests:</strong> {{ booking.guests }}</p>
-                <p><strong>Total Price:</strong> {{ booking.currency }} {{ booking.total_price }}</p>
-                <p><strong>Booking ID:</strong> {{ booking.id }}</p>
-            </div>
-
-            <p>Please arrive on time for check-in. Contact the landlord if you need to make changes.</p>
-
-            <p>Best regards,<br>The Hostel Hunt Team</p>
-        </body>
-        </html>
+    @staticmethod
+    def deliver(to, subject, html_body, text_body=None):
+        """Send an email over SMTP now, raising on failure"""
+        mail.send(EmailService._message(to, subject, html_body, text_body))
+
+    @staticmethod
+    def send_bulk(messages, batch_size=None, on_batch=None):
         """
+        Send many emails over pooled SMTP connections: one connection (and TLS
+        handshake) per batch of batch_size messages instead of one per message.
+        `messages` is any iterable of (to, subject, html_body[, text_body]) and
+        is consumed lazily. A message the server rejects is counted as failed;
+        a dropped connection is reopened and the message retried once.
+        Returns counters: sent, failed, batches, reconnects, seconds.
+        """
+        batch_size = batch_size or current_app.config.get('EMAIL_BULK_BATCH_SIZE', 100)
+        stats = {'sent': 0, 'failed': 0, 'batches': 0, 'reconnects': 0, 'seconds': 0.0}
+
+        batch = []
+        for message in messages:
+            batch.append(message)
+            if len(batch) >= batch_size:
+                EmailService._send_batch(batch, stats, on_batch)
+                batch = []
+        if batch:
+            EmailService._send_batch(batch, stats, on_batch)
+        return stats
 
-        html_body = render_template_string(html_template, booking=booking_data)
+    @staticmethod
+    def _send_batch(batch, stats, on_batch=None):
+        started = time.perf_counter()
+        sent = failed = 0
+        connection = None
 
-        return EmailService.send_email(user_email, subject, html_body)
+        try:
+            for message in batch:
+                msg = EmailService._message(*message)
+                for attempt in (1, 2):
+                    try:
+                        if connection is None:
+                            connection = mail.connect().__enter__()
+                        connection.send(msg)
+                        sent += 1
+                        break
+                    except (smtplib.SMTPRecipientsRefused, smtplib.SMTPSenderRefused,
+                            smtplib.SMTPDataError, BadHeaderError, AssertionError) as e:
+                        # The server (or Flask-Mail) rejected this message; the connection is still usable
+                        current_app.logger.warning(f"Email to {message[0]} failed: {e}")
+                        failed += 1
+                        break
+                    except Exception as e:
+                        EmailService._close(connection)
+                        connection = None
+                        stats['reconnects'] += 1
+                        if attempt == 2:
+                            current_app.logger.warning(f"Email to {message[0]} failed after reconnecting: {e}")
+                            failed += 1
+        finally:
+            EmailService._close(connection)
+
+        elapsed = time.perf_counter() - started
+        stats['sent'] += sent
+        stats['failed'] += failed
+        stats['batches'] += 1
+        stats['seconds'] += elapsed
+
+        batch_stats = {'sent': sent, 'failed': failed, 'seconds': elapsed,
+                       'per_second': sent / elapsed if elapsed > 0 else 0.0}
+        current_app.logger.info(
+            f"Email batch: {sent} sent, {failed} failed in {elapsed:.2f}s ({batch_stats['per_second']:.1f}/s)"
+        )
+        if on_batch:
+            on_batch(batch_stats)
 
     @staticmethod
-    def send_booking_cancellation(user_email, booking_data):
-        """Send booking cancellation email"""
-        subject = f"Booking Cancelled - {booking_data['hostel']['name']}"
+    def _close(connection):
+        if connection is None:
+            return
+        try:
+            connection.__exit__(None, None, None)
+        except Exception:
+            pass
 
-        html_template = """
-        <html>
-        <body>
-            <h2>Booking Cancellation</h2>
-            <p>Dear {{ booking.user.name }},</p>
-            <p>Your booking has been cancelled. Here are the details:</p>
-
-            <div style="border: 1px solid #ddd; padding: 15px; margin: 15px 0;">
-                <h3>{{ booking.hostel.name }}</h3>
-                <p><strong>Booking ID:</strong> {{ booking.id }}</p>
-                <p><strong>Check-in:</strong> {{ booking.check_in }}</p>
-                <p><strong>Check-out:</strong> {{ booking.check_out }}</p>
-            </div>
-
-            <p>If this was a mistake or you need assistance, please contact us.</p>
-
-            <p>Best regards,<br>The Hostel Hunt Team</p>
-        </body>
-        </html>
-        """
+    @staticmethod
+    def queue_email(to, subject, html_body, text_body=None):
+        """Add an email to the outbox within the caller's transaction; the outbox worker sends it after commit"""
+        from .outbox_service import OutboxService
+        OutboxService.enqueue(to, subject, html_body, text_body)
+        return True
+
+    @staticmethod
+    def _dispatch(to, subject, html_body, queue=False):
+        if queue:
+            return EmailService.queue_email(to, subject, html_body)
+        return EmailService.send_email(to, subject, html_body)
 
-        html_body = render_template_string(html_template, booking=booking_data)
+    @staticmethod
+    def send_booking_confirmation(user_email, booking_data, queue=False):
+        """Send booking confirmation email"""
+        subject = f"Booking Confirmed - {booking_data['hostel']['name']}"
+        html_body = email_templates.render('booking_confirmation.html', booking=booking_data)
 
-        return EmailService.send_email(user_email, subject, html_body)
+        return EmailService._dispatch(user_email, subject, html_body, queue)
+
+    @staticmethod
+    def send_booking_cancellation(user_email, booking_data, queue=False):
+        """Send booking cancellation email"""
+        subject = f"Booking Cancelled - {booking_data['hostel']['name']}"
+        html_body = email_templates.render('booking_cancellation.html', booking=booking_data)
+
+        return EmailService._dispatch(user_email, subject, html_body, queue)
 
     @staticmethod
     def send_welcome_email(user_email, user_name):
         """Send welcome email to new users"""
         subject = "Welcome to Hostel Hunt!"
-
-        html_template = """
-        <html>
-        <body>
-            <h2>Welcome to Hostel Hunt!</h2>
-            <p>Dear {{ user_name }},</p>
-            <p>Thank you for joining Hostel Hunt! We're excited to help you find the perfect accommodation.</p>
-
-            <p>Here's what you can do:</p>
-            <ul>
-                <li>Browse and book hostels</li>
-                <li>Read and write reviews</li>
-                <li>Manage your bookings</li>
-                <li>Contact landlords directly</li>
-            </ul>
-
-            <p>Get started by exploring our hostel listings!</p>
-
-            <p>Best regards,<br>The Hostel Hunt Team</p>
-        </body>
-        </html>
-        """
-
-        html_body = render_template_string(html_template, user_name=user_name)
+        html_body = email_templates.render('welcome.html', user_name=user_name)
 
         return EmailService.send_email(user_email, subject, html_body)
 
@@ -120,83 +151,23 @@ class EmailService:
         subject = "Password Reset Request"
 
         reset_url = f"{os.getenv('FRONTEND_URL', 'http://localhost:3000')}/reset-password?token={reset_token}"
-
-        html_template = """
-        <html>
-        <body>
-            <h2>Password Reset Request</h2>
-            <p>You requested a password reset for your Hostel Hunt account.</p>
-            <p>Click the link below to reset your password:</p>
-
-            <p><a href="{{ reset_url }}" style="background-color: #007bff; color: white; padding: 10px 20px; text-decoration: none; border-radius: 5px;">Reset Password</a></p>
-
-            <p>This link will expire in 1 hour.</p>
-            <p>If you didn't request this reset, please ignore this email.</p>
-
-            <p>Best regards,<br>The Hostel Hunt Team</p>
-        </body>
-        </html>
-        """
-
-        html_body = render_template_string(html_template, reset_url=reset_url)
+        html_body = email_templates.render('password_reset.html', reset_url=reset_url)
 
         return EmailService.send_email(user_email, subject, html_body)
 
     @staticmethod
-    def send_landlord_notification(landlord_email, booking_data):
+    def send_landlord_notification(landlord_email, booking_data, queue=False):
         """Send notification to landlord about new booking"""
         subject = f"New Booking - {booking_data['hostel']['name']}"
+        html_body = email_templates.render('landlord_new_booking.html', booking=booking_data)
 
-        html_template = """
-        <html>
-        <body>
-            <h2>New Booking Notification</h2>
-            <p>You have a new booking for your hostel!</p>
-
-            <div style="border: 1px solid #ddd; padding: 15px; margin: 15px 0;">
-                <h3>{{ booking.hostel.name }}</h3>
-                <p><strong>Guest:</strong> {{ booking.user.name }} ({{ booking.user.email }})</p>
-                <p><strong>Check-in:</strong> {{ booking.check_in }}</p>
-                <p><strong>Check-out:</strong> {{ booking.check_out }}</p>
-                <p><strong>Guests:</strong> {{ booking.guests }}</p>
-                <p><strong>Total Price:</strong> {{ booking.currency }} {{ booking.total_price }}</p>
-                <p><strong>Booking ID:</strong> {{ booking.id }}</p>
-            </div>
-
-            <p>Please confirm the booking and prepare for the guest's arrival.</p>
-
-            <p>Best regards,<br>The Hostel Hunt Team</p>
-        </body>
-        </html>
-        """
-
-        html_body = render_template_string(html_template, booking=booking_data)
-
-        return EmailService.send_email(landlord_email, subject, html_body)
+        return EmailService._dispatch(landlord_email, subject, html_body, queue)
 
     @staticmethod
     def send_contact_form_email(contact_data):
         """Send contact form submission to admin"""
         subject = f"Contact Form: {contact_data['subject']}"
-
-        html_template = """
-        <html>
-        <body>
-            <h2>New Contact Form Submission</h2>
-
-            <div style="border: 1px solid #ddd; padding: 15px; margin: 15px 0;">
-                <p><strong>From:</strong> {{ contact.name }} ({{ contact.email }})</p>
-                <p><strong>Subject:</strong> {{ contact.subject }}</p>
-                <p><strong>Message:</strong></p>
-                <p>{{ contact.message }}</p>
-            </div>
-
-            <p>Please respond to this inquiry as soon as possible.</p>
-        </body>
-        </html>
-        """
-
-        html_body = render_template_string(html_template, contact=contact_data)
+        html_body = email_templates.render('contact_form.html', contact=contact_data)
 
         admin_email = os.getenv('ADMIN_EMAIL', 'admin@hostelhunt.com')
         return EmailService.send_email(admin_email, subject, html_body)
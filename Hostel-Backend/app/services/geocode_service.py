@@ -0,0 +1,160 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from flask import current_app
+from werkzeug.utils import import_string
+from ..extensions import db
+from ..models.hostel import Hostel
+from ..models.geocode import GeocodeCache
+from ..utils.geocoding import GazetteerGeocoder, normalize_location
+from .index_service import IndexService
+from .cache_service import CacheService
+from .campus_service import CampusService
+from .similarity_service import SimilarityService
+from .saved_search_service import SavedSearchService
+from sqlalchemy import or_
+
+_FAILED = object()
+
+class GeocodeService:
+    """
+    Backfills hostel coordinates from their location strings.
+
+    Hostels are walked in id order in batches. Each distinct location is looked
+    up in the geocode_cache table first, and only strings never seen before are
+    sent to the geocoder (up to GEOCODER_WORKERS at a time). Every batch commits
+    on its own, so an interrupted run resumes where it stopped: updated hostels
+    no longer qualify and cached misses are not retried unless asked.
+    """
+
+    @staticmethod
+    def get_geocoder():
+        """The configured geocoder: GEOCODER_BACKEND factory, or the offline gazetteer"""
+        factory = current_app.config.get('GEOCODER_BACKEND')
+        if factory:
+            return import_string(factory)(current_app._get_current_object())
+        return GazetteerGeocoder(current_app.config['GEOCODER_GAZETTEER_FILE'])
+
+    @staticmethod
+    def status():
+        """Backfill progress: hostels still missing coordinates and geocode cache size"""
+        return {
+            'hostels_missing_coordinates': Hostel.query.filter(
+                or_(Hostel.latitude.is_(None), Hostel.longitude.is_(None))
+            ).count(),
+            'cached_locations': GeocodeCache.query.count(),
+            'cached_misses': GeocodeCache.query.filter(GeocodeCache.latitude.is_(None)).count()
+        }
+
+    @staticmethod
+    def backfill(batch_size=100, workers=None, limit=None, retry_misses=False, geocoder=None, on_batch=None):
+        """
+        Geocode hostels that have no coordinates. Returns counters:
+        scanned, looked_up (sent to the geocoder), cache_hits, updated, unresolved.
+        """
+        geocoder = geocoder or GeocodeService.get_geocoder()
+        workers = workers or current_app.config.get('GEOCODER_WORKERS', 4)
+        stats = {'scanned': 0, 'looked_up': 0, 'cache_hits': 0, 'updated': 0, 'unresolved': 0}
+
+        last_id = 0
+        while limit is None or stats['scanned'] < limit:
+            size = batch_size if limit is None else min(batch_size, limit - stats['scanned'])
+            hostels = Hostel.query.filter(
+                Hostel.id > last_id,
+                or_(Hostel.latitude.is_(None), Hostel.longitude.is_(None))
+            ).order_by(Hostel.id.asc()).limit(size).all()
+            if not hostels:
+                break
+
+            last_id = hostels[-1].id
+            stats['scanned'] += len(hostels)
+
+            resolved = GeocodeService._resolve(
+                {normalize_location(h.location) for h in hostels if h.location and h.location.strip()},
+                geocoder, workers, retry_misses, stats
+            )
+
+            updated = []
+            for hostel in hostels:
+                point = resolved.get(normalize_location(hostel.location)) if hostel.location else None
+                if point is None:
+                    stats['unresolved'] += 1
+                    continue
+                hostel.latitude, hostel.longitude = point
+                CampusService.refresh_hostel_distances(hostel)
+                # Its neighbours (and everyone ranked against it) were computed without coordinates
+                SimilarityService.mark_stale(hostel)
+                updated.append(hostel)
+
+            db.session.commit()
+            for hostel in updated:
+                IndexService.on_hostel_saved(hostel)
+            if updated:
+                CacheService.bump('hostels')
+            # Radius and campus-distance saved searches can only match once a hostel has coordinates
+            for hostel in updated:
+                GeocodeService._percolate(hostel)
+            stats['updated'] += len(updated)
+
+            if on_batch:
+                on_batch(last_id, dict(stats))
+
+        return stats
+
+    @staticmethod
+    def _percolate(hostel):
+        # Saved-search alerts must never stop the backfill
+        try:
+            SavedSearchService.percolate(hostel)
+        except Exception as e:
+            db.session.rollback()
+            current_app.logger.warning(f"Saved search matching failed for hostel {hostel.id}: {e}")
+
+    @staticmethod
+    def _resolve(queries, geocoder, workers, retry_misses, stats):
+        """Map normalized location -> (lat, lng) or None, geocoding only uncached strings"""
+        queries = {query for query in queries if query}
+        if not queries:
+            return {}
+
+        cached = {row.location: row for row in GeocodeCache.query.filter(GeocodeCache.location.in_(queries))}
+        resolved = {}
+        pending = []
+        for query in queries:
+            row = cached.get(query)
+            if row is not None and (row.found or not retry_misses):
+                resolved[query] = (row.latitude, row.longitude) if row.found else None
+                stats['cache_hits'] += 1
+            else:
+                pending.append(query)
+
+        if pending:
+            logger = current_app.logger
+
+            def lookup(query):
+                try:
+                    return geocoder.geocode(query)
+                except Exception as e:
+                    logger.warning(f"Geocoding '{query}' failed: {e}")
+                    return _FAILED
+
+            # Only the geocoder calls run in threads; all database work stays on this one
+            with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+                points = list(pool.map(lookup, pending))
+            stats['looked_up'] += len(pending)
+
+            provider = getattr(geocoder, 'name', type(geocoder).__name__)
+            for query, point in zip(pending, points):
+                if point is _FAILED:
+                    # Errors (timeouts, quota) are not cached, so the next run tries again
+                    resolved[query] = None
+                    continue
+                resolved[query] = point
+                row = cached.get(query)
+                if row is None:
+                    row = GeocodeCache(location=query)
+                    db.session.add(row)
+                row.latitude, row.longitude = point if point else (None, None)
+                row.provider = provider
+                row.resolved_at = datetime.utcnow()
+
+        return resolved
@@ -1,28 +1,35 @@
 from ..extensions import db
 from ..models.hostel import Hostel
 from ..models.amenity import Amenity
-from ..models.review import Review
-from sqlalchemy import and_, or_, func
+from ..models.campus import HostelCampusDistance
+from ..models.saved_search import SavedSearchMatch
+from .index_service import IndexService
+from .search_service import SearchService
+from .cache_service import CacheService
+from .campus_service import CampusService
+from .saved_search_service import SavedSearchService
+from .similarity_service import SimilarityService
+from ..utils.pagination import keyset_paginate
+from ..utils.geo_index import haversine_km
+from sqlalchemy.orm import joinedload
+from flask import current_app
 from datetime import datetime
+import math
 
 class HostelService:
     @staticmethod
-    def get_all_hostels(page=1, per_page=20, filters=None):
-        """Get all hostels with pagination and filters"""
+    def get_all_hostels(page=1, per_page=20, filters=None, cursor=None, include_total=False):
+        """Get all hostels with pagination and filters (pass cursor for keyset pagination)"""
         query = Hostel.query
 
         if filters:
-            # Location Filter: Now searches Name, Location, AND University field
+            # Location Filter: searches Name, Location, Description AND University through the text index
             if filters.get('location'):
-                location_term = f"%{filters['location']}%"
-                query = query.filter(
-                    or_(
-                        Hostel.location.ilike(location_term),
-                        Hostel.name.ilike(location_term),
-                        # NEW: Search inside the JSON features for the university name
-                        func.cast(Hostel.features['university'], db.String).ilike(location_term)
-                    )
-                )
+                matching_ids = IndexService.search_text(filters['location'])
+                if matching_ids:
+                    query = query.filter(Hostel.id.in_(matching_ids))
+                else:
+                    query = query.filter(Hostel.id == -1)
 
             if filters.get('min_price'):
                 query = query.filter(Hostel.price >= filters['min_price'])
@@ -42,16 +49,25 @@ class HostelService:
         # Sorting
         sort_by = filters.get('sort_by', 'created_at') if filters else 'created_at'
         if sort_by == 'price_asc':
-            query = query.order_by(Hostel.price.asc())
+            sort_column, descending = Hostel.price, False
         elif sort_by == 'price_desc':
-            query = query.order_by(Hostel.price.desc())
+            sort_column, descending = Hostel.price, True
         else:
-            query = query.order_by(Hostel.created_at.desc())
+            sort_column, descending = Hostel.created_at, True
+
+        if cursor is not None:
+            keyset = keyset_paginate(query, sort_column, Hostel.id, cursor, per_page,
+                                     descending=descending, include_total=include_total)
+            return {
+                'hostels': HostelService.serialize_hostels(keyset.items),
+                **keyset.meta()
+            }
 
+        query = query.order_by(sort_column.desc() if descending else sort_column.asc())
         hostels = query.paginate(page=page, per_page=per_page, error_out=False)
 
         return {
-            'hostels': [hostel.to_dict() for hostel in hostels.items],
+            'hostels': HostelService.serialize_hostels(hostels.items),
             'total': hostels.total,
             'pages': hostels.pages,
             'current_page': hostels.page,
@@ -59,15 +75,58 @@ class HostelService:
         }
 
     @staticmethod
-    def get_hostel_by_id(hostel_id):
-        """Get a single hostel by ID with related data"""
+    def serialize_hostels(hostels, include_ratings=False):
+        """
+        Serialize a page of hostels with a constant number of queries.
+
+        Landlords (with their users) are fetched for the whole page in one query
+        instead of being lazy-loaded per hostel by Hostel.to_dict(). Review
+        aggregates and occupancy come from the hostel row itself.
+        """
+        from ..models.landlord import Landlord
+
+        hostels = list(hostels)
+        if not hostels:
+            return []
+
+        # Each landlord (with its user) is loaded and serialized once per page
+        landlord_ids = {hostel.landlord_id for hostel in hostels if hostel.landlord_id}
+        landlords = {}
+        if landlord_ids:
+            landlords = {
+                landlord.id: landlord.to_dict()
+                for landlord in Landlord.query.options(joinedload(Landlord.user))
+                .filter(Landlord.id.in_(landlord_ids))
+            }
+
+        result = []
+        for hostel in hostels:
+            hostel_data = hostel.to_dict(include_landlord=False)
+            hostel_data['landlord'] = landlords.get(hostel.landlord_id)
+
+            if include_ratings:
+                hostel_data['average_rating'] = float(hostel.rating_avg or 0.0)
+                hostel_data['review_count'] = hostel.rating_count or 0
+
+            result.append(hostel_data)
+
+        return result
+
+    @staticmethod
+    def get_hostel_by_id(hostel_id, lat=None, lng=None):
+        """Get a single hostel by ID with related data (distance from lat/lng, else from the nearest campus)"""
         hostel = Hostel.query.get_or_404(hostel_id)
 
-        avg_rating = db.session.query(func.avg(Review.rating)).filter(
-            Review.hostel_id == hostel_id
-        ).scalar() or 0.0
+        distance = None
+        if lat is not None and lng is not None and hostel.latitude is not None and hostel.longitude is not None:
+            distance = f'{haversine_km(lat, lng, hostel.latitude, hostel.longitude):.1f} km away'
+        else:
+            nearest = CampusService.nearest_campus(hostel.id)
+            if nearest:
+                distance = f'{nearest[1]:.1f} km from {nearest[0].name}'
 
-        review_count = Review.query.filter_by(hostel_id=hostel_id).count()
+        avg_rating = hostel.rating_avg or 0.0
+        review_count = hostel.rating_count or 0
         features = hostel.features or {}
         availability = hostel.availability or {}
 
@@ -111,7 +170,7 @@ class HostelService:
             'location': {
                 'area': area,
                 'city': city,
-                'distance': '2.5 km from campus',
+                'distance': distance,
                 'description': f'Located in {area}, {city}'
             },
             'price': hostel.price,
@@ -127,7 +186,7 @@ class HostelService:
             'featured': hostel.is_featured,
             'verified': hostel.is_verified,
             'landlord': landlord_data,
-            'similarRooms': []
+            'similarRooms': SimilarityService.get_similar(hostel.id)
         }
 
     @staticmethod
@@ -142,7 +201,13 @@ class HostelService:
             **hostel_data
         )
         db.session.add(hostel)
+        db.session.flush()
+        CampusService.refresh_hostel_distances(hostel)
         db.session.commit()
+        IndexService.on_hostel_saved(hostel)
+        SearchService.invalidate_facets()
+        CacheService.bump('hostels')
+        HostelService._percolate(hostel)
         return hostel.to_dict()
 
     @staticmethod
@@ -157,14 +222,34 @@ class HostelService:
             landlord_id=landlord.id
         ).first_or_404()
 
+        coordinates = (hostel.latitude, hostel.longitude)
+        previous = {field: getattr(hostel, field) for field in SimilarityService.FEATURE_FIELDS}
         for key, value in update_data.items():
             if hasattr(hostel, key):
                 setattr(hostel, key, value)
 
+        SimilarityService.mark_stale(hostel, previous)
+
+        if (hostel.latitude, hostel.longitude) != coordinates:
+            CampusService.refresh_hostel_distances(hostel)
+
         hostel.updated_at = datetime.utcnow()
         db.session.commit()
+        IndexService.on_hostel_saved(hostel)
+        SearchService.invalidate_facets()
+        CacheService.bump('hostels')
+        HostelService._percolate(hostel)
         return hostel.to_dict()
 
+    @staticmethod
+    def _percolate(hostel):
+        # Saved-search alerts must never fail the hostel write that triggered them
+        try:
+            SavedSearchService.percolate(hostel)
+        except Exception as e:
+            db.session.rollback()
+            current_app.logger.warning(f"Saved search matching failed for hostel {hostel.id}: {e}")
+
     @staticmethod
     def delete_hostel(hostel_id, landlord_id):
         from ..models.landlord import Landlord
@@ -177,8 +262,16 @@ class HostelService:
             landlord_id=landlord.id
         ).first_or_404()
 
+        from ..models.occupancy import HostelOccupancy
+        HostelOccupancy.query.filter_by(hostel_id=hostel.id).delete(synchronize_session=False)
+        HostelCampusDistance.query.filter_by(hostel_id=hostel.id).delete(synchronize_session=False)
+        SavedSearchMatch.query.filter_by(hostel_id=hostel.id).delete(synchronize_session=False)
+        SimilarityService.forget(hostel.id)
         db.session.delete(hostel)
         db.session.commit()
+        IndexService.on_hostel_deleted(hostel_id)
+        SearchService.invalidate_facets()
+        CacheService.bump('hostels')
         return True
 
     @staticmethod
@@ -192,7 +285,7 @@ class HostelService:
             .paginate(page=page, per_page=per_page, error_out=False)
 
         return {
-            'hostels': [hostel.to_dict() for hostel in hostels.items],
+            'hostels': HostelService.serialize_hostels(hostels.items),
             'total': hostels.total,
             'pages': hostels.pages,
             'current_page': hostels.page
@@ -200,20 +293,21 @@ class HostelService:
 
     @staticmethod
     def search_hostels(query, page=1, per_page=20):
-        search_term = f"%{query}%"
-        # Also updated basic search to include university features
-        hostels = Hostel.query.filter(
-            or_(
-                Hostel.name.ilike(search_term),
-                Hostel.location.ilike(search_term),
-                Hostel.description.ilike(search_term),
-                func.cast(Hostel.features['university'], db.String).ilike(search_term)
-            )
-        ).paginate(page=page, per_page=per_page, error_out=False)
+        # Ranked ids from the text index (name, location, description, university)
+        ranked_ids = IndexService.search_text(query)
+        if not ranked_ids:
+            # Typo fallback (e.g. "Jujah" -> "juja")
+            ranked_ids, _ = IndexService.fuzzy_search_text(query)
+        if not ranked_ids:
+            return {'hostels': [], 'total': 0, 'pages': 0, 'current_page': page}
+
+        hostels, total = SearchService.ranked_page(
+            Hostel.query.filter(Hostel.id.in_(ranked_ids)), ranked_ids, page, per_page
+        )
 
         return {
-            'hostels': [hostel.to_dict() for hostel in hostels.items],
-            'total': hostels.total,
-            'pages': hostels.pages,
-            'current_page': hostels.page
+            'hostels': HostelService.serialize_hostels(hostels),
+            'total': total,
+            'pages': math.ceil(total / per_page) if total else 0,
+            'current_page': page
         }
\ No newline at end of file
@@ -0,0 +1,379 @@
+import threading
+import time
+from flask import current_app
+from ..extensions import db
+from ..models.hostel import Hostel
+from ..models.amenity import Amenity
+from ..utils.geo_index import GeoGridIndex
+from ..utils.text_index import InvertedIndex, tokenize
+from ..utils.autocomplete import PrefixIndex
+from ..utils.bitmap_index import BitmapIndex
+from ..utils.quadtree import QuadTree
+
+class IndexService:
+    """
+    Process-wide in-memory search indexes over the hostel catalog.
+
+    Indexes are built lazily on first use, patched in place by HostelService on
+    every write, and rebuilt once SEARCH_INDEX_TTL seconds have passed so that
+    writes made by other worker processes are eventually picked up. Rebuilds
+    run in a background thread while requests keep using the stale index; the
+    hostels written in the meantime are replayed onto the new index before it
+    is swapped in.
+    """
+    _lock = threading.Lock()
+    _indexes = {}
+    _built_at = {}
+    _rebuilding = {}  # index name -> ids of hostels written while it rebuilds
+    _generation = 0
+
+    # Field weights for the full-text index
+    TEXT_FIELD_WEIGHTS = {
+        'name': 3,
+        'location': 2,
+        'university': 2,
+        'description': 1
+    }
+
+    @staticmethod
+    def _is_stale(name):
+        ttl = current_app.config.get('SEARCH_INDEX_TTL', 300)
+        return ttl > 0 and time.monotonic() - IndexService._built_at.get(name, 0.0) > ttl
+
+    @staticmethod
+    def _get(name, builder):
+        index = IndexService._indexes.get(name)
+        if index is None:
+            # Nothing to serve yet: the first build has to happen on the request path
+            with IndexService._lock:
+                if name not in IndexService._indexes:
+                    IndexService._indexes[name] = builder()
+                    IndexService._built_at[name] = time.monotonic()
+                return IndexService._indexes[name]
+        if IndexService._is_stale(name):
+            IndexService._rebuild_in_background(name, builder)
+        return index
+
+    @staticmethod
+    def _rebuild_in_background(name, builder):
+        with IndexService._lock:
+            if name in IndexService._rebuilding:
+                return
+            IndexService._rebuilding[name] = set()
+            generation = IndexService._generation
+        threading.Thread(
+            target=IndexService._rebuild, args=(current_app._get_current_object(), name, builder, generation),
+            name=f'index-rebuild-{name}', daemon=True
+        ).start()
+
+    @staticmethod
+    def _rebuild(app, name, builder, generation):
+        """Build a fresh index, replay the hostels written meanwhile, then swap it in"""
+        with app.app_context():
+            try:
+                index = builder()
+                replayed = set()
+                while True:
+                    with IndexService._lock:
+                        if IndexService._generation != generation:
+                            return
+                        touched = IndexService._rebuilding[name] - replayed
+                        if not touched:
+                            IndexService._indexes[name] = index
+                            IndexService._built_at[name] = time.monotonic()
+                            IndexService._rebuilding.pop(name)
+                            return
+                    hostels = {hostel.id: hostel for hostel in Hostel.query.filter(Hostel.id.in_(touched))}
+                    for hostel_id in touched:
+                        if hostel_id in hostels:
+                            IndexService._patch(name, index, hostels[hostel_id])
+                        else:
+                            index.remove(hostel_id)
+                    replayed |= touched
+            except Exception:
+                app.logger.exception("Rebuilding the %s index failed", name)
+                with IndexService._lock:
+                    if IndexService._generation == generation:
+                        IndexService._rebuilding.pop(name, None)
+            finally:
+                db.session.remove()
+
+    @staticmethod
+    def get_geo_index():
+        """Return the spatial index over geocoded hostels, building it if needed"""
+        return IndexService._get('geo', IndexService.build_geo_index)
+
+    @staticmethod
+    def get_text_index():
+        """Return the full-text index over hostel text fields, building it if needed"""
+        return IndexService._get('text', IndexService.build_text_index)
+
+    @staticmethod
+    def get_suggest_index():
+        """Return the autocomplete prefix index, building it if needed"""
+        return IndexService._get('suggest', IndexService.build_suggest_index)
+
+    @staticmethod
+    def get_bitmap_index():
+        """Return the amenity/feature bitmap index, building it if needed"""
+        return IndexService._get('bitmap', IndexService.build_bitmap_index)
+
+    @staticmethod
+    def get_map_index():
+        """Return the map quadtree (coordinates, price and marker payload), building it if needed"""
+        return IndexService._get('map', IndexService.build_map_index)
+
+    @staticmethod
+    def build_geo_index():
+        """Build a fresh spatial index from the hostels table"""
+        index = GeoGridIndex(current_app.config.get('GEO_INDEX_CELL_SIZE', 0.05))
+
+        rows = db.session.query(Hostel.id, Hostel.latitude, Hostel.longitude).filter(
+            Hostel.latitude.isnot(None),
+            Hostel.longitude.isnot(None)
+        )
+        for hostel_id, lat, lng in rows:
+            index.add(hostel_id, lat, lng)
+
+        return index
+
+    @staticmethod
+    def build_map_index():
+        """Build a fresh map quadtree from the hostels table"""
+        index = QuadTree()
+
+        rows = db.session.query(
+            Hostel.id, Hostel.name, Hostel.latitude, Hostel.longitude,
+            Hostel.price, Hostel.currency, Hostel.is_verified
+        ).filter(
+            Hostel.latitude.isnot(None),
+            Hostel.longitude.isnot(None)
+        )
+        for hostel_id, name, lat, lng, price, currency, is_verified in rows:
+            index.add(hostel_id, lat, lng, price, IndexService._marker(name, currency, is_verified))
+
+        return index
+
+    @staticmethod
+    def _marker(name, currency, is_verified):
+        return {'name': name, 'currency': currency, 'is_verified': bool(is_verified)}
+
+    @staticmethod
+    def build_text_index():
+        """Build a fresh full-text index from the hostels table"""
+        index = InvertedIndex()
+
+        rows = db.session.query(
+            Hostel.id, Hostel.name, Hostel.location, Hostel.description, Hostel.features
+        )
+        for hostel_id, name, location, description, features in rows:
+            index.add(hostel_id, IndexService._text_fields(name, location, description, features))
+
+        return index
+
+    @staticmethod
+    def build_suggest_index():
+        """Build a fresh autocomplete index from the hostels table"""
+        index = PrefixIndex(current_app.config.get('SUGGEST_INDEX_TOP_K', 20))
+
+        rows = db.session.query(Hostel.id, Hostel.name, Hostel.location, Hostel.features)
+        index.bulk_load(
+            (hostel_id, IndexService._suggestions(name, location, features))
+            for hostel_id, name, location, features in rows
+        )
+
+        return index
+
+    @staticmethod
+    def build_bitmap_index():
+        """Build a fresh amenity/feature bitmap index from the hostels table"""
+        index = BitmapIndex()
+        amenity_ids = IndexService._amenity_ids()
+
+        rows = db.session.query(Hostel.id, Hostel.amenities, Hostel.features)
+        index.bulk_load(
+            (hostel_id, IndexService._bitmap_keys(amenities, features, amenity_ids))
+            for hostel_id, amenities, features in rows
+        )
+
+        return index
+
+    @staticmethod
+    def _amenity_ids():
+        return {name.lower(): amenity_id for amenity_id, name in db.session.query(Amenity.id, Amenity.name)}
+
+    @staticmethod
+    def _amenity_key(value, amenity_ids):
+        # Amenities are stored as Amenity ids; older rows and clients use amenity names
+        if isinstance(value, bool):
+            return None
+        if isinstance(value, int) or (isinstance(value, str) and value.strip().isdigit()):
+            return ('amenity', int(value))
+        if isinstance(value, str) and value.strip():
+            name = value.strip().lower()
+            if name in amenity_ids:
+                return ('amenity', amenity_ids[name])
+            return ('amenity', name)
+        return None
+
+    @staticmethod
+    def _bitmap_keys(amenities, features, amenity_ids):
+        if isinstance(amenities, dict):
+            values = [name for name, present in amenities.items() if present]
+        else:
+            values = amenities or []
+
+        keys = {IndexService._amenity_key(value, amenity_ids) for value in values}
+        keys.discard(None)
+
+        furnished = features.get('furnished') if isinstance(features, dict) else None
+        if furnished is not None:
+            keys.add(('furnished', IndexService._truthy(furnished)))
+
+        return keys
+
+    @staticmethod
+    def _truthy(value):
+        if isinstance(value, str):
+            return value.strip().lower() in ('true', '1', 'yes')
+        return bool(value)
+
+    @staticmethod
+    def match_features(amenities=None, furnished=None):
+        """Return ids of hostels with every requested amenity (ids or names) and the furnished flag"""
+        keys = []
+        if amenities:
+            names = [value for value in amenities if isinstance(value, str) and not value.strip().isdigit()]
+            amenity_ids = IndexService._amenity_ids() if names else {}
+            for value in amenities:
+                key = IndexService._amenity_key(value, amenity_ids)
+                if key is None:
+                    return []
+                keys.append(key)
+        if furnished is not None:
+            keys.append(('furnished', IndexService._truthy(furnished)))
+
+        return IndexService.get_bitmap_index().match_all(keys)
+
+    @staticmethod
+    def _suggestions(name, location, features):
+        university = features.get('university') if isinstance(features, dict) else None
+        return [
+            (name, 'hostel'),
+            (location, 'location'),
+            (university if isinstance(university, str) else None, 'university')
+        ]
+
+    @staticmethod
+    def _text_fields(name, location, description, features):
+        university = (features or {}).get('university') if isinstance(features, dict) else None
+        weights = IndexService.TEXT_FIELD_WEIGHTS
+        return [
+            (name, weights['name']),
+            (location, weights['location']),
+            (university, weights['university']),
+            (description, weights['description'])
+        ]
+
+    @staticmethod
+    def search_text(query):
+        """Return hostel ids matching every term of the query, best match first"""
+        return [hostel_id for hostel_id, _ in IndexService.get_text_index().search(query)]
+
+    @staticmethod
+    def _fuzzy_deadline():
+        budget_ms = current_app.config.get('FUZZY_SEARCH_BUDGET_MS', 20)
+        return time.monotonic() + budget_ms / 1000.0
+
+    @staticmethod
+    def fuzzy_search_text(query):
+        """
+        Typo-tolerant fallback for search_text: returns (ranked ids, corrected query).
+        Misspelled terms are swapped for similar indexed words within the
+        FUZZY_SEARCH_THRESHOLD / FUZZY_SEARCH_BUDGET_MS limits.
+        """
+        results, corrections = IndexService.get_text_index().fuzzy_search(
+            query,
+            threshold=current_app.config.get('FUZZY_SEARCH_THRESHOLD', 0.3),
+            deadline=IndexService._fuzzy_deadline()
+        )
+        if not results:
+            return [], None
+
+        corrected = ' '.join(corrections.get(term, term) for term in dict.fromkeys(tokenize(query)))
+        return [hostel_id for hostel_id, _ in results], corrected
+
+    @staticmethod
+    def correct_words(text):
+        """Swap each misspelled word of text for its closest indexed word; None if nothing changes or matches"""
+        index = IndexService.get_text_index()
+        threshold = current_app.config.get('FUZZY_SEARCH_THRESHOLD', 0.3)
+        deadline = IndexService._fuzzy_deadline()
+
+        words = tokenize(text)
+        corrected = []
+        for word in words:
+            replacement = index.correct(word, threshold, deadline)
+            if replacement is None:
+                return None
+            corrected.append(replacement)
+
+        return ' '.join(corrected) if corrected != words else None
+
+    @staticmethod
+    def _patch(name, index, hostel):
+        """Bring one index up to date with a created or updated hostel"""
+        geocoded = hostel.latitude is not None and hostel.longitude is not None
+        if name == 'geo':
+            if geocoded:
+                index.add(hostel.id, hostel.latitude, hostel.longitude)
+            else:
+                index.remove(hostel.id)
+        elif name == 'map':
+            if geocoded:
+                index.add(hostel.id, hostel.latitude, hostel.longitude, hostel.price, IndexService._marker(
+                    hostel.name, hostel.currency, hostel.is_verified
+                ))
+            else:
+                index.remove(hostel.id)
+        elif name == 'text':
+            index.add(hostel.id, IndexService._text_fields(
+                hostel.name, hostel.location, hostel.description, hostel.features
+            ))
+        elif name == 'suggest':
+            index.add(hostel.id, IndexService._suggestions(
+                hostel.name, hostel.location, hostel.features
+            ))
+        elif name == 'bitmap':
+            index.add(hostel.id, IndexService._bitmap_keys(
+                hostel.amenities, hostel.features, IndexService._amenity_ids()
+            ))
+
+    @staticmethod
+    def _current_indexes(hostel_id):
+        """Snapshot the live indexes, noting the hostel for any rebuild in flight"""
+        with IndexService._lock:
+            for touched in IndexService._rebuilding.values():
+                touched.add(hostel_id)
+            return list(IndexService._indexes.items())
+
+    @staticmethod
+    def on_hostel_saved(hostel):
+        """Keep the indexes in sync after a hostel is created or updated"""
+        for name, index in IndexService._current_indexes(hostel.id):
+            IndexService._patch(name, index, hostel)
+
+    @staticmethod
+    def on_hostel_deleted(hostel_id):
+        """Drop a deleted hostel from the indexes"""
+        for _, index in IndexService._current_indexes(hostel_id):
+            index.remove(hostel_id)
+
+    @staticmethod
+    def reset():
+        """Discard every index so the next lookup rebuilds from the database"""
+        with IndexService._lock:
+            IndexService._indexes.clear()
+            IndexService._built_at.clear()
+            IndexService._rebuilding.clear()
+            IndexService._generation += 1
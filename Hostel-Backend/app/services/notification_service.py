@@ -1,4 +1,7 @@
-from ..extensions import db
+from flask import current_app
+from sqlalchemy import select
+from sqlalchemy.orm import joinedload
+from ..extensions import db, email_templates
 from .email_service import EmailService
 from ..models.user import User
 from ..models.booking import Booking
@@ -7,18 +10,19 @@ import json
 
 class NotificationService:
     @staticmethod
-    def notify_booking_created(booking_data):
-        """Send notifications when a booking is created"""
+    def notify_booking_created(booking_data, queue=False):
+        """Send notifications when a booking is created (queue=True: add them to the outbox in the caller's transaction)"""
         try:
             # Notify user
             EmailService.send_booking_confirmation(
                 booking_data['user']['email'],
-                booking_data
+                booking_data,
+                queue=queue
             )
 
             # Notify landlord
             landlord_email = booking_data['hostel']['landlord']['contact_email'] or booking_data['hostel']['landlord']['user']['email']
-            EmailService.send_landlord_notification(landlord_email, booking_data)
+            EmailService.send_landlord_notification(landlord_email, booking_data, queue=queue)
 
             return True
         except Exception as e:
@@ -26,13 +30,14 @@ class NotificationService:
             return False
 
     @staticmethod
-    def notify_booking_cancelled(booking_data):
-        """Send notifications when a booking is cancelled"""
+    def notify_booking_cancelled(booking_data, queue=False):
+        """Send notifications when a booking is cancelled (queue=True: add them to the outbox in the caller's transaction)"""
         try:
             # Notify user
             EmailService.send_booking_cancellation(
                 booking_data['user']['email'],
-                booking_data
+                booking_data,
+                queue=queue
             )
 
             # Notify landlord
@@ -40,24 +45,9 @@ class NotificationService:
 
             # Send cancellation notification to landlord
             subject = f"Booking Cancelled - {booking_data['hostel']['name']}"
-            html_body = f"""
-            <html>
-            <body>
-                <h2>Booking Cancellation Notice</h2>
-                <p>A booking for your hostel has been cancelled.</p>
-                <div style="border: 1px solid #ddd; padding: 15px; margin: 15px 0;">
-                    <h3>{booking_data['hostel']['name']}</h3>
-                    <p><strong>Guest:</strong> {booking_data['user']['name']}</p>
-                    <p><strong>Booking ID:</strong> {booking_data['id']}</p>
-                    <p><strong>Check-in:</strong> {booking_data['check_in']}</p>
-                    <p><strong>Check-out:</strong> {booking_data['check_out']}</p>
-                </div>
-                <p>Best regards,<br>The Hostel Hunt Team</p>
-            </body>
-            </html>
-            """
+            html_body = email_templates.render('landlord_booking_cancelled.html', booking=booking_data)
 
-            EmailService.send_email(landlord_email, subject, html_body)
+            EmailService._dispatch(landlord_email, subject, html_body, queue)
 
             return True
         except Exception as e:
@@ -65,169 +55,115 @@ class NotificationService:
             return False
 
     @staticmethod
-    def notify_upcoming_checkins():
-        """Send reminders for upcoming check-ins (run daily)"""
-        tomorrow = datetime.utcnow().date() + timedelta(days=1)
-
-        upcoming_bookings = Booking.query.filter(
-            Booking.check_in == tomorrow,
-            Booking.status == 'confirmed'
-        ).all()
-
-        notifications_sent = 0
-        for booking in upcoming_bookings:
-            try:
-                subject = f"Check-in Reminder - {booking.hostel.name}"
-
-                html_template = """
-                <html>
-                <body>
-                    <h2>Check-in Reminder</h2>
-                    <p>Dear {{ booking.user.name }},</p>
-                    <p>This is a reminder that you have a check-in tomorrow!</p>
-
-                    <div style="border: 1px solid #ddd; padding: 15px; margin: 15px 0;">
-                        <h3>{{ booking.hostel.name }}</h3>
-                        <p><strong>Location:</strong> {{ booking.hostel.location }}</p>
-                        <p><strong>Check-in:</strong> {{ booking.check_in }}</p>
-                        <p><strong>Check-out:</strong> {{ booking.check_out }}</p>
-                        <p><strong>Booking ID:</strong> {{ booking.id }}</p>
-                    </div>
-
-                    <p>Please arrive on time and bring valid ID for check-in.</p>
-
-                    <p>Best regards,<br>The Hostel Hunt Team</p>
-                </body>
-                </html>
-                """
-
-                html_body = f"""
-                <html>
-                <body>
-                    <h2>Check-in Reminder</h2>
-                    <p>Dear {booking.user.name},</p>
-                    <p>This is a reminder that you have a check-in tomorrow!</p>
-
-                    <div style="border: 1px solid #ddd; padding: 15px; margin: 15px 0;">
-                        <h3>{booking.hostel.name}</h3>
-                        <p><strong>Location:</strong> {booking.hostel.location}</p>
-                        <p><strong>Check-in:</strong> {booking.check_in}</p>
-                        <p><strong>Check-out:</strong> {booking.check_out}</p>
-                        <p><strong>Booking ID:</strong> {booking.id}</p>
-                    </div>
-
-                    <p>Please arrive on time and bring valid ID for check-in.</p>
-
-                    <p>Best regards,<br>The Hostel Hunt Team</p>
-                </body>
-                </html>
-                """
-
-                EmailService.send_email(booking.user.email, subject, html_body)
-                notifications_sent += 1
-
-            except Exception as e:
-                print(f"Failed to send reminder for booking {booking.id}: {e}")
-
-        return notifications_sent
+    def _stream_bookings(*criteria, chunk_size=None):
+        """
+        Iterate the bookings matching criteria chunk_size rows at a time
+        (NOTIFICATION_CHUNK_SIZE), with each booking's user and hostel loaded by
+        the same SELECT. Rows are fetched as the caller consumes them, so memory
+        stays flat however many bookings match.
+        """
+        chunk_size = chunk_size or current_app.config.get('NOTIFICATION_CHUNK_SIZE', 500)
+        statement = select(Booking).where(*criteria)\
+            .options(joinedload(Booking.user), joinedload(Booking.hostel))\
+            .order_by(Booking.id.asc())\
+            .execution_options(yield_per=chunk_size)
+        return db.session.scalars(statement)
 
     @staticmethod
-    def notify_checkout_reminders():
-        """Send reminders for upcoming check-outs (run daily)"""
-        today = datetime.utcnow().date()
-
-        checkout_bookings = Booking.query.filter(
-            Booking.check_out == today,
-            Booking.status == 'confirmed'
-        ).all()
-
-        notifications_sent = 0
-        for booking in checkout_bookings:
+    def _reminders(bookings, template, subject, label, stats):
+        """Lazily render (email, subject, html) for each booking; ones that fail to render are logged and counted in stats['failed']"""
+        for booking in bookings:
             try:
-                subject = f"Check-out Reminder - {booking.hostel.name}"
+                html_body = email_templates.render(template, booking=booking)
+                yield booking.user.email, subject(booking), html_body
+            except Exception:
+                stats['failed'] += 1
+                current_app.logger.exception(f"Failed to prepare {label} for booking {booking.id}")
 
-                html_body = f"""
-                <html>
-                <body>
-                    <h2>Check-out Reminder</h2>
-                    <p>Dear {booking.user.name},</p>
-                    <p>This is a reminder that today is your check-out day.</p>
+    @staticmethod
+    def _send_reminders(bookings, template, subject, label, batch_size=None):
+        """
+        Send one reminder per booking. Returns the send_bulk counters (sent,
+        failed, ...), with reminders that failed to render counted as failed.
+        """
+        render_stats = {'failed': 0}
+        messages = NotificationService._reminders(bookings, template, subject, label, render_stats)
+        # Rows stream in as batches go out: one pooled SMTP connection per batch
+        stats = EmailService.send_bulk(messages, batch_size=batch_size)
+        stats['failed'] += render_stats['failed']
+        return stats
 
-                    <div style="border: 1px solid #ddd; padding: 15px; margin: 15px 0;">
-                        <h3>{booking.hostel.name}</h3>
-                        <p><strong>Location:</strong> {booking.hostel.location}</p>
-                        <p><strong>Check-out:</strong> {booking.check_out}</p>
-                        <p><strong>Booking ID:</strong> {booking.id}</p>
-                    </div>
+    @staticmethod
+    def notify_upcoming_checkins(batch_size=None, chunk_size=None):
+        """Send reminders for upcoming check-ins (run daily); returns sent/failed counters"""
+        tomorrow = datetime.utcnow().date() + timedelta(days=1)
 
-                    <p>Please ensure you check out on time. Contact the landlord if you need a late check-out.</p>
+        upcoming_bookings = NotificationService._stream_bookings(
+            Booking.check_in == tomorrow,
+            Booking.status == 'confirmed',
+            chunk_size=chunk_size
+        )
 
-                    <p>Best regards,<br>The Hostel Hunt Team</p>
-                </body>
-                </html>
-                """
+        return NotificationService._send_reminders(
+            upcoming_bookings, 'checkin_reminder.html',
+            lambda booking: f"Check-in Reminder - {booking.hostel.name}", 'reminder',
+            batch_size=batch_size
+        )
 
-                EmailService.send_email(booking.user.email, subject, html_body)
-                notifications_sent += 1
+    @staticmethod
+    def notify_checkout_reminders(batch_size=None, chunk_size=None):
+        """Send reminders for upcoming check-outs (run daily); returns sent/failed counters"""
+        today = datetime.utcnow().date()
 
-            except Exception as e:
-                print(f"Failed to send checkout reminder for booking {booking.id}: {e}")
+        checkout_bookings = NotificationService._stream_bookings(
+            Booking.check_out == today,
+            Booking.status == 'confirmed',
+            chunk_size=chunk_size
+        )
 
-        return notifications_sent
+        return NotificationService._send_reminders(
+            checkout_bookings, 'checkout_reminder.html',
+            lambda booking: f"Check-out Reminder - {booking.hostel.name}", 'checkout reminder',
+            batch_size=batch_size
+        )
 
     @staticmethod
-    def notify_review_reminder():
-        """Send reminders to leave reviews after checkout (run daily)"""
+    def notify_review_reminder(batch_size=None, chunk_size=None):
+        """Send reminders to leave reviews after checkout (run daily); returns sent/failed counters"""
+        from ..models.review import Review
         three_days_ago = datetime.utcnow().date() - timedelta(days=3)
 
-        completed_bookings = Booking.query.filter(
-            Booking.check_out == three_days_ago,
-            Booking.status == 'completed'
-        ).all()
-
-        notifications_sent = 0
-        for booking in completed_bookings:
-            # Check if user already reviewed
-            from ..models.review import Review
-            existing_review = Review.query.filter_by(
-                user_id=booking.user_id,
-                hostel_id=booking.hostel_id
-            ).first()
-
-            if existing_review:
-                continue
-
-            try:
-                subject = f"How was your stay at {booking.hostel.name}?"
-
-                html_body = f"""
-                <html>
-                <body>
-                    <h2>How was your stay?</h2>
-                    <p>Dear {booking.user.name},</p>
-                    <p>We hope you enjoyed your stay at {booking.hostel.name}!</p>
-                    <p>Your feedback helps other students find great accommodation.</p>
+        # Anti-join: skip bookings whose guest already reviewed the hostel
+        reviewed = select(Review.id).where(
+            Review.user_id == Booking.user_id,
+            Review.hostel_id == Booking.hostel_id
+        ).exists()
 
-                    <div style="border: 1px solid #ddd; padding: 15px; margin: 15px 0;">
-                        <h3>{booking.hostel.name}</h3>
-                        <p><strong>Check-out:</strong> {booking.check_out}</p>
-                        <p><strong>Booking ID:</strong> {booking.id}</p>
-                    </div>
-
-                    <p><a href="#" style="background-color: #28a745; color: white; padding: 10px 20px; text-decoration: none; border-radius: 5px;">Leave a Review</a></p>
-
-                    <p>Best regards,<br>The Hostel Hunt Team</p>
-                </body>
-                </html>
-                """
+        completed_bookings = NotificationService._stream_bookings(
+            Booking.check_out == three_days_ago,
+            Booking.status == 'completed',
+            ~reviewed,
+            chunk_size=chunk_size
+        )
 
-                EmailService.send_email(booking.user.email, subject, html_body)
-                notifications_sent += 1
+        return NotificationService._send_reminders(
+            completed_bookings, 'review_reminder.html',
+            lambda booking: f"How was your stay at {booking.hostel.name}?", 'review reminder',
+            batch_size=batch_size
+        )
 
-            except Exception as e:
-                print(f"Failed to send review reminder for booking {booking.id}: {e}")
+    @staticmethod
+    def notify_saved_search_matches(user_email, user_name, searches):
+        """Send one digest of new listings matching a user's saved searches ([{name, hostels}])"""
+        try:
+            total = sum(len(search['hostels']) for search in searches)
+            subject = f"{total} new hostel{'s' if total != 1 else ''} match your saved searches"
+            html_body = email_templates.render('saved_search_digest.html', user_name=user_name, searches=searches)
 
-        return notifications_sent
+            return EmailService.send_email(user_email, subject, html_body)
+        except Exception as e:
+            print(f"Saved search notification failed: {e}")
+            return False
 
     @staticmethod
     def notify_hostel_approval(hostel_data):
@@ -236,26 +172,11 @@ class NotificationService:
             landlord_email = hostel_data['landlord']['contact_email'] or hostel_data['landlord']['user']['email']
 
             subject = f"Your hostel has been approved - {hostel_data['name']}"
-
-            html_body = f"""
-            <html>
-            <body>
-                <h2>Hostel Approved!</h2>
-                <p>Dear {hostel_data['landlord']['business_name'] or hostel_data['landlord']['user']['name']},</p>
-                <p>Congratulations! Your hostel listing has been approved and is now live on Hostel Hunt.</p>
-
-                <div style="border: 1px solid #ddd; padding: 15px; margin: 15px 0;">
-                    <h3>{hostel_data['name']}</h3>
-                    <p><strong>Location:</strong> {hostel_data['location']}</p>
-                    <p><strong>Price:</strong> {hostel_data['currency']} {hostel_data['price']}</p>
-                </div>
-
-                <p>Students can now book your hostel. Check your dashboard for new bookings!</p>
-
-                <p>Best regards,<br>The Hostel Hunt Team</p>
-            </body>
-            </html>
-            """
+            html_body = email_templates.render(
+                'hostel_approved.html',
+                hostel=hostel_data,
+                landlord_name=hostel_data['landlord']['business_name'] or hostel_data['landlord']['user']['name']
+            )
 
             return EmailService.send_email(landlord_email, subject, html_body)
         except Exception as e:
@@ -268,48 +189,19 @@ class NotificationService:
         try:
             # Notify user
             subject = f"Payment Confirmed - Booking {booking_data['id']}"
-            html_body = f"""
-            <html>
-            <body>
-                <h2>Payment Confirmed</h2>
-                <p>Dear {booking_data['user']['name']},</p>
-                <p>Your payment has been processed successfully!</p>
-
-                <div style="border: 1px solid #ddd; padding: 15px; margin: 15px 0;">
-                    <h3>{booking_data['hostel']['name']}</h3>
-                    <p><strong>Amount Paid:</strong> {payment_data['currency']} {payment_data['amount']}</p>
-                    <p><strong>Transaction ID:</strong> {payment_data['transaction_id']}</p>
-                    <p><strong>Booking ID:</strong> {booking_data['id']}</p>
-                </div>
-
-                <p>Best regards,<br>The Hostel Hunt Team</p>
-            </body>
-            </html>
-            """
+            html_body = email_templates.render('payment_confirmed.html', booking=booking_data, payment=payment_data)
 
             EmailService.send_email(booking_data['user']['email'], subject, html_body)
 
             # Notify landlord
             landlord_email = booking_data['hostel']['landlord']['contact_email'] or booking_data['hostel']['landlord']['user']['email']
 
-            html_body = f"""
-            <html>
-            <body>
-                <h2>Payment Received</h2>
-                <p>Dear {booking_data['hostel']['landlord']['business_name'] or booking_data['hostel']['landlord']['user']['name']},</p>
-                <p>You have received a payment for your hostel booking.</p>
-
-                <div style="border: 1px solid #ddd; padding: 15px; margin: 15px 0;">
-                    <h3>{booking_data['hostel']['name']}</h3>
-                    <p><strong>Amount Received:</strong> {payment_data['currency']} {payment_data['amount']}</p>
-                    <p><strong>Transaction ID:</strong> {payment_data['transaction_id']}</p>
-                    <p><strong>Guest:</strong> {booking_data['user']['name']}</p>
-                </div>
-
-                <p>Best regards,<br>The Hostel Hunt Team</p>
-            </body>
-            </html>
-            """
+            html_body = email_templates.render(
+                'payment_received.html',
+                booking=booking_data,
+                payment=payment_data,
+                landlord_name=booking_data['hostel']['landlord']['business_name'] or booking_data['hostel']['landlord']['user']['name']
+            )
 
             EmailService.send_email(landlord_email, subject, html_body)
 
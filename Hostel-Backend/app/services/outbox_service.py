@@ -0,0 +1,132 @@
+import random
+import time
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import func
+from ..extensions import db
+from ..models.outbox import EmailOutbox
+from .email_service import EmailService
+
+class OutboxService:
+    """
+    Transactional email outbox.
+
+    Request handlers only insert rows (in the same transaction as the change
+    the email is about), and a separate worker process (`flask email-worker`)
+    sends them. Claiming a row pushes its next_attempt_at one lease into the
+    future and counts the attempt, so a worker that dies mid-send leaves the
+    row to be retried once the lease runs out. Failed sends back off
+    exponentially until EMAIL_OUTBOX_MAX_ATTEMPTS, then the row is marked failed.
+    """
+
+    @staticmethod
+    def enqueue(to, subject, html_body, text_body=None):
+        """Add one outbox row per recipient within the caller's transaction"""
+        rows = []
+        for recipient in ([to] if isinstance(to, str) else to):
+            row = EmailOutbox(recipient=recipient, subject=subject, html_body=html_body, text_body=text_body)
+            db.session.add(row)
+            rows.append(row)
+        return rows
+
+    @staticmethod
+    def backoff(attempts):
+        """Delay before retrying after the given number of failed attempts (with up to 10% jitter)"""
+        base = current_app.config.get('EMAIL_OUTBOX_BACKOFF_SECONDS', 30)
+        cap = current_app.config.get('EMAIL_OUTBOX_BACKOFF_MAX_SECONDS', 3600)
+        delay = min(cap, base * 2 ** max(0, attempts - 1))
+        return timedelta(seconds=delay * (1 + random.random() * 0.1))
+
+    @staticmethod
+    def claim_batch(batch_size=50):
+        """Lease up to batch_size due rows to this worker and commit; returns their ids"""
+        now = datetime.utcnow()
+        lease = timedelta(seconds=current_app.config.get('EMAIL_OUTBOX_LEASE_SECONDS', 300))
+
+        # skip_locked lets several workers claim disjoint batches (ignored where unsupported)
+        rows = EmailOutbox.query.filter(
+            EmailOutbox.status == 'pending',
+            EmailOutbox.next_attempt_at <= now
+        ).order_by(EmailOutbox.next_attempt_at.asc(), EmailOutbox.id.asc())\
+            .limit(batch_size)\
+            .with_for_update(skip_locked=True)\
+            .all()
+
+        for row in rows:
+            row.attempts += 1
+            row.next_attempt_at = now + lease
+        ids = [row.id for row in rows]
+        db.session.commit()
+        return ids
+
+    @staticmethod
+    def process_batch(batch_size=50, send=None):
+        """
+        Claim and send one batch. Returns counters: claimed, sent, retried, failed.
+        `send(to, subject, html_body, text_body)` defaults to EmailService.deliver.
+        """
+        send = send or EmailService.deliver
+        max_attempts = current_app.config.get('EMAIL_OUTBOX_MAX_ATTEMPTS', 6)
+        stats = {'claimed': 0, 'sent': 0, 'retried': 0, 'failed': 0}
+
+        ids = OutboxService.claim_batch(batch_size)
+        if not ids:
+            return stats
+        stats['claimed'] = len(ids)
+
+        rows = EmailOutbox.query.filter(EmailOutbox.id.in_(ids)).order_by(EmailOutbox.id.asc()).all()
+        for row in rows:
+            try:
+                send(row.recipient, row.subject, row.html_body, row.text_body)
+            except Exception as e:
+                row.last_error = str(e)[:1000]
+                if row.attempts >= max_attempts:
+                    row.status = 'failed'
+                    stats['failed'] += 1
+                    current_app.logger.error(f"Giving up on outbox email {row.id} to {row.recipient}: {e}")
+                else:
+                    row.next_attempt_at = datetime.utcnow() + OutboxService.backoff(row.attempts)
+                    stats['retried'] += 1
+                continue
+
+            row.status = 'sent'
+            row.sent_at = datetime.utcnow()
+            row.last_error = None
+            stats['sent'] += 1
+
+        db.session.commit()
+        return stats
+
+    @staticmethod
+    def run_worker(batch_size=50, poll_interval=None, once=False, on_batch=None):
+        """Drain the outbox until it is empty (once) or forever, sleeping poll_interval seconds when idle"""
+        poll_interval = poll_interval if poll_interval is not None else \
+            current_app.config.get('EMAIL_OUTBOX_POLL_SECONDS', 5)
+        totals = {'claimed': 0, 'sent': 0, 'retried': 0, 'failed': 0}
+
+        while True:
+            stats = OutboxService.process_batch(batch_size)
+            for key in totals:
+                totals[key] += stats[key]
+            if stats['claimed'] and on_batch:
+                on_batch(stats)
+
+            if stats['claimed'] < batch_size:
+                if once:
+                    return totals
+                time.sleep(poll_interval)
+
+    @staticmethod
+    def status():
+        """Outbox row counts by status, plus how many pending rows are due now"""
+        counts = dict(db.session.query(EmailOutbox.status, func.count(EmailOutbox.id)).group_by(EmailOutbox.status))
+        due = EmailOutbox.query.filter(
+            EmailOutbox.status == 'pending',
+            EmailOutbox.next_attempt_at <= datetime.utcnow()
+        ).count()
+        return {
+            'pending': counts.get('pending', 0),
+            'due': due,
+            'sent': counts.get('sent', 0),
+            'failed': counts.get('failed', 0)
+        }
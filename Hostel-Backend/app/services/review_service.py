@@ -1,6 +1,8 @@
 from ..extensions import db
 from ..models.review import Review
 from ..models.booking import Booking
+from ..utils.pagination import keyset_paginate
+from .cache_service import CacheService
 from datetime import datetime
 from sqlalchemy import func
 
@@ -41,7 +43,9 @@ class ReviewService:
             )
 
             db.session.add(review)
+            ReviewService.apply_rating_change(hostel_id, rating, 1)
             db.session.commit()
+            CacheService.bump('reviews')
 
             # Update landlord rating
             ReviewService.update_landlord_rating(hostel_id)
@@ -63,6 +67,8 @@ class ReviewService:
             if rating is not None:
                 if not (1 <= rating <= 5):
                     raise ValueError("Rating must be between 1 and 5")
+                if rating != review.rating:
+                    ReviewService.apply_rating_change(review.hostel_id, rating - review.rating, 0)
                 review.rating = rating
 
             if comment is not None:
@@ -70,6 +76,7 @@ class ReviewService:
 
             review.updated_at = datetime.utcnow()
             db.session.commit()
+            CacheService.bump('reviews')
 
             # Update landlord rating
             ReviewService.update_landlord_rating(review.hostel_id)
@@ -90,8 +97,10 @@ class ReviewService:
         hostel_id = review.hostel_id
 
         try:
+            ReviewService.apply_rating_change(hostel_id, -review.rating, -1)
             db.session.delete(review)
             db.session.commit()
+            CacheService.bump('reviews')
 
             # Update landlord rating
             ReviewService.update_landlord_rating(hostel_id)
@@ -102,17 +111,28 @@ class ReviewService:
             raise e
 
     @staticmethod
-    def get_hostel_reviews(hostel_id, page=1, per_page=20):
-        """Get all reviews for a hostel"""
-        reviews = Review.query.filter_by(hostel_id=hostel_id)\
-            .order_by(Review.created_at.desc())\
-            .paginate(page=page, per_page=per_page, error_out=False)
-
-        # Calculate average rating
-        avg_rating = db.session.query(func.avg(Review.rating))\
-            .filter(Review.hostel_id == hostel_id)\
+    def get_hostel_reviews(hostel_id, page=1, per_page=20, cursor=None, include_total=False):
+        """Get all reviews for a hostel (pass cursor for keyset pagination)"""
+        # Average rating comes from the hostel's denormalized aggregates
+        from ..models.hostel import Hostel
+        avg_rating = db.session.query(Hostel.rating_avg)\
+            .filter(Hostel.id == hostel_id)\
             .scalar() or 0.0
 
+        query = Review.query.filter_by(hostel_id=hostel_id)
+
+        if cursor is not None:
+            keyset = keyset_paginate(query, Review.created_at, Review.id, cursor, per_page,
+                                     include_total=include_total)
+            return {
+                'reviews': [review.to_dict() for review in keyset.items],
+                **keyset.meta(),
+                'average_rating': float(avg_rating)
+            }
+
+        reviews = query.order_by(Review.created_at.desc())\
+            .paginate(page=page, per_page=per_page, error_out=False)
+
         return {
             'reviews': [review.to_dict() for review in reviews.items],
             'total': reviews.total,
@@ -141,6 +161,62 @@ class ReviewService:
         review = Review.query.get_or_404(review_id)
         return review.to_dict()
 
+    @staticmethod
+    def apply_rating_change(hostel_id, sum_delta, count_delta):
+        """
+        Adjust a hostel's rating aggregates as part of the caller's transaction.
+
+        The hostel row is locked (SELECT ... FOR UPDATE) so concurrent reviews
+        for the same hostel cannot lose each other's increments.
+        """
+        from ..models.hostel import Hostel
+
+        hostel = Hostel.query.filter_by(id=hostel_id).with_for_update().first()
+        if not hostel:
+            return
+
+        hostel.rating_sum = (hostel.rating_sum or 0) + sum_delta
+        hostel.rating_count = max(0, (hostel.rating_count or 0) + count_delta)
+        hostel.rating_avg = hostel.rating_sum / hostel.rating_count if hostel.rating_count else 0.0
+
+    @staticmethod
+    def repair_hostel_ratings():
+        """
+        Recompute every hostel's rating aggregates from the reviews table.
+
+        Used to backfill the columns and to repair drift; returns the number of
+        hostels whose stored aggregates were wrong.
+        """
+        from ..models.hostel import Hostel
+
+        actual = {
+            row.hostel_id: (int(row.rating_sum), row.rating_count)
+            for row in db.session.query(
+                Review.hostel_id,
+                func.sum(Review.rating).label('rating_sum'),
+                func.count(Review.id).label('rating_count')
+            ).group_by(Review.hostel_id)
+        }
+
+        repaired = 0
+        try:
+            for hostel in Hostel.query.with_for_update():
+                rating_sum, rating_count = actual.get(hostel.id, (0, 0))
+                rating_avg = rating_sum / rating_count if rating_count else 0.0
+
+                if (hostel.rating_sum, hostel.rating_count, hostel.rating_avg) != (rating_sum, rating_count, rating_avg):
+                    hostel.rating_sum = rating_sum
+                    hostel.rating_count = rating_count
+                    hostel.rating_avg = rating_avg
+                    repaired += 1
+
+            db.session.commit()
+            CacheService.bump('reviews')
+            return repaired
+        except Exception as e:
+            db.session.rollback()
+            raise e
+
     @staticmethod
     def update_landlord_rating(hostel_id):
         """Update the average rating for the landlord of a hostel"""
@@ -151,15 +227,13 @@ class ReviewService:
         if not hostel or not hostel.landlord:
             return
 
-        # Calculate average rating across all hostels for this landlord
-        landlord_hostels = Hostel.query.filter_by(landlord_id=hostel.landlord.id).all()
-        hostel_ids = [h.id for h in landlord_hostels]
-
-        avg_rating = db.session.query(func.avg(Review.rating))\
-            .filter(Review.hostel_id.in_(hostel_ids))\
-            .scalar() or 0.0
+        # Combine the per-hostel aggregates across all hostels for this landlord
+        rating_sum, review_count = db.session.query(
+            func.coalesce(func.sum(Hostel.rating_sum), 0),
+            func.coalesce(func.sum(Hostel.rating_count), 0)
+        ).filter(Hostel.landlord_id == hostel.landlord.id).one()
 
-        review_count = Review.query.filter(Review.hostel_id.in_(hostel_ids)).count()
+        avg_rating = rating_sum / review_count if review_count else 0.0
 
         try:
             hostel.landlord.rating = float(avg_rating)
@@ -0,0 +1,339 @@
+import threading
+import time
+from datetime import datetime
+from flask import current_app
+from sqlalchemy import or_
+from ..extensions import db
+from ..models.hostel import Hostel
+from ..models.user import User
+from ..models.saved_search import SavedSearch, SavedSearchMatch
+from ..utils.percolator import Percolator
+from ..utils.text_index import tokenize
+from ..utils.geo_index import haversine_km
+from .index_service import IndexService
+from .cache_service import CacheService
+from .campus_service import CampusService
+from .search_service import SearchService
+from .outbox_service import OutboxService
+
+class SavedSearchService:
+    """
+    Saved searches and the reverse (percolator) matching of new listings against them.
+
+    Saved params are compiled once into predicates. The indexed ones (room type,
+    text terms, amenities, price band) go into a Percolator, so a hostel write
+    only fully evaluates the searches it is not already ruled out for. Like the
+    search indexes, the percolator is per process, patched on this worker's
+    saved-search writes and rebuilt after SEARCH_INDEX_TTL seconds.
+    """
+    _lock = threading.Lock()
+    _percolator = None
+    _predicates = {}
+    _built_at = 0.0
+
+    # Paging, ordering and stay dates describe how results are shown, not which listings qualify
+    IGNORED_PARAMS = ('page', 'per_page', 'sort_by', 'facets', 'check_in', 'check_out', 'guests')
+
+    @staticmethod
+    def create_saved_search(user_id, data):
+        """Save a search for a user; params use the /search/hostels parameter names"""
+        params = data.get('params')
+        if not isinstance(params, dict) or not params:
+            raise ValueError("params must be a non-empty object of search parameters")
+
+        limit = current_app.config.get('SAVED_SEARCH_LIMIT', 20)
+        if SavedSearch.query.filter_by(user_id=user_id).count() >= limit:
+            raise ValueError(f"You can save at most {limit} searches")
+
+        unknown = sorted(set(params) - set(SearchService.PARAMS) - {'page', 'per_page'})
+        if unknown:
+            raise ValueError(f"Unknown search parameters: {', '.join(unknown)}")
+
+        params = {
+            key: value for key, value in CacheService.canonicalize(params).items()
+            if key not in SavedSearchService.IGNORED_PARAMS
+        }
+        predicates = SavedSearchService.compile(params)
+
+        search = SavedSearch(user_id=user_id, name=data.get('name'), params=params)
+        db.session.add(search)
+        db.session.commit()
+
+        percolator = SavedSearchService._get_percolator()
+        SavedSearchService._register(percolator, search.id, predicates)
+        return search.to_dict()
+
+    @staticmethod
+    def get_user_saved_searches(user_id):
+        """Get a user's saved searches, newest first"""
+        searches = SavedSearch.query.filter_by(user_id=user_id)\
+            .order_by(SavedSearch.created_at.desc())\
+            .all()
+        return [search.to_dict() for search in searches]
+
+    @staticmethod
+    def delete_saved_search(search_id, user_id):
+        """Delete one of the user's saved searches and its queued matches"""
+        search = SavedSearch.query.filter_by(id=search_id, user_id=user_id).first_or_404()
+        SavedSearchMatch.query.filter_by(saved_search_id=search.id).delete(synchronize_session=False)
+        db.session.delete(search)
+        db.session.commit()
+
+        if SavedSearchService._percolator is not None:
+            SavedSearchService._percolator.remove(search_id)
+            SavedSearchService._predicates.pop(search_id, None)
+        return True
+
+    @staticmethod
+    def get_matches(search_id, user_id, page=1, per_page=20):
+        """Get the hostels that have matched one of the user's saved searches, newest first"""
+        search = SavedSearch.query.filter_by(id=search_id, user_id=user_id).first_or_404()
+
+        matches = Hostel.query.join(SavedSearchMatch, SavedSearchMatch.hostel_id == Hostel.id)\
+            .filter(SavedSearchMatch.saved_search_id == search.id)\
+            .order_by(SavedSearchMatch.matched_at.desc(), SavedSearchMatch.id.desc())\
+            .paginate(page=page, per_page=per_page, error_out=False)
+
+        from .hostel_service import HostelService
+        return {
+            'saved_search': search.to_dict(),
+            'hostels': HostelService.serialize_hostels(matches.items, include_ratings=True),
+            'total': matches.total,
+            'pages': matches.pages,
+            'current_page': matches.page
+        }
+
+    @staticmethod
+    def compile(params, amenity_ids=None):
+        """Turn saved search params into predicates; raises ValueError for params that cannot match anything"""
+        def values(key):
+            value = params.get(key)
+            if value is None or value == '':
+                return []
+            return value if isinstance(value, list) else [value]
+
+        def flag(key):
+            value = params.get(key)
+            return None if value is None or value == '' else IndexService._truthy(value)
+
+        amenities = set()
+        if values('amenities'):
+            amenity_ids = amenity_ids if amenity_ids is not None else IndexService._amenity_ids()
+            for value in values('amenities'):
+                key = IndexService._amenity_key(value, amenity_ids)
+                if key is None:
+                    raise ValueError(f"Unknown amenity '{value}'")
+                amenities.add(key)
+
+        geo = None
+        if params.get('lat') and params.get('lng'):
+            geo = (float(params['lat']), float(params['lng']), float(params.get('radius', 10)))
+        elif params.get('campus'):
+            campus = CampusService.resolve(params['campus'])
+            if campus is None:
+                raise ValueError(f"Unknown campus '{params['campus']}'")
+            radius = float(params.get('campus_radius', current_app.config.get('CAMPUS_SEARCH_RADIUS_KM', 5)))
+            geo = (campus.latitude, campus.longitude, radius)
+
+        return {
+            'room_types': set(values('room_type')),
+            'terms': list(dict.fromkeys(tokenize(params.get('q')))),
+            'amenities': amenities,
+            'furnished': flag('furnished'),
+            'min_price': float(params['min_price']) if params.get('min_price') else None,
+            'max_price': float(params['max_price']) if params.get('max_price') else None,
+            'min_capacity': int(params['min_capacity']) if params.get('min_capacity') else None,
+            'verified': flag('verified_only'),
+            'featured': flag('featured_only'),
+            'geo': geo
+        }
+
+    @staticmethod
+    def _register(percolator, search_id, predicates):
+        percolator.add(
+            search_id,
+            room_types=predicates['room_types'],
+            terms=predicates['terms'],
+            amenities=predicates['amenities'],
+            min_price=predicates['min_price'],
+            max_price=predicates['max_price']
+        )
+        SavedSearchService._predicates[search_id] = predicates
+
+    @staticmethod
+    def _needs_build():
+        ttl = current_app.config.get('SEARCH_INDEX_TTL', 300)
+        return SavedSearchService._percolator is None or (
+            ttl > 0 and time.monotonic() - SavedSearchService._built_at > ttl
+        )
+
+    @staticmethod
+    def _get_percolator():
+        if SavedSearchService._needs_build():
+            with SavedSearchService._lock:
+                if SavedSearchService._needs_build():
+                    SavedSearchService._percolator = SavedSearchService.build_percolator()
+                    SavedSearchService._built_at = time.monotonic()
+        return SavedSearchService._percolator
+
+    @staticmethod
+    def build_percolator():
+        """Build a fresh percolator over every active saved search"""
+        percolator = Percolator()
+        SavedSearchService._predicates = {}
+        amenity_ids = IndexService._amenity_ids()
+
+        rows = db.session.query(SavedSearch.id, SavedSearch.params).filter(SavedSearch.is_active.is_(True))
+        for search_id, params in rows:
+            try:
+                predicates = SavedSearchService.compile(params or {}, amenity_ids)
+            except ValueError:
+                # e.g. an amenity or campus that no longer exists: nothing can match
+                continue
+            SavedSearchService._register(percolator, search_id, predicates)
+
+        return percolator
+
+    @staticmethod
+    def _matches(predicates, hostel, tokens, keys):
+        if predicates['room_types'] and hostel.room_type not in predicates['room_types']:
+            return False
+        if predicates['min_price'] is not None and (hostel.price is None or hostel.price < predicates['min_price']):
+            return False
+        if predicates['max_price'] is not None and (hostel.price is None or hostel.price > predicates['max_price']):
+            return False
+        if predicates['min_capacity'] is not None and (hostel.capacity or 0) < predicates['min_capacity']:
+            return False
+        if predicates['verified'] is not None and bool(hostel.is_verified) != predicates['verified']:
+            return False
+        if predicates['featured'] is not None and bool(hostel.is_featured) != predicates['featured']:
+            return False
+        if not predicates['amenities'] <= keys:
+            return False
+        if predicates['furnished'] is not None and ('furnished', predicates['furnished']) not in keys:
+            return False
+        for term in predicates['terms']:
+            if not any(token.startswith(term) for token in tokens):
+                return False
+        if predicates['geo'] is not None:
+            lat, lng, radius = predicates['geo']
+            if hostel.latitude is None or hostel.longitude is None:
+                return False
+            if haversine_km(lat, lng, hostel.latitude, hostel.longitude) > radius:
+                return False
+        return True
+
+    @staticmethod
+    def percolate(hostel):
+        """
+        Queue the saved searches a created/updated hostel now matches.
+        Returns the number of new matches (each search matches a hostel at most once).
+        """
+        percolator = SavedSearchService._get_percolator()
+        if not len(percolator):
+            return 0
+
+        tokens = set()
+        for text, _ in IndexService._text_fields(hostel.name, hostel.location, hostel.description, hostel.features):
+            tokens.update(tokenize(text))
+        keys = IndexService._bitmap_keys(hostel.amenities, hostel.features, IndexService._amenity_ids())
+
+        candidates = percolator.candidates(
+            room_type=hostel.room_type,
+            tokens=tokens,
+            amenities=[key for key in keys if key[0] == 'amenity'],
+            price=hostel.price
+        )
+        matched = [
+            search_id for search_id in candidates
+            if search_id in SavedSearchService._predicates and
+            SavedSearchService._matches(SavedSearchService._predicates[search_id], hostel, tokens, keys)
+        ]
+        if not matched:
+            return 0
+
+        already = {
+            search_id for (search_id,) in db.session.query(SavedSearchMatch.saved_search_id).filter(
+                SavedSearchMatch.hostel_id == hostel.id,
+                SavedSearchMatch.saved_search_id.in_(matched)
+            )
+        }
+        # Searches deleted by another worker may linger in this percolator until its rebuild
+        live = {
+            search_id for (search_id,) in db.session.query(SavedSearch.id).filter(
+                SavedSearch.id.in_(matched),
+                SavedSearch.is_active.is_(True)
+            )
+        }
+        new = [search_id for search_id in matched if search_id in live and search_id not in already]
+
+        for search_id in new:
+            db.session.add(SavedSearchMatch(saved_search_id=search_id, hostel_id=hostel.id))
+        db.session.commit()
+        return len(new)
+
+    @staticmethod
+    def send_pending_alerts(batch_size=500):
+        """
+        Email each user one digest of their queued matches and mark them notified.
+        Matches whose digest failed back off (as outbox rows do) so that users
+        whose sends keep failing can't fill every batch. Returns (emails sent, matches delivered).
+        """
+        from .notification_service import NotificationService
+
+        now = datetime.utcnow()
+        pending = db.session.query(SavedSearchMatch, SavedSearch, Hostel)\
+            .join(SavedSearch, SavedSearch.id == SavedSearchMatch.saved_search_id)\
+            .join(Hostel, Hostel.id == SavedSearchMatch.hostel_id)\
+            .filter(
+                SavedSearchMatch.notified_at.is_(None),
+                or_(SavedSearchMatch.next_attempt_at.is_(None), SavedSearchMatch.next_attempt_at <= now)
+            )\
+            .order_by(SavedSearch.user_id, SavedSearchMatch.saved_search_id, SavedSearchMatch.id)\
+            .limit(batch_size)\
+            .all()
+        if not pending:
+            return 0, 0
+
+        by_user = {}
+        for match, search, hostel in pending:
+            by_user.setdefault(search.user_id, []).append((match, search, hostel))
+
+        users = {user.id: user for user in User.query.filter(User.id.in_(by_user)).all()}
+        sent = 0
+        delivered = 0
+        for user_id, rows in by_user.items():
+            user = users.get(user_id)
+            if user is None:
+                SavedSearchService._retry_later(rows, now)
+                continue
+
+            digest = {}
+            for match, search, hostel in rows:
+                entry = digest.setdefault(search.id, {'name': search.name or 'Saved search', 'hostels': []})
+                entry['hostels'].append({
+                    'id': hostel.id,
+                    'name': hostel.name,
+                    'location': hostel.location,
+                    'price': hostel.price,
+                    'currency': hostel.currency
+                })
+
+            if not NotificationService.notify_saved_search_matches(user.email, user.name, list(digest.values())):
+                SavedSearchService._retry_later(rows, now)
+                continue
+
+            for match, search, _ in rows:
+                match.notified_at = now
+                search.last_notified_at = now
+            sent += 1
+            delivered += len(rows)
+
+        db.session.commit()
+        return sent, delivered
+
+    @staticmethod
+    def _retry_later(rows, now):
+        for match, _, _ in rows:
+            match.attempts = (match.attempts or 0) + 1
+            match.next_attempt_at = now + OutboxService.backoff(match.attempts)
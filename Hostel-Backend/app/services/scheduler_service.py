@@ -0,0 +1,323 @@
+import hashlib
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import text, func
+from ..extensions import db
+from ..models.job_run import JobRun
+from .booking_service import BookingService
+from .notification_service import NotificationService
+from .saved_search_service import SavedSearchService
+from .similarity_service import SimilarityService
+
+class SchedulerService:
+    """
+    Periodic maintenance jobs and the in-process scheduler that runs them.
+
+    Every gunicorn worker may start the scheduler thread (SCHEDULER_ENABLED;
+    never in `flask` CLI processes), but only the one holding a PostgreSQL
+    session advisory lock acts as leader and runs jobs; if its connection
+    drops the lock is released and another worker takes over. Each job run
+    also takes a per-job advisory lock (so `flask run-job` and the scheduler
+    never overlap) and is recorded in job_runs. A job is due when its last
+    recorded start is older than its latest daily slot (UTC) or its interval,
+    so a new leader neither repeats nor skips the previous leader's work. On
+    other databases there is no lock: run a single scheduler.
+    """
+    # Each run callable returns the number of rows it touched, or for email jobs send_bulk's counters (sent, failed)
+    JOBS = {
+        'complete-bookings': {
+            'daily': '00:10',
+            'description': 'Mark bookings past check-out as completed',
+            'run': lambda: BookingService.complete_past_bookings()
+        },
+        'rollover-occupancy': {
+            'daily': '00:20',
+            'description': 'Release occupancy held by checked-out bookings',
+            'run': lambda: BookingService.rollover_occupancy()
+        },
+        'checkout-reminders': {
+            'daily': '05:00',
+            'description': 'Email guests checking out today',
+            'run': lambda: NotificationService.notify_checkout_reminders()
+        },
+        'checkin-reminders': {
+            'daily': '06:00',
+            'description': 'Email guests checking in tomorrow',
+            'run': lambda: NotificationService.notify_upcoming_checkins()
+        },
+        'review-reminders': {
+            'daily': '07:00',
+            'description': 'Ask guests who checked out three days ago for a review',
+            'run': lambda: NotificationService.notify_review_reminder()
+        },
+        'search-alerts': {
+            'every': 60,
+            'description': 'Email saved-search match digests',
+            'run': lambda: SavedSearchService.send_pending_alerts()[1]
+        },
+        'similar-hostels': {
+            'every': 60,
+            'description': 'Recompute similar-hostel neighbours for changed hostels',
+            'run': lambda: SimilarityService.refresh_neighbours()
+        }
+    }
+
+    LEADER_LOCK = 'scheduler-leader'
+
+    _thread = None
+    _stop = None
+
+    @staticmethod
+    def _lock_key(name):
+        return int.from_bytes(hashlib.sha1(f"hostel-hunt:{name}".encode()).digest()[:8], 'big', signed=True)
+
+    @staticmethod
+    def _supports_locks():
+        return db.engine.dialect.name == 'postgresql'
+
+    @staticmethod
+    def _try_lock(connection, name):
+        acquired = connection.execute(
+            text("SELECT pg_try_advisory_lock(:key)"), {'key': SchedulerService._lock_key(name)}
+        ).scalar()
+        # Session-level locks outlive the transaction; don't leave the connection idle in one
+        connection.commit()
+        return bool(acquired)
+
+    @staticmethod
+    def _unlock(connection, name):
+        try:
+            connection.execute(text("SELECT pg_advisory_unlock(:key)"), {'key': SchedulerService._lock_key(name)})
+            connection.commit()
+        finally:
+            connection.close()
+
+    @staticmethod
+    @contextmanager
+    def _job_lock(name):
+        """Hold the job's advisory lock for the block; yields False if another process holds it"""
+        if not SchedulerService._supports_locks():
+            yield True
+            return
+
+        connection = db.engine.connect()
+        try:
+            acquired = SchedulerService._try_lock(connection, name)
+        except Exception:
+            connection.close()
+            raise
+        if not acquired:
+            connection.close()
+            yield False
+            return
+        try:
+            yield True
+        finally:
+            SchedulerService._unlock(connection, name)
+
+    @staticmethod
+    def run_job(name, trigger='cli', only_if_due=False):
+        """
+        Run one job now, recording it in job_runs. Returns the run as a dict, or
+        None if the job is already running elsewhere (or, with only_if_due, was
+        run by someone else meanwhile). Job errors, and email jobs where every
+        message failed, are recorded on the run (status failed), not raised.
+        """
+        job = SchedulerService.JOBS.get(name)
+        if job is None:
+            raise ValueError(f"Unknown job '{name}'. Jobs: {', '.join(SchedulerService.JOBS)}")
+
+        with SchedulerService._job_lock(name) as acquired:
+            if not acquired:
+                return None
+            if only_if_due and name not in SchedulerService.due_jobs():
+                return None
+
+            run = JobRun(job=name, trigger=trigger, status='running', started_at=datetime.utcnow())
+            db.session.add(run)
+            db.session.commit()
+            run_id = run.id
+
+            started = time.perf_counter()
+            rows, sent, failed, error = None, None, None, None
+            try:
+                result = job['run']()
+                if isinstance(result, dict):
+                    sent, failed = result.get('sent', 0), result.get('failed', 0)
+                    rows = sent
+                else:
+                    rows = int(result or 0)
+            except Exception as e:
+                db.session.rollback()
+                error = str(e)
+                current_app.logger.exception(f"Job {name} failed")
+
+            if error is None and failed and not sent:
+                # Nothing got through: most likely SMTP is down or misconfigured
+                error = f"All {failed} email(s) failed"
+                current_app.logger.error(f"Job {name}: {error}")
+
+            run = db.session.get(JobRun, run_id)
+            run.finished_at = datetime.utcnow()
+            run.duration_seconds = time.perf_counter() - started
+            run.rows = rows
+            run.sent = sent
+            run.failed = failed
+            run.status = 'failed' if error else 'success'
+            run.error = error
+            db.session.commit()
+            return run.to_dict()
+
+    @staticmethod
+    def _last_slot(job, now):
+        """The most recent time the job should have started at"""
+        if 'every' in job:
+            return now - timedelta(minutes=job['every'])
+        hour, minute = (int(part) for part in job['daily'].split(':'))
+        slot = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+        return slot if slot <= now else slot - timedelta(days=1)
+
+    @staticmethod
+    def _last_starts():
+        return dict(
+            db.session.query(JobRun.job, func.max(JobRun.started_at)).group_by(JobRun.job)
+        )
+
+    @staticmethod
+    def due_jobs(now=None):
+        """Names of the jobs that have not started since their latest slot"""
+        now = now or datetime.utcnow()
+        last_starts = SchedulerService._last_starts()
+        return [
+            name for name, job in SchedulerService.JOBS.items()
+            if last_starts.get(name) is None or last_starts[name] < SchedulerService._last_slot(job, now)
+        ]
+
+    @staticmethod
+    def run_due_jobs(now=None):
+        """Run every due job in order; returns the recorded runs"""
+        runs = []
+        for name in SchedulerService.due_jobs(now):
+            run = SchedulerService.run_job(name, trigger='scheduler', only_if_due=True)
+            if run is not None:
+                runs.append(run)
+        return runs
+
+    @staticmethod
+    def list_jobs():
+        """Every job with its schedule and latest recorded run"""
+        latest = {}
+        for run in JobRun.query.filter(
+            JobRun.id.in_(db.session.query(func.max(JobRun.id)).group_by(JobRun.job))
+        ):
+            latest[run.job] = run.to_dict()
+
+        return [
+            {
+                'name': name,
+                'schedule': f"daily at {job['daily']} UTC" if 'daily' in job else f"every {job['every']} min",
+                'description': job['description'],
+                'last_run': latest.get(name)
+            }
+            for name, job in SchedulerService.JOBS.items()
+        ]
+
+    @staticmethod
+    def get_runs(job=None, page=1, per_page=20):
+        """Recorded runs, newest first"""
+        query = JobRun.query
+        if job:
+            query = query.filter(JobRun.job == job)
+        runs = query.order_by(JobRun.started_at.desc(), JobRun.id.desc())\
+            .paginate(page=page, per_page=per_page, error_out=False)
+        return {
+            'runs': [run.to_dict() for run in runs.items],
+            'total': runs.total,
+            'pages': runs.pages,
+            'current_page': runs.page
+        }
+
+    @staticmethod
+    def _acquire_leadership():
+        """A connection holding the leader lock, True where locks are unsupported, or None"""
+        if not SchedulerService._supports_locks():
+            return True
+
+        connection = db.engine.connect()
+        try:
+            if SchedulerService._try_lock(connection, SchedulerService.LEADER_LOCK):
+                current_app.logger.info("Scheduler: this worker is the leader")
+                return connection
+        except Exception:
+            connection.close()
+            raise
+        connection.close()
+        return None
+
+    @staticmethod
+    def _still_leader(leader):
+        if leader is True:
+            return True
+        try:
+            leader.execute(text("SELECT 1"))
+            leader.commit()
+            return True
+        except Exception:
+            # The lock went with the connection; another worker can take over
+            leader.invalidate()
+            current_app.logger.warning("Scheduler: lost the leader connection")
+            return False
+
+    @staticmethod
+    def run_forever(app, stop=None):
+        """Scheduler loop: contend for leadership, and while leader run due jobs every SCHEDULER_POLL_SECONDS"""
+        stop = stop or threading.Event()
+        poll = app.config.get('SCHEDULER_POLL_SECONDS', 30)
+        leader = None
+
+        while not stop.is_set():
+            with app.app_context():
+                try:
+                    if leader is not None and not SchedulerService._still_leader(leader):
+                        leader = None
+                    if leader is None:
+                        leader = SchedulerService._acquire_leadership()
+                    if leader is not None:
+                        SchedulerService.run_due_jobs()
+                except Exception:
+                    app.logger.exception("Scheduler iteration failed")
+                    db.session.rollback()
+                finally:
+                    db.session.remove()
+            stop.wait(poll)
+
+        if leader is not None and leader is not True:
+            with app.app_context():
+                try:
+                    SchedulerService._unlock(leader, SchedulerService.LEADER_LOCK)
+                except Exception:
+                    app.logger.warning("Scheduler: could not release the leader lock cleanly")
+
+    @staticmethod
+    def start(app):
+        """Start the scheduler in a daemon thread of this process (once)"""
+        if SchedulerService._thread is not None:
+            return
+        SchedulerService._stop = threading.Event()
+        SchedulerService._thread = threading.Thread(
+            target=SchedulerService.run_forever, args=(app, SchedulerService._stop),
+            name='scheduler', daemon=True
+        )
+        SchedulerService._thread.start()
+
+    @staticmethod
+    def stop(timeout=None):
+        """Stop the scheduler thread and release leadership"""
+        if SchedulerService._thread is None:
+            return
+        SchedulerService._stop.set()
+        SchedulerService._thread.join(timeout)
+        SchedulerService._thread = None
@@ -1,52 +1,97 @@
 from ..extensions import db
 from ..models.hostel import Hostel
 from ..models.amenity import Amenity
-from sqlalchemy import and_, or_, func, text
-from sqlalchemy.sql import label
-from geopy.distance import geodesic
+from ..models.campus import HostelCampusDistance
+from .index_service import IndexService
+from .cache_service import CacheService
+from .campus_service import CampusService
+from ..utils.cache import TTLCache
+from flask import current_app
+from sqlalchemy import and_, func, case, literal
+from collections import Counter
+import heapq
+import math
 import re
 
 class SearchService:
+    # Facet responses (/search/filters, /search/price-ranges, /search/popular-locations).
+    # Per process: cleared on this worker's hostel writes, other workers catch up via FACET_CACHE_TTL.
+    _facet_cache = TTLCache(maxsize=64)
+
+    # Facets that /search/hostels?facets=... can count over the filtered result set
+    RESULT_FACETS = ('room_type', 'price_bucket', 'verified', 'featured')
+
+    # Query parameters /search/hostels understands (the route takes page and per_page itself)
+    PARAMS = (
+        'q', 'lat', 'lng', 'radius', 'campus', 'campus_radius', 'min_price', 'max_price',
+        'room_type', 'min_capacity', 'amenities', 'furnished', 'verified_only', 'featured_only',
+        'check_in', 'check_out', 'guests', 'sort_by', 'facets'
+    )
+
     @staticmethod
     def search_hostels(query_params, page=1, per_page=20):
-        """Advanced search for hostels with multiple filters"""
+        """Advanced search for hostels with multiple filters (results cached per normalized query)"""
+        # The cache key and the search are built from the same normalized params,
+        # so blank values (e.g. ?furnished=) can't make two different searches share a key
+        query_params = CacheService.canonicalize(query_params)
+        cache_key = CacheService.search_key(query_params, page, per_page)
+        result = CacheService.get(cache_key)
+        if result is None:
+            result = SearchService._execute_search(query_params, page, per_page)
+            CacheService.set(cache_key, result)
+        return result
+
+    @staticmethod
+    def _execute_search(query_params, page, per_page):
+        facet_names = SearchService.parse_facets(query_params.get('facets'))
         query = Hostel.query
 
-        # Text search (name, location, description)
+        # Ids allowed by the in-memory indexes (text, radius, amenities), intersected as each applies
+        candidates = None
+
+        def restrict(ids):
+            nonlocal candidates
+            candidates = set(ids) if candidates is None else candidates.intersection(ids)
+
+        # Text search (name, location, description, university) via the inverted index
+        ranked_ids = None
+        corrected_query = None
         if query_params.get('q'):
-            search_term = f"%{query_params['q']}%"
-            query = query.filter(
-                or_(
-                    Hostel.name.ilike(search_term),
-                    Hostel.location.ilike(search_term),
-                    Hostel.description.ilike(search_term)
-                )
-            )
+            ranked_ids = IndexService.search_text(query_params['q'])
+            if not ranked_ids:
+                # Nothing matched as typed: retry with misspelled terms swapped for similar indexed words
+                ranked_ids, corrected_query = IndexService.fuzzy_search_text(query_params['q'])
+            restrict(ranked_ids)
 
         # Location-based search
+        sort_by = query_params.get('sort_by', 'relevance')
+        distances = None
         if query_params.get('lat') and query_params.get('lng'):
             user_location = (float(query_params['lat']), float(query_params['lng']))
             radius = float(query_params.get('radius', 10))  # Default 10km radius
 
-            # Filter hostels within radius (requires latitude/longitude columns)
-            # This is a simplified version - in production, you'd use PostGIS or similar
-            hostels_in_radius = []
-            all_hostels = Hostel.query.filter(
-                Hostel.latitude.isnot(None),
-                Hostel.longitude.isnot(None)
-            ).all()
-
-            for hostel in all_hostels:
-                hostel_location = (hostel.latitude, hostel.longitude)
-                distance = geodesic(user_location, hostel_location).kilometers
-                if distance <= radius:
-                    hostels_in_radius.append(hostel.id)
-
-            if hostels_in_radius:
-                query = query.filter(Hostel.id.in_(hostels_in_radius))
-            else:
-                # No hostels in radius, return empty result
-                query = query.filter(Hostel.id == -1)
+            # Candidates come from the in-memory spatial index instead of a full table scan
+            distances = dict(
+                IndexService.get_geo_index().query_radius(user_location[0], user_location[1], radius)
+            )
+            restrict(distances)
+
+        # Near a campus: range scan on the precomputed (campus_id, distance_km) table
+        campus = None
+        if query_params.get('campus'):
+            campus = CampusService.resolve(query_params['campus'])
+            if campus is None:
+                raise ValueError(f"Unknown campus '{query_params['campus']}'")
+            campus_radius = float(query_params.get(
+                'campus_radius', current_app.config.get('CAMPUS_SEARCH_RADIUS_KM', 5)
+            ))
+            query = query.join(HostelCampusDistance, and_(
+                HostelCampusDistance.hostel_id == Hostel.id,
+                HostelCampusDistance.campus_id == campus.id
+            )).filter(HostelCampusDistance.distance_km <= campus_radius)
+
+        if sort_by == 'distance' and distances is None and campus is None:
+            raise ValueError("sort_by=distance requires lat and lng, or campus")
 
         # Price range
         if query_params.get('min_price'):
@@ -63,44 +108,38 @@ class SearchService:
         if query_params.get('min_capacity'):
             query = query.filter(Hostel.capacity >= int(query_params['min_capacity']))
 
-        # Amenities
+        # Amenities and furnished: one AND over the in-memory amenity/feature bitmaps
+        amenities = None
         if query_params.get('amenities'):
             amenities = query_params['amenities'] if isinstance(query_params['amenities'], list) else [query_params['amenities']]
-            # Filter hostels that have the selected amenities
-            # amenities is expected to be a list of amenity keys like ['wifi', 'water', etc.]
-            for amenity_key in amenities:
-                # Check if the amenity exists in the hostel's amenities JSON
-                query = query.filter(
-                    Hostel.amenities[amenity_key].as_boolean() == True
-                )
-
-        # Features
-        if query_params.get('furnished') is not None:
-            furnished = query_params['furnished'].lower() in ('true', '1', 'yes')
-            query = query.filter(
-                Hostel.features['furnished'].as_boolean() == furnished
-            )
+        furnished = query_params.get('furnished')
+
+        if amenities or furnished is not None:
+            restrict(IndexService.match_features(amenities=amenities, furnished=furnished))
 
-        # Availability dates
+        # Availability dates: hostels with at least `guests` free beds on every night of the stay
         if query_params.get('check_in') and query_params.get('check_out'):
-            from ..models.booking import Booking
+            from ..models.occupancy import HostelOccupancy
             from datetime import datetime
             check_in = datetime.fromisoformat(query_params['check_in']).date()
             check_out = datetime.fromisoformat(query_params['check_out']).date()
+            guests = int(query_params.get('guests', 1))
+
+            # Hostels whose busiest night in the range leaves fewer than `guests` beds,
+            # answered from the (hostel_id, day) ledger index rather than scanning bookings
+            full_hostels = db.session.query(HostelOccupancy.hostel_id)\
+                .join(Hostel, Hostel.id == HostelOccupancy.hostel_id)\
+                .filter(
+                    HostelOccupancy.day >= check_in,
+                    HostelOccupancy.day < check_out
+                )\
+                .group_by(HostelOccupancy.hostel_id, Hostel.capacity)\
+                .having(func.max(HostelOccupancy.guests) + guests > Hostel.capacity)
 
-            # Subquery to find hostels with conflicting bookings
-            conflicting_bookings = db.session.query(Booking.hostel_id).filter(
-                and_(
-                    Booking.status.in_(['confirmed', 'upcoming']),
-                    or_(
-                        and_(Booking.check_in <= check_in, Booking.check_out > check_in),
-                        and_(Booking.check_in < check_out, Booking.check_out >= check_out),
-                        and_(Booking.check_in >= check_in, Booking.check_out <= check_out)
-                    )
-                )
-            ).subquery()
-
-            query = query.filter(~Hostel.id.in_(db.session.query(conflicting_bookings)))
+            query = query.filter(
+                Hostel.capacity >= guests,
+                ~Hostel.id.in_(full_hostels)
+            )
 
         # Verification status
         if query_params.get('verified_only'):
@@ -112,88 +151,327 @@ class SearchService:
             featured = query_params['featured_only'].lower() in ('true', '1', 'yes')
             query = query.filter(Hostel.is_featured == featured)
 
-        # Sorting
-        sort_by = query_params.get('sort_by', 'relevance')
-        if sort_by == 'price_asc':
+        # Index hits go to SQL as an IN list only while it stays small. Larger sets are kept
+        # here and intersected with the SQL-filtered ids, so the bound parameters stay bounded.
+        if candidates is not None and len(candidates) <= current_app.config.get('SEARCH_ID_FILTER_MAX', 900):
+            query = query.filter(Hostel.id.in_(sorted(candidates)) if candidates else Hostel.id == -1)
+            candidates = None
+
+        # Filtered set before ordering, for facet counts
+        filtered_query = query
+
+        # Sorting (distance from a point and text relevance cut their page in Python)
+        page_items = None
+        if sort_by == 'distance' and campus is not None:
+            query = query.order_by(HostelCampusDistance.distance_km.asc(), Hostel.id.asc())
+        elif sort_by == 'distance':
+            page_items, total = SearchService._nearest_page(query, distances, page, per_page, candidates)
+        elif sort_by == 'price_asc':
             query = query.order_by(Hostel.price.asc())
         elif sort_by == 'price_desc':
             query = query.order_by(Hostel.price.desc())
         elif sort_by == 'rating':
-            # Join with reviews to sort by average rating
-            query = query.outerjoin(Hostel.reviews).group_by(Hostel.id)\
-                .order_by(func.avg(Review.rating).desc().nulls_last())
+            # Indexed sort on the denormalized rating aggregates (ix_hostels_rating)
+            query = query.order_by(Hostel.rating_avg.desc(), Hostel.rating_count.desc())
         elif sort_by == 'newest':
             query = query.order_by(Hostel.created_at.desc())
+        elif ranked_ids:  # relevance with a text query
+            page_items, total = SearchService.ranked_page(query, ranked_ids, page, per_page, candidates)
         else:  # relevance or default
             query = query.order_by(Hostel.created_at.desc())
 
         # Pagination
-        hostels = query.paginate(page=page, per_page=per_page, error_out=False)
+        if page_items is None and candidates is not None:
+            page_items, total = SearchService._candidate_page(query, candidates, page, per_page)
+        elif page_items is None:
+            hostels = query.paginate(page=page, per_page=per_page, error_out=False)
+            page_items, total = hostels.items, hostels.total
+
+        # Add average rating, review count and occupancy for the whole page at once
+        from .hostel_service import HostelService
+        result_hostels = HostelService.serialize_hostels(page_items, include_ratings=True)
+
+        if distances is not None:
+            for hostel_data in result_hostels:
+                distance = distances.get(hostel_data['id'])
+                hostel_data['distance_km'] = round(distance, 2) if distance is not None else None
+
+        if campus is not None:
+            campus_distances = CampusService.distances_for(campus.id, [hostel.id for hostel in page_items])
+            for hostel_data in result_hostels:
+                distance = campus_distances.get(hostel_data['id'])
+                hostel_data['campus_distance_km'] = round(distance, 2) if distance is not None else None
+
+        result = {
+            'hostels': result_hostels,
+            'total': total,
+            'pages': math.ceil(total / per_page) if total else 0,
+            'current_page': page,
+            'per_page': per_page,
+            'query': query_params.get('q', ''),
+            'corrected_query': corrected_query,
+            'filters_applied': {k: v for k, v in query_params.items() if k not in ('page', 'per_page', 'facets')}
+        }
+
+        if facet_names:
+            result['facets'] = SearchService.count_facets(filtered_query, facet_names, candidates)
+
+        return result
+
+    @staticmethod
+    def parse_facets(value):
+        """Parse the comma-separated `facets` parameter; raises ValueError on unknown facets"""
+        if not value:
+            return []
+        values = value if isinstance(value, list) else [value]
+        names = []
+        for part in ','.join(values).split(','):
+            name = part.strip()
+            if not name or name in names:
+                continue
+            if name not in SearchService.RESULT_FACETS:
+                raise ValueError(f"Unknown facet '{name}'. Choose from: {', '.join(SearchService.RESULT_FACETS)}")
+            names.append(name)
+        return names
+
+    @staticmethod
+    def price_buckets():
+        """Ascending price_bucket boundaries from SEARCH_PRICE_BUCKETS"""
+        raw = current_app.config.get('SEARCH_PRICE_BUCKETS', '5000,10000,15000,20000')
+        if isinstance(raw, str):
+            raw = [value for value in raw.split(',') if value.strip()]
+        return sorted(float(value) for value in raw)
+
+    @staticmethod
+    def _price_bucket_labels(bounds):
+        labels = []
+        lower = 0
+        for upper in bounds:
+            labels.append(f"{lower:g}-{upper:g}")
+            lower = upper
+        labels.append(f"{lower:g}+")
+        return labels
+
+    @staticmethod
+    def count_facets(filtered_query, facet_names, candidates=None):
+        """
+        Count hostels per facet value over an already-filtered hostel query.
+
+        All requested facets are grouped together in a single GROUP BY over the
+        filtered set; the handful of combination rows (room types x price buckets
+        x flags) is then rolled up per facet here, so the base query runs once no
+        matter how many facets are asked for. With candidates (index hits kept
+        out of SQL) the rows are fetched ungrouped and grouped here instead.
+        """
+        bounds = SearchService.price_buckets()
+        labels = SearchService._price_bucket_labels(bounds)
+
+        columns = {
+            'room_type': Hostel.room_type,
+            'price_bucket': case(
+                *[(Hostel.price < upper, index) for index, upper in enumerate(bounds)],
+                else_=len(bounds)
+            ) if bounds else literal(0),
+            'verified': Hostel.is_verified,
+            'featured': Hostel.is_featured
+        }
+        dimensions = [columns[name].label(name) for name in facet_names]
+
+        if candidates is None:
+            combinations = [
+                (tuple(row[:-1]), row.hostel_count)
+                for row in filtered_query.order_by(None)
+                .with_entities(*dimensions, func.count(Hostel.id).label('hostel_count'))
+                .group_by(*dimensions)
+            ]
+        else:
+            combinations = Counter(
+                tuple(row[1:])
+                for row in filtered_query.order_by(None).with_entities(Hostel.id, *dimensions)
+                if row[0] in candidates
+            ).items()
+
+        counts = {name: {} for name in facet_names}
+        for values, hostel_count in combinations:
+            for name, value in zip(facet_names, values):
+                if name == 'price_bucket':
+                    value = labels[int(value)]
+                elif name in ('verified', 'featured'):
+                    value = bool(value)
+                counts[name][value] = counts[name].get(value, 0) + hostel_count
+
+        facets = {}
+        for name in facet_names:
+            if name == 'price_bucket':
+                # Every bucket is reported, in price order, so the UI can render empty ones
+                values = [(label, counts[name].get(label, 0)) for label in labels]
+            elif name in ('verified', 'featured'):
+                values = [(flag, counts[name].get(flag, 0)) for flag in (True, False)]
+            else:
+                values = sorted(counts[name].items(), key=lambda item: (-item[1], str(item[0])))
+            facets[name] = [{'value': value, 'count': count} for value, count in values]
 
-        # Add average rating and review count to each hostel
-        result_hostels = []
-        for hostel in hostels.items:
-            hostel_data = hostel.to_dict()
+        return facets
 
-            # Calculate average rating
-            avg_rating = db.session.query(func.avg(Review.rating))\
-                .filter(Review.hostel_id == hostel.id)\
-                .scalar() or 0.0
+    @staticmethod
+    def _allowed_ids(query, candidates=None):
+        allowed = {hostel_id for (hostel_id,) in query.order_by(None).with_entities(Hostel.id)}
+        return allowed if candidates is None else allowed & candidates
+
+    @staticmethod
+    def _load_page(page_ids):
+        hostels = {hostel.id: hostel for hostel in Hostel.query.filter(Hostel.id.in_(page_ids))}
+        return [hostels[hostel_id] for hostel_id in page_ids if hostel_id in hostels]
+
+    @staticmethod
+    def _nearest_page(query, distances, page, per_page, candidates=None):
+        """
+        Return (hostels, total) for one page of a nearest-first search.
+
+        Only the ids passing the SQL filters are fetched; the page is then cut
+        from a bounded heap of the page * per_page nearest candidates, so the
+        radius hits are never fully sorted.
+        """
+        if not distances:
+            return [], 0
+
+        allowed = SearchService._allowed_ids(query, candidates)
+        nearby = [
+            (distance, hostel_id) for hostel_id, distance in distances.items()
+            if hostel_id in allowed
+        ]
+
+        nearest = heapq.nsmallest(page * per_page, nearby)
+        page_ids = [hostel_id for _, hostel_id in nearest[(page - 1) * per_page:]]
+        return SearchService._load_page(page_ids) if page_ids else [], len(nearby)
+
+    @staticmethod
+    def ranked_page(query, ranked_ids, page, per_page, candidates=None):
+        """
+        Return (hostels, total) for one page of a relevance-ordered text search.
 
-            review_count = Review.query.filter_by(hostel_id=hostel.id).count()
+        The SQL filters run once to fetch the matching ids; the page is cut from
+        ranked_ids here and only its rows are loaded, so the database never
+        sorts on a CASE with one branch per hit.
+        """
+        allowed = SearchService._allowed_ids(query, candidates)
+        ranked = [hostel_id for hostel_id in ranked_ids if hostel_id in allowed]
 
-            hostel_data['average_rating'] = float(avg_rating)
-            hostel_data['review_count'] = review_count
+        page_ids = ranked[(page - 1) * per_page:page * per_page]
+        return SearchService._load_page(page_ids) if page_ids else [], len(ranked)
 
-            result_hostels.append(hostel_data)
+    @staticmethod
+    def _candidate_page(query, candidates, page, per_page):
+        """
+        Return (hostels, total) for one page of an ordered query restricted to
+        index hits too many to send to the database as an IN list.
+        """
+        ids = [hostel_id for (hostel_id,) in query.with_entities(Hostel.id) if hostel_id in candidates]
+
+        page_ids = ids[(page - 1) * per_page:page * per_page]
+        return SearchService._load_page(page_ids) if page_ids else [], len(ids)
+
+    @staticmethod
+    def parse_bbox(value):
+        """Parse a "min_lng,min_lat,max_lng,max_lat" viewport; raises ValueError if malformed"""
+        try:
+            min_lng, min_lat, max_lng, max_lat = [float(part) for part in value.split(',')]
+        except (AttributeError, ValueError):
+            raise ValueError("bbox must be min_lng,min_lat,max_lng,max_lat")
+        if not (-90 <= min_lat <= max_lat <= 90) or not (-180 <= min_lng <= 180 and -180 <= max_lng <= 180):
+            raise ValueError("bbox is out of range")
+        return min_lng, min_lat, max_lng, max_lat
+
+    @staticmethod
+    def get_map_view(bbox, zoom):
+        """
+        Hostels inside a map viewport: server-side clusters below
+        MAP_CLUSTER_MAX_ZOOM, individual lightweight markers from it upwards.
+        """
+        min_lng, min_lat, max_lng, max_lat = SearchService.parse_bbox(bbox)
+        zoom = int(zoom)
+        if not 0 <= zoom <= 24:
+            raise ValueError("zoom must be between 0 and 24")
+
+        # A viewport crossing the antimeridian is two boxes
+        boxes = [(min_lat, min_lng, max_lat, max_lng)]
+        if min_lng > max_lng:
+            boxes = [(min_lat, min_lng, max_lat, 180.0), (min_lat, -180.0, max_lat, max_lng)]
+
+        index = IndexService.get_map_index()
+        clustered = zoom < current_app.config.get('MAP_CLUSTER_MAX_ZOOM', 15)
+        depth = zoom + current_app.config.get('MAP_CLUSTER_PRECISION', 2)
+
+        clusters = []
+        points = []
+        for box in boxes:
+            if clustered:
+                box_clusters, box_points = index.clusters(*box, depth)
+                clusters.extend(box_clusters)
+                points.extend(box_points)
+            else:
+                points.extend(index.query_bbox(*box))
+
+        markers = [
+            dict(data or {}, id=hostel_id, lat=lat, lng=lng, price=price)
+            for hostel_id, lat, lng, price, data in points
+        ]
 
         return {
-            'hostels': result_hostels,
-            'total': hostels.total,
-            'pages': hostels.pages,
-            'current_page': hostels.page,
-            'per_page': hostels.per_page,
-            'query': query_params.get('q', ''),
-            'filters_applied': {k: v for k, v in query_params.items() if k != 'page' and k != 'per_page'}
+            'zoom': zoom,
+            'clustered': clustered,
+            'clusters': clusters,
+            'markers': markers,
+            'total': sum(cluster['count'] for cluster in clusters) + len(markers)
         }
 
     @staticmethod
     def get_search_suggestions(query, limit=10):
-        """Get search suggestions based on hostel names and locations"""
+        """Get search suggestions for hostel names, locations and universities, most popular first"""
         if not query or len(query) < 2:
             return []
 
-        search_term = f"{query}%"
-
-        # Get matching hostel names
-        names = db.session.query(
-            label('text', Hostel.name),
-            label('type', text("'hostel'"))
-        ).filter(Hostel.name.ilike(search_term)).limit(limit//2)
-
-        # Get matching locations
-        locations = db.session.query(
-            label('text', Hostel.location),
-            label('type', text("'location'"))
-        ).filter(Hostel.location.ilike(search_term)).limit(limit//2)
-
-        # Combine and deduplicate
+        # Served from the in-memory prefix index; weights are hostel counts per suggestion
         suggestions = []
         seen = set()
 
-        for result in names.union(locations).all():
-            if result.text not in seen:
+        results = IndexService.get_suggest_index().complete(query, limit * 2)
+        if not results:
+            # Typo fallback: complete the closest indexed spelling instead
+            corrected = IndexService.correct_words(query)
+            if corrected:
+                results = IndexService.get_suggest_index().complete(corrected, limit * 2)
+
+        for result in results:
+            if result['text'] not in seen:
                 suggestions.append({
-                    'text': result.text,
-                    'type': result.type
+                    'text': result['text'],
+                    'type': result['type']
                 })
-                seen.add(result.text)
+                seen.add(result['text'])
 
         return suggestions[:limit]
 
+    @staticmethod
+    def _cached_facet(key, factory):
+        ttl = current_app.config.get('FACET_CACHE_TTL', 300)
+        return SearchService._facet_cache.get_or_set(key, factory, ttl)
+
+    @staticmethod
+    def invalidate_facets():
+        """Drop cached filter options after the hostel catalog changes (called by HostelService)"""
+        SearchService._facet_cache.clear()
+
     @staticmethod
     def get_popular_locations(limit=20):
         """Get popular locations based on hostel count"""
+        return SearchService._cached_facet(
+            ('popular_locations', limit),
+            lambda: SearchService._compute_popular_locations(limit)
+        )
+
+    @staticmethod
+    def _compute_popular_locations(limit):
         locations = db.session.query(
             Hostel.location,
             func.count(Hostel.id).label('hostel_count')
@@ -212,18 +490,20 @@ class SearchService:
     @staticmethod
     def get_price_ranges():
         """Get price range statistics"""
+        return SearchService._cached_facet('price_ranges', SearchService._compute_price_ranges)
+
+    @staticmethod
+    def _compute_price_ranges():
         # Get basic stats
         price_stats = db.session.query(
             func.min(Hostel.price).label('min_price'),
             func.max(Hostel.price).label('max_price'),
-            func.avg(Hostel.price).label('avg_price')
+            func.avg(Hostel.price).label('avg_price'),
+            func.count(Hostel.price).label('price_count')
         ).first()
 
-        # Get percentiles manually for SQLite compatibility
-        all_prices = db.session.query(Hostel.price).filter(Hostel.price.isnot(None)).all()
-        prices = sorted([p[0] for p in all_prices if p[0] is not None])
-
-        if not prices:
+        n = price_stats.price_count or 0
+        if not n:
             return {
                 'min_price': 0,
                 'max_price': 0,
@@ -232,21 +512,38 @@ class SearchService:
                 'q3_price': 0
             }
 
-        n = len(prices)
-        q1_index = int(0.25 * (n - 1))
-        q3_index = int(0.75 * (n - 1))
+        if db.engine.dialect.name == 'postgresql':
+            # Let the database compute the quartiles
+            q1_price, q3_price = db.session.query(
+                func.percentile_cont(0.25).within_group(Hostel.price),
+                func.percentile_cont(0.75).within_group(Hostel.price)
+            ).filter(Hostel.price.isnot(None)).one()
+        else:
+            # Elsewhere, seek straight to the quartile rows instead of loading every price
+            def price_at(index):
+                return db.session.query(Hostel.price)\
+                    .filter(Hostel.price.isnot(None))\
+                    .order_by(Hostel.price.asc())\
+                    .offset(index).limit(1).scalar()
+
+            q1_price = price_at(int(0.25 * (n - 1)))
+            q3_price = price_at(int(0.75 * (n - 1)))
 
         return {
             'min_price': float(price_stats.min_price or 0),
             'max_price': float(price_stats.max_price or 0),
             'avg_price': float(price_stats.avg_price or 0),
-            'q1_price': float(prices[q1_index]),
-            'q3_price': float(prices[q3_index])
+            'q1_price': float(q1_price or 0),
+            'q3_price': float(q3_price or 0)
         }
 
     @staticmethod
     def get_filter_options():
         """Get available filter options for search"""
+        return SearchService._cached_facet('filter_options', SearchService._compute_filter_options)
+
+    @staticmethod
+    def _compute_filter_options():
         # Room types
         room_types = db.session.query(Hostel.room_type)\
             .distinct()\
@@ -0,0 +1,259 @@
+import math
+from datetime import datetime
+import numpy as np
+from flask import current_app
+from sqlalchemy import func
+from ..extensions import db
+from ..models.hostel import Hostel
+from ..models.neighbour import HostelNeighbour
+
+class SimilarityService:
+    """
+    Precomputed "similar hostels" for the detail page.
+
+    Each hostel becomes a feature vector (log price, room type, log capacity,
+    amenities) plus its coordinates, and its k nearest hostels by weighted
+    squared distance are stored in hostel_neighbours. The feature transform
+    uses fixed scales rather than catalog statistics, so one hostel changing
+    never moves anyone else's vector: an incremental run only recomputes the
+    stale hostels, the hostels that listed them, and the hostels they now
+    come closer to than their current k-th neighbour.
+    """
+
+    # Relative feature weights; a squared distance of 1.0 is "noticeably different"
+    PRICE_WEIGHT = 1.0        # per unit of log(price): ~2.7x price apart
+    ROOM_TYPE_WEIGHT = 1.0    # different room type
+    CAPACITY_WEIGHT = 0.5     # per unit of log(capacity)
+    AMENITY_WEIGHT = 0.25     # per amenity one has and the other lacks
+    GEO_KM_SCALE = 5.0        # 5 km apart
+    MISSING_GEO_PENALTY = 1.0  # either hostel has no coordinates
+
+    # Feature fields whose change makes a hostel's neighbours stale
+    FEATURE_FIELDS = ('price', 'room_type', 'capacity', 'amenities', 'latitude', 'longitude')
+
+    # Distance rows are computed a chunk at a time, sized so each (chunk, n) matrix stays near this many cells
+    CHUNK_CELLS = 2000000
+
+    @staticmethod
+    def get_similar(hostel_id, limit=6):
+        """Get the precomputed most similar hostels as detail-page cards (one indexed lookup)"""
+        rows = db.session.query(Hostel)\
+            .join(HostelNeighbour, HostelNeighbour.neighbour_id == Hostel.id)\
+            .filter(HostelNeighbour.hostel_id == hostel_id)\
+            .order_by(HostelNeighbour.rank.asc())\
+            .limit(limit)\
+            .all()
+        return [SimilarityService._card(hostel) for hostel in rows]
+
+    @staticmethod
+    def _card(hostel):
+        location_parts = hostel.location.split(',') if hostel.location else ['', '']
+        return {
+            'id': hostel.id,
+            'title': hostel.name,
+            'location': {
+                'area': location_parts[0].strip() if len(location_parts) > 0 else '',
+                'city': location_parts[1].strip() if len(location_parts) > 1 else ''
+            },
+            'price': hostel.price,
+            'currency': hostel.currency,
+            'images': hostel.images or [],
+            'roomType': hostel.room_type.replace('_', ' ').title() if hostel.room_type else '',
+            'features': hostel.features or {},
+            'featured': hostel.is_featured,
+            'verified': hostel.is_verified,
+            'rating': float(hostel.rating_avg or 0.0)
+        }
+
+    @staticmethod
+    def mark_stale(hostel, changes=None):
+        """Flag a hostel for the next neighbour refresh if a feature field changed (changes: {field: old value})"""
+        if changes is None or any(
+            getattr(hostel, field) != old for field, old in changes.items()
+            if field in SimilarityService.FEATURE_FIELDS
+        ):
+            hostel.neighbours_stale = True
+
+    @staticmethod
+    def forget(hostel_id):
+        """Within the caller's transaction: drop a hostel's neighbour rows and flag the hostels that listed it"""
+        listed_by = db.session.query(HostelNeighbour.hostel_id).filter(HostelNeighbour.neighbour_id == hostel_id)
+        Hostel.query.filter(Hostel.id.in_(listed_by.subquery().select()))\
+            .update({Hostel.neighbours_stale: True, Hostel.updated_at: Hostel.updated_at}, synchronize_session=False)
+        HostelNeighbour.query.filter(
+            (HostelNeighbour.hostel_id == hostel_id) | (HostelNeighbour.neighbour_id == hostel_id)
+        ).delete(synchronize_session=False)
+
+    @staticmethod
+    def _features(rows):
+        """Build the (ids, feature matrix, coordinates in km) arrays for [(id, price, room_type, capacity, amenities, lat, lng)]"""
+        room_types = sorted({row[2] for row in rows if row[2]})
+        room_index = {room_type: i for i, room_type in enumerate(room_types)}
+
+        amenity_keys = set()
+        for row in rows:
+            amenity_keys.update(SimilarityService._amenity_keys(row[4]))
+        amenity_index = {key: i for i, key in enumerate(sorted(amenity_keys, key=str))}
+
+        n = len(rows)
+        width = 2 + len(room_types) + len(amenity_index)
+        features = np.zeros((n, width))
+        coordinates = np.full((n, 2), np.nan)
+        ids = np.empty(n, dtype=np.int64)
+
+        # One-hot entries are scaled so two different values are exactly WEIGHT apart (squared)
+        room_scale = math.sqrt(SimilarityService.ROOM_TYPE_WEIGHT / 2)
+        amenity_scale = math.sqrt(SimilarityService.AMENITY_WEIGHT)
+
+        for i, (hostel_id, price, room_type, capacity, amenities, lat, lng) in enumerate(rows):
+            ids[i] = hostel_id
+            features[i, 0] = math.log1p(max(price or 0.0, 0.0)) * math.sqrt(SimilarityService.PRICE_WEIGHT)
+            features[i, 1] = math.log1p(max(capacity or 0, 0)) * math.sqrt(SimilarityService.CAPACITY_WEIGHT)
+            if room_type in room_index:
+                features[i, 2 + room_index[room_type]] = room_scale
+            for key in SimilarityService._amenity_keys(amenities):
+                features[i, 2 + len(room_types) + amenity_index[key]] = amenity_scale
+            if lat is not None and lng is not None:
+                # Equirectangular km around the equator-ish latitudes hostels sit at; fine for ranking
+                coordinates[i] = (lat * 111.32, lng * 111.32 * math.cos(math.radians(lat)))
+
+        return ids, features, coordinates
+
+    @staticmethod
+    def _amenity_keys(amenities):
+        if isinstance(amenities, dict):
+            return {str(name).lower() for name, present in amenities.items() if present}
+        return {str(value).strip().lower() for value in (amenities or []) if str(value).strip()}
+
+    @staticmethod
+    def _chunk_size(n):
+        """Rows per distance chunk for n hostels: CHUNK_CELLS / n, at least 1"""
+        return max(1, SimilarityService.CHUNK_CELLS // max(n, 1))
+
+    @staticmethod
+    def _distances(features, coordinates, rows):
+        """
+        Squared distances from the hostels at `rows` to every hostel: shape (len(rows), n).
+
+        Both the feature and the geo term use |a|^2 + |b|^2 - 2ab, so the only
+        large temporaries are two (len(rows), n) matrices.
+        """
+        squared = SimilarityService._squared_euclidean(features, rows)
+
+        # Hostels without coordinates sit at the origin here and get the flat penalty below
+        missing = np.isnan(coordinates).any(axis=1)
+        scaled = np.where(missing[:, None], 0.0, coordinates) / SimilarityService.GEO_KM_SCALE
+        geo = SimilarityService._squared_euclidean(scaled, rows)
+        geo[missing[rows], :] = SimilarityService.MISSING_GEO_PENALTY
+        geo[:, missing] = SimilarityService.MISSING_GEO_PENALTY
+        squared += geo
+
+        # Never a neighbour of yourself
+        squared[np.arange(len(rows)), rows] = np.inf
+        return squared
+
+    @staticmethod
+    def _squared_euclidean(points, rows):
+        """Squared euclidean distances from points[rows] to every point, built in place"""
+        norms = np.einsum('ij,ij->i', points, points)
+        squared = points[rows] @ points.T
+        squared *= -2.0
+        squared += norms[rows][:, None]
+        squared += norms[None, :]
+        np.maximum(squared, 0.0, out=squared)
+        return squared
+
+    @staticmethod
+    def _nearest(distances, k):
+        """Column indexes and distances of the k smallest entries per row, ascending"""
+        k = min(k, distances.shape[1] - 1)
+        if k <= 0:
+            return np.empty((distances.shape[0], 0), dtype=np.int64), np.empty((distances.shape[0], 0))
+        part = np.argpartition(distances, k - 1, axis=1)[:, :k]
+        part_distances = np.take_along_axis(distances, part, axis=1)
+        order = np.argsort(part_distances, axis=1, kind='stable')
+        return np.take_along_axis(part, order, axis=1), np.take_along_axis(part_distances, order, axis=1)
+
+    @staticmethod
+    def refresh_neighbours(full=False, k=None):
+        """
+        Recompute stored neighbours: every hostel when full, otherwise only what
+        the stale hostels affect. Returns the number of hostels recomputed.
+        """
+        k = k or current_app.config.get('SIMILAR_HOSTELS_K', 6)
+        started_at = datetime.utcnow()
+
+        rows = db.session.query(
+            Hostel.id, Hostel.price, Hostel.room_type, Hostel.capacity,
+            Hostel.amenities, Hostel.latitude, Hostel.longitude, Hostel.neighbours_stale
+        ).order_by(Hostel.id.asc()).all()
+        if not rows:
+            return 0
+
+        ids, features, coordinates = SimilarityService._features([row[:7] for row in rows])
+        position = {int(hostel_id): i for i, hostel_id in enumerate(ids)}
+        chunk_size = SimilarityService._chunk_size(len(ids))
+
+        if full:
+            stale = np.arange(len(ids))
+        else:
+            stale = np.array([i for i, row in enumerate(rows) if row[7] or row[7] is None], dtype=np.int64)
+        if not len(stale):
+            return 0
+
+        recompute = set(int(i) for i in stale)
+        if not full:
+            # Hostels whose stored list names a stale hostel need a fresh list
+            stale_ids = [int(ids[i]) for i in stale]
+            for (hostel_id,) in db.session.query(HostelNeighbour.hostel_id).filter(
+                HostelNeighbour.neighbour_id.in_(stale_ids)
+            ).distinct():
+                if hostel_id in position:
+                    recompute.add(position[hostel_id])
+
+            # ...and so do hostels a stale hostel now comes closer to than their current k-th neighbour
+            kth = np.full(len(ids), np.inf)
+            for hostel_id, worst, count in db.session.query(
+                HostelNeighbour.hostel_id, func.max(HostelNeighbour.distance), func.count(HostelNeighbour.id)
+            ).group_by(HostelNeighbour.hostel_id):
+                if hostel_id in position and count >= min(k, len(ids) - 1):
+                    kth[position[hostel_id]] = worst
+
+            for start in range(0, len(stale), chunk_size):
+                chunk = stale[start:start + chunk_size]
+                closer = SimilarityService._distances(features, coordinates, chunk) < kth[None, :]
+                recompute.update(int(i) for i in np.nonzero(closer.any(axis=0))[0])
+
+        targets = np.array(sorted(recompute), dtype=np.int64)
+        new_rows = []
+        for start in range(0, len(targets), chunk_size):
+            chunk = targets[start:start + chunk_size]
+            nearest, nearest_distances = SimilarityService._nearest(
+                SimilarityService._distances(features, coordinates, chunk), k
+            )
+            for row, i in enumerate(chunk):
+                for rank, (j, distance) in enumerate(zip(nearest[row], nearest_distances[row]), start=1):
+                    new_rows.append({
+                        'hostel_id': int(ids[i]),
+                        'neighbour_id': int(ids[j]),
+                        'rank': rank,
+                        'distance': float(distance)
+                    })
+
+        target_ids = [int(ids[i]) for i in targets]
+        for start in range(0, len(target_ids), 1000):
+            HostelNeighbour.query.filter(HostelNeighbour.hostel_id.in_(target_ids[start:start + 1000]))\
+                .delete(synchronize_session=False)
+        if new_rows:
+            db.session.bulk_insert_mappings(HostelNeighbour, new_rows)
+
+        # Hostels edited while this ran keep their flag for the next run (updated_at is left untouched)
+        stale_ids = [int(ids[i]) for i in stale]
+        for start in range(0, len(stale_ids), 1000):
+            Hostel.query.filter(
+                Hostel.id.in_(stale_ids[start:start + 1000]),
+                Hostel.updated_at <= started_at
+            ).update({Hostel.neighbours_stale: False, Hostel.updated_at: Hostel.updated_at}, synchronize_session=False)
+
+        db.session.commit()
+        return len(targets)
@@ -1,6 +1,7 @@
 from ..extensions import db
 from ..models.user import User
 from ..models.landlord import Landlord
+from ..utils.pagination import keyset_paginate
 from werkzeug.security import generate_password_hash
 from datetime import datetime
 
@@ -156,8 +157,8 @@ class UserService:
             raise e
 
     @staticmethod
-    def get_users_list(page=1, per_page=20, filters=None):
-        """Get list of users (admin only)"""
+    def get_users_list(page=1, per_page=20, filters=None, cursor=None, include_total=False):
+        """Get list of users (admin only; pass cursor for keyset pagination)"""
         query = User.query
 
         if filters:
@@ -168,6 +169,14 @@ class UserService:
             if filters.get('email_verified') is not None:
                 query = query.filter_by(email_verified=filters['email_verified'])
 
+        if cursor is not None:
+            keyset = keyset_paginate(query, User.created_at, User.id, cursor, per_page,
+                                     include_total=include_total)
+            return {
+                'users': [user.to_dict() for user in keyset.items],
+                **keyset.meta()
+            }
+
         query = query.order_by(User.created_at.desc())
 
         users = query.paginate(page=page, per_page=per_page, error_out=False)
@@ -0,0 +1,182 @@
+import heapq
+import threading
+
+
+def normalize(text):
+    """Lower-case and collapse whitespace so lookups are case-insensitive"""
+    return ' '.join(str(text).lower().split())
+
+
+class _TrieNode:
+    __slots__ = ('children', 'terminals', 'top')
+
+    def __init__(self):
+        self.children = {}
+        self.terminals = set()
+        self.top = []
+
+
+class PrefixIndex:
+    """
+    Weighted prefix trie for search-box completions.
+
+    Every suggestion (a hostel name, location or university) is inserted under
+    its full text and under each later word, so "wen" finds "Kahawa Wendani".
+    Each node caches its best `top_k` suggestions, so a lookup is a walk down
+    the prefix plus a copy of that list - independent of catalog size. Weights
+    are the number of hostels contributing a suggestion, and are maintained per
+    hostel so writes only touch the affected paths.
+    """
+
+    def __init__(self, top_k=20):
+        self.top_k = top_k
+        self._root = _TrieNode()
+        self._entries = {}
+        self._contributions = {}
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _rank(self, key):
+        entry = self._entries[key]
+        return (-entry['weight'], entry['text'].lower())
+
+    def _suffixes(self, normalized):
+        words = normalized.split(' ')
+        return {' '.join(words[i:]) for i in range(len(words))}
+
+    def _refresh_node(self, node):
+        candidates = set(node.terminals)
+        for child in node.children.values():
+            candidates.update(child.top)
+        node.top = heapq.nsmallest(
+            self.top_k,
+            (key for key in candidates if key in self._entries),
+            key=self._rank
+        )
+
+    def _refresh_path(self, path):
+        # Recompute cached top lists bottom-up along a root-to-leaf path
+        for node in reversed(path):
+            self._refresh_node(node)
+
+    def _insert_key(self, key, refresh=True):
+        for suffix in self._suffixes(key[1]):
+            node = self._root
+            path = [node]
+            for char in suffix:
+                node = node.children.setdefault(char, _TrieNode())
+                path.append(node)
+            node.terminals.add(key)
+            if refresh:
+                self._refresh_path(path)
+
+    def _remove_key(self, key):
+        for suffix in self._suffixes(key[1]):
+            node = self._root
+            path = [node]
+            for char in suffix:
+                node = node.children.get(char)
+                if node is None:
+                    break
+                path.append(node)
+            else:
+                node.terminals.discard(key)
+
+            # Prune branches that no longer lead to any suggestion
+            for depth in range(len(path) - 1, 0, -1):
+                child = path[depth]
+                if child.children or child.terminals:
+                    break
+                del path[depth - 1].children[suffix[depth - 1]]
+                path.pop()
+            self._refresh_path(path)
+
+    def _change_weight(self, key, text, delta):
+        entry = self._entries.get(key)
+        if entry is None:
+            if delta <= 0:
+                return
+            self._entries[key] = {'text': text, 'type': key[0], 'weight': delta}
+            self._insert_key(key)
+            return
+
+        entry['weight'] += delta
+        if entry['weight'] <= 0:
+            del self._entries[key]
+            self._remove_key(key)
+        else:
+            # Same paths, new weight: re-rank the cached top lists
+            self._insert_key(key)
+
+    def _contributed_keys(self, suggestions):
+        contributed = {}
+        for text, kind in suggestions:
+            if not text or not str(text).strip():
+                continue
+            text = ' '.join(str(text).split())
+            contributed.setdefault((kind, normalize(text)), text)
+        return contributed
+
+    def bulk_load(self, items):
+        """
+        Populate an empty index from [(item_id, suggestions), ...].
+
+        Terminals are inserted first and every node's top list is computed once
+        afterwards in a single post-order pass, instead of re-ranking the whole
+        path on each insert.
+        """
+        with self._lock:
+            for item_id, suggestions in items:
+                contributed = self._contributed_keys(suggestions)
+                if not contributed:
+                    continue
+                self._contributions[item_id] = list(contributed)
+                for key, text in contributed.items():
+                    entry = self._entries.get(key)
+                    if entry is None:
+                        self._entries[key] = {'text': text, 'type': key[0], 'weight': 1}
+                    else:
+                        entry['weight'] += 1
+
+            for key in self._entries:
+                self._insert_key(key, refresh=False)
+
+            stack = [(self._root, False)]
+            while stack:
+                node, children_done = stack.pop()
+                if children_done:
+                    self._refresh_node(node)
+                else:
+                    stack.append((node, True))
+                    stack.extend((child, False) for child in node.children.values())
+
+    def add(self, item_id, suggestions):
+        """Set the suggestions contributed by one item, given as [(text, type), ...]"""
+        with self._lock:
+            self.remove(item_id)
+
+            contributed = self._contributed_keys(suggestions)
+            for key, text in contributed.items():
+                self._change_weight(key, text, 1)
+
+            if contributed:
+                self._contributions[item_id] = list(contributed)
+
+    def remove(self, item_id):
+        """Withdraw everything an item contributed"""
+        with self._lock:
+            for key in self._contributions.pop(item_id, ()):
+                self._change_weight(key, None, -1)
+
+    def complete(self, prefix, limit=10):
+        """Return up to `limit` suggestions [{'text', 'type', 'weight'}] for a prefix, best first"""
+        prefix = normalize(prefix)
+        with self._lock:
+            node = self._root
+            for char in prefix:
+                node = node.children.get(char)
+                if node is None:
+                    return []
+            return [dict(self._entries[key]) for key in node.top[:limit]]
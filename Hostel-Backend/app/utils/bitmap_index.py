@@ -0,0 +1,89 @@
+import threading
+
+
+def bitmap_from_ids(ids):
+    """Build an int bitset with bit `i` set for every id in ids"""
+    ids = list(ids)
+    if not ids:
+        return 0
+    buffer = bytearray(max(ids) // 8 + 1)
+    for i in ids:
+        buffer[i >> 3] |= 1 << (i & 7)
+    return int.from_bytes(buffer, 'little')
+
+
+def ids_from_bitmap(bitmap):
+    """List the set bit positions of an int bitset, in ascending order"""
+    if bitmap <= 0:
+        return []
+    bits = bin(bitmap)[:1:-1]
+    return [i for i, bit in enumerate(bits) if bit == '1']
+
+
+class BitmapIndex:
+    """
+    Key -> bitset of item ids, using Python ints as compressed-enough bitmaps.
+
+    Matching several keys (e.g. three amenities plus furnished) is a single
+    chain of bitwise ANDs, regardless of how many items carry each key.
+    """
+
+    def __init__(self):
+        self._bitmaps = {}
+        self._keys = {}
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self._keys)
+
+    def bulk_load(self, items):
+        """Populate an empty index from [(item_id, keys), ...] with one bitmap build per key"""
+        members = {}
+        with self._lock:
+            for item_id, keys in items:
+                keys = set(keys)
+                if not keys:
+                    continue
+                self._keys[item_id] = keys
+                for key in keys:
+                    members.setdefault(key, []).append(item_id)
+
+            self._bitmaps = {key: bitmap_from_ids(ids) for key, ids in members.items()}
+
+    def add(self, item_id, keys):
+        """Set the keys an item carries"""
+        with self._lock:
+            self.remove(item_id)
+            keys = set(keys)
+            if not keys:
+                return
+            bit = 1 << item_id
+            for key in keys:
+                self._bitmaps[key] = self._bitmaps.get(key, 0) | bit
+            self._keys[item_id] = keys
+
+    def remove(self, item_id):
+        """Clear every bit an item set"""
+        with self._lock:
+            keys = self._keys.pop(item_id, ())
+            mask = ~(1 << item_id)
+            for key in keys:
+                bitmap = self._bitmaps.get(key, 0) & mask
+                if bitmap:
+                    self._bitmaps[key] = bitmap
+                else:
+                    self._bitmaps.pop(key, None)
+
+    def bitmap(self, key):
+        return self._bitmaps.get(key, 0)
+
+    def match_all(self, keys):
+        """Return the ids carrying every one of the keys"""
+        with self._lock:
+            result = None
+            for key in keys:
+                bitmap = self._bitmaps.get(key, 0)
+                result = bitmap if result is None else result & bitmap
+                if not result:
+                    return []
+        return ids_from_bitmap(result or 0)
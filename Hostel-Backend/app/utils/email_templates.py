@@ -0,0 +1,57 @@
+import os
+from jinja2 import Environment, FileSystemLoader, select_autoescape
+
+DEFAULT_TEMPLATE_FOLDER = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'templates', 'email')
+
+
+class TemplateRegistry:
+    """
+    Email templates compiled once and rendered from the compiled form.
+
+    Templates live in one folder and share layout.html (page shell and
+    sign-off) and the macros in _macros.html. init_app compiles every
+    template at startup, so render() never parses or compiles anything, and
+    file changes are not picked up until restart. HTML is autoescaped, so
+    names and messages from users are escaped wherever they are interpolated.
+    """
+
+    def __init__(self, folder=None):
+        self.folder = folder or DEFAULT_TEMPLATE_FOLDER
+        self._env = None
+        self._templates = {}
+
+    def init_app(self, app):
+        self.folder = app.config.get('EMAIL_TEMPLATE_FOLDER') or self.folder
+        self.load()
+        app.extensions['email_templates'] = self
+
+    def load(self):
+        """(Re)compile every template in the folder; returns how many were compiled"""
+        self._env = Environment(
+            loader=FileSystemLoader(self.folder),
+            autoescape=select_autoescape(['html']),
+            auto_reload=False,
+            cache_size=-1,
+            trim_blocks=True,
+            lstrip_blocks=True
+        )
+        self._templates = {
+            name: self._env.get_template(name)
+            for name in self._env.list_templates(extensions=['html'])
+        }
+        return len(self._templates)
+
+    def render(self, name, **context):
+        """Render a compiled template by file name, e.g. render('welcome.html', user_name=...)"""
+        if self._env is None:
+            self.load()
+        template = self._templates.get(name)
+        if template is None:
+            raise KeyError(f"Unknown email template '{name}'")
+        return template.render(**context)
+
+    def __contains__(self, name):
+        return name in self._templates
+
+    def __len__(self):
+        return len(self._templates)
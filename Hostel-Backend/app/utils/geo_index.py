@@ -0,0 +1,149 @@
+import math
+import threading
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE_LAT = 111.32
+
+# Haversine uses a spherical earth, geodesic the WGS-84 ellipsoid; the two
+# never disagree by more than ~0.56%, so only points inside this band around
+# the radius need the exact (and much slower) geodesic check.
+HAVERSINE_TOLERANCE = 0.006
+
+
+def haversine_km(lat1, lng1, lat2, lng2):
+    """Great-circle distance in kilometres between two points"""
+    phi1 = math.radians(lat1)
+    phi2 = math.radians(lat2)
+    d_phi = phi2 - phi1
+    d_lambda = math.radians(lng2 - lng1)
+
+    a = math.sin(d_phi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def geodesic_km(lat1, lng1, lat2, lng2):
+    """Ellipsoidal distance in kilometres (same metric the search used before the index)"""
+    from geopy.distance import geodesic
+    return geodesic((lat1, lng1), (lat2, lng2)).kilometers
+
+
+class GeoGridIndex:
+    """
+    Fixed-size lat/lng grid over hostel coordinates.
+
+    Each point lives in exactly one cell keyed by (floor(lat / cell), floor(lng / cell)),
+    so a radius query only has to look at the cells overlapping the query's bounding box
+    instead of every geocoded hostel.
+    """
+
+    def __init__(self, cell_size_deg=0.05):
+        self.cell_size = cell_size_deg
+        self._cells = {}
+        self._points = {}
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self._points)
+
+    def _cell_key(self, lat, lng):
+        return (math.floor(lat / self.cell_size), math.floor(lng / self.cell_size))
+
+    def add(self, item_id, lat, lng):
+        """Insert or move a point"""
+        with self._lock:
+            self.remove(item_id)
+            key = self._cell_key(lat, lng)
+            self._cells.setdefault(key, {})[item_id] = (lat, lng)
+            self._points[item_id] = key
+
+    def remove(self, item_id):
+        """Remove a point if present"""
+        with self._lock:
+            key = self._points.pop(item_id, None)
+            if key is None:
+                return
+            cell = self._cells.get(key)
+            if cell is not None:
+                cell.pop(item_id, None)
+                if not cell:
+                    del self._cells[key]
+
+    def get(self, item_id):
+        """Return the stored (lat, lng) for an id, or None"""
+        with self._lock:
+            key = self._points.get(item_id)
+            if key is None:
+                return None
+            return self._cells[key][item_id]
+
+    def _candidate_cells(self, min_lat, max_lat, min_lng, max_lng):
+        lat_lo, lng_lo = self._cell_key(min_lat, min_lng)
+        lat_hi, lng_hi = self._cell_key(max_lat, max_lng)
+        span = (lat_hi - lat_lo + 1) * (lng_hi - lng_lo + 1)
+
+        # For huge radii it is cheaper to walk the occupied cells than the whole box
+        if span > len(self._cells):
+            return [
+                key for key in self._cells
+                if lat_lo <= key[0] <= lat_hi and lng_lo <= key[1] <= lng_hi
+            ]
+
+        return [
+            (i, j)
+            for i in range(lat_lo, lat_hi + 1)
+            for j in range(lng_lo, lng_hi + 1)
+            if (i, j) in self._cells
+        ]
+
+    def query_bbox(self, min_lat, min_lng, max_lat, max_lng):
+        """Return [(id, lat, lng)] for every point inside the bounding box"""
+        results = []
+        with self._lock:
+            for key in self._candidate_cells(min_lat, max_lat, min_lng, max_lng):
+                for item_id, (lat, lng) in self._cells[key].items():
+                    if min_lat <= lat <= max_lat and min_lng <= lng <= max_lng:
+                        results.append((item_id, lat, lng))
+        return results
+
+    def query_radius(self, lat, lng, radius_km):
+        """
+        Return [(id, distance_km)] for every point within radius_km of (lat, lng).
+
+        Candidates are screened with haversine; only the ones too close to the
+        boundary to call are re-measured with geodesic.
+        """
+        lat_delta = radius_km / KM_PER_DEGREE_LAT
+        cos_lat = math.cos(math.radians(lat))
+        lng_delta = 180.0 if cos_lat < 1e-6 else min(180.0, radius_km / (KM_PER_DEGREE_LAT * cos_lat))
+
+        # Pad the box slightly so the spherical approximation never drops a boundary point
+        pad = 1 + HAVERSINE_TOLERANCE
+        min_lat = max(-90.0, lat - lat_delta * pad)
+        max_lat = min(90.0, lat + lat_delta * pad)
+        min_lng = lng - lng_delta * pad
+        max_lng = lng + lng_delta * pad
+
+        inner = radius_km * (1 - HAVERSINE_TOLERANCE)
+        outer = radius_km * (1 + HAVERSINE_TOLERANCE)
+
+        results = []
+        with self._lock:
+            boxes = [(min_lng, max_lng)]
+            if min_lng < -180.0:
+                boxes = [(-180.0, max_lng), (min_lng + 360.0, 180.0)]
+            elif max_lng > 180.0:
+                boxes = [(min_lng, 180.0), (-180.0, max_lng - 360.0)]
+
+            for box_min_lng, box_max_lng in boxes:
+                for key in self._candidate_cells(min_lat, max_lat, box_min_lng, box_max_lng):
+                    for item_id, (p_lat, p_lng) in self._cells[key].items():
+                        distance = haversine_km(lat, lng, p_lat, p_lng)
+                        if distance > outer:
+                            continue
+                        if distance > inner:
+                            distance = geodesic_km(lat, lng, p_lat, p_lng)
+                            if distance > radius_km:
+                                continue
+                        results.append((item_id, distance))
+
+        return results
@@ -0,0 +1,62 @@
+import json
+
+
+def normalize_location(text):
+    """Lower-case, collapse whitespace and tidy commas so equal places share one cache key"""
+    parts = [' '.join(part.split()) for part in str(text).lower().split(',')]
+    return ', '.join(part for part in parts if part)
+
+
+class GazetteerGeocoder:
+    """
+    Offline geocoder over a local gazetteer file.
+
+    The file is a JSON list of {name, aliases, latitude, longitude}. A location
+    string is matched as a whole first, then part by part from the most specific
+    (leftmost) comma-separated component, so "Kahawa Wendani, Nairobi" resolves
+    to Kahawa Wendani rather than to the city centre.
+    """
+    name = 'gazetteer'
+
+    def __init__(self, path):
+        with open(path, encoding='utf-8') as handle:
+            entries = json.load(handle)
+
+        self._places = {}
+        for entry in entries:
+            point = (float(entry['latitude']), float(entry['longitude']))
+            for place in [entry['name']] + list(entry.get('aliases', [])):
+                self._places.setdefault(normalize_location(place), point)
+
+    def __len__(self):
+        return len(self._places)
+
+    def geocode(self, query):
+        """Return (latitude, longitude) for a location string, or None"""
+        query = normalize_location(query)
+        if query in self._places:
+            return self._places[query]
+        for part in query.split(', '):
+            if part in self._places:
+                return self._places[part]
+        return None
+
+
+class GeopyGeocoder:
+    """Online geocoder through any geopy service, e.g. GeopyGeocoder('nominatim', user_agent='hostel-hunt')"""
+
+    def __init__(self, service, **kwargs):
+        from geopy.geocoders import get_geocoder_for_service
+        self.name = service
+        self._geocoder = get_geocoder_for_service(service)(**kwargs)
+
+    def geocode(self, query):
+        location = self._geocoder.geocode(query)
+        if location is None:
+            return None
+        return (location.latitude, location.longitude)
+
+
+def nominatim_geocoder(app):
+    """GEOCODER_BACKEND factory for OpenStreetMap Nominatim (mind its one-request-per-second policy)"""
+    return GeopyGeocoder('nominatim', user_agent=app.config.get('GEOCODER_USER_AGENT', 'hostel-hunt'), timeout=10)
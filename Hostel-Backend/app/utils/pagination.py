@@ -0,0 +1,100 @@
+import base64
+import json
+from datetime import date, datetime
+from sqlalchemy import and_, or_
+
+MAX_PER_PAGE = 100
+
+
+def encode_cursor(sort_value, item_id):
+    """Encode a (sort key, id) position as an opaque URL-safe token"""
+    if isinstance(sort_value, (datetime, date)):
+        sort_value = sort_value.isoformat()
+    raw = json.dumps([sort_value, item_id], separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(token, sort_column):
+    """Decode a cursor token back into (sort value, id); raises ValueError if it is malformed"""
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        sort_value, item_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        item_id = int(item_id)
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+    python_type = sort_column.type.python_type
+    if sort_value is not None and python_type in (datetime, date):
+        try:
+            sort_value = python_type.fromisoformat(sort_value)
+        except (TypeError, ValueError):
+            raise ValueError("Invalid cursor")
+
+    return sort_value, item_id
+
+
+class KeysetPage:
+    """One page of keyset (cursor) pagination"""
+
+    def __init__(self, items, next_cursor, per_page, total=None):
+        self.items = items
+        self.next_cursor = next_cursor
+        self.per_page = per_page
+        self.total = total
+
+    @property
+    def has_more(self):
+        return self.next_cursor is not None
+
+    def meta(self):
+        """Pagination fields to merge into a list response"""
+        meta = {
+            'next_cursor': self.next_cursor,
+            'has_more': self.has_more,
+            'per_page': self.per_page
+        }
+        if self.total is not None:
+            meta['total'] = self.total
+        return meta
+
+
+def keyset_paginate(query, sort_column, id_column, cursor, per_page, descending=True, include_total=False,
+                    max_per_page=MAX_PER_PAGE):
+    """
+    Paginate a query by (sort_column, id_column) instead of OFFSET/LIMIT.
+
+    An empty cursor starts at the first page. The next page is found by seeking
+    past the last row's key, so deep pages cost the same as the first one, and
+    COUNT(*) only runs when include_total is set. per_page is clamped to
+    1..max_per_page.
+    """
+    per_page = max(1, min(int(per_page), max_per_page))
+    total = query.order_by(None).count() if include_total else None
+
+    if cursor:
+        sort_value, last_id = decode_cursor(cursor, sort_column)
+        if descending:
+            query = query.filter(or_(
+                sort_column < sort_value,
+                and_(sort_column == sort_value, id_column < last_id)
+            ))
+        else:
+            query = query.filter(or_(
+                sort_column > sort_value,
+                and_(sort_column == sort_value, id_column > last_id)
+            ))
+
+    if descending:
+        query = query.order_by(sort_column.desc(), id_column.desc())
+    else:
+        query = query.order_by(sort_column.asc(), id_column.asc())
+
+    rows = query.limit(per_page + 1).all()
+    items = rows[:per_page]
+
+    next_cursor = None
+    if items and len(rows) > per_page:
+        last = items[-1]
+        next_cursor = encode_cursor(getattr(last, sort_column.key), getattr(last, id_column.key))
+
+    return KeysetPage(items, next_cursor, per_page, total)
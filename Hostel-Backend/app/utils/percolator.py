@@ -0,0 +1,121 @@
+import threading
+
+
+class Percolator:
+    """
+    Reverse index over stored queries: given one item, find the queries it could match.
+
+    Each query is registered with its indexed predicates - room types, required
+    text terms, required amenity keys and a price band - and anything else it
+    needs is checked later by the caller. Candidates for an item are the
+    intersection of the queries each predicate lets through, so a new listing
+    is only evaluated against queries that are not ruled out by its room type,
+    words, amenities or price.
+    """
+
+    def __init__(self):
+        self._queries = {}
+        self._room_types = {}
+        self._any_room_type = set()
+        self._terms = {}
+        self._any_term = set()
+        self._amenities = {}
+        self._amenity_counts = {}
+        self._any_amenity = set()
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self._queries)
+
+    def add(self, query_id, room_types=None, terms=None, amenities=None, min_price=None, max_price=None):
+        """Register (or replace) a query's indexed predicates; None means unrestricted"""
+        with self._lock:
+            self.remove(query_id)
+
+            if room_types:
+                for room_type in room_types:
+                    self._room_types.setdefault(room_type, set()).add(query_id)
+            else:
+                self._any_room_type.add(query_id)
+
+            # Every term must match, so indexing one of them (the longest, usually rarest) is enough
+            key_term = max(terms, key=len) if terms else None
+            if key_term:
+                self._terms.setdefault(key_term, set()).add(query_id)
+            else:
+                self._any_term.add(query_id)
+
+            if amenities:
+                for key in amenities:
+                    self._amenities.setdefault(key, set()).add(query_id)
+                self._amenity_counts[query_id] = len(amenities)
+            else:
+                self._any_amenity.add(query_id)
+
+            self._queries[query_id] = (
+                set(room_types or ()), key_term, set(amenities or ()),
+                float('-inf') if min_price is None else float(min_price),
+                float('inf') if max_price is None else float(max_price)
+            )
+
+    def remove(self, query_id):
+        """Unregister a query if present"""
+        with self._lock:
+            entry = self._queries.pop(query_id, None)
+            if entry is None:
+                return
+            room_types, key_term, amenities, _, _ = entry
+
+            for room_type in room_types:
+                self._discard(self._room_types, room_type, query_id)
+            self._any_room_type.discard(query_id)
+
+            if key_term:
+                self._discard(self._terms, key_term, query_id)
+            self._any_term.discard(query_id)
+
+            for key in amenities:
+                self._discard(self._amenities, key, query_id)
+            self._amenity_counts.pop(query_id, None)
+            self._any_amenity.discard(query_id)
+
+    @staticmethod
+    def _discard(mapping, key, query_id):
+        ids = mapping.get(key)
+        if ids is not None:
+            ids.discard(query_id)
+            if not ids:
+                del mapping[key]
+
+    def candidates(self, room_type=None, tokens=(), amenities=(), price=None):
+        """Return the ids of queries whose indexed predicates all accept the item"""
+        with self._lock:
+            room_ok = self._any_room_type | self._room_types.get(room_type, set())
+
+            # Query terms match as prefixes of the item's words
+            term_ok = set(self._any_term)
+            for token in tokens:
+                for end in range(1, len(token) + 1):
+                    term_ok |= self._terms.get(token[:end], set())
+
+            amenity_ok = set(self._any_amenity)
+            hits = {}
+            for key in amenities:
+                for query_id in self._amenities.get(key, ()):
+                    hits[query_id] = hits.get(query_id, 0) + 1
+            amenity_ok.update(query_id for query_id, count in hits.items() if count == self._amenity_counts[query_id])
+
+            sets = sorted((room_ok, term_ok, amenity_ok), key=len)
+            survivors = sets[0] & sets[1] & sets[2]
+
+            # The price band is a cheap range check on the few survivors
+            result = set()
+            for query_id in survivors:
+                min_key, max_key = self._queries[query_id][3:]
+                if price is None:
+                    accepts = min_key == float('-inf') and max_key == float('inf')
+                else:
+                    accepts = min_key <= price <= max_key
+                if accepts:
+                    result.add(query_id)
+            return result
@@ -0,0 +1,261 @@
+import threading
+
+
+class _QuadNode:
+    __slots__ = ('bounds', 'depth', 'points', 'children', 'count', 'sum_lat', 'sum_lng', 'min_price')
+
+    def __init__(self, bounds, depth):
+        self.bounds = bounds  # (min_lat, min_lng, max_lat, max_lng)
+        self.depth = depth
+        self.points = {}
+        self.children = None
+        self.count = 0
+        self.sum_lat = 0.0
+        self.sum_lng = 0.0
+        self.min_price = None
+
+    def child_for(self, lat, lng):
+        min_lat, min_lng, max_lat, max_lng = self.bounds
+        mid_lat = (min_lat + max_lat) / 2
+        mid_lng = (min_lng + max_lng) / 2
+        return self.children[(2 if lat >= mid_lat else 0) + (1 if lng >= mid_lng else 0)]
+
+    def split(self):
+        min_lat, min_lng, max_lat, max_lng = self.bounds
+        mid_lat = (min_lat + max_lat) / 2
+        mid_lng = (min_lng + max_lng) / 2
+        depth = self.depth + 1
+        self.children = [
+            _QuadNode((min_lat, min_lng, mid_lat, mid_lng), depth),
+            _QuadNode((min_lat, mid_lng, mid_lat, max_lng), depth),
+            _QuadNode((mid_lat, min_lng, max_lat, mid_lng), depth),
+            _QuadNode((mid_lat, mid_lng, max_lat, max_lng), depth)
+        ]
+
+    def include(self, lat, lng, price):
+        """Fold one point added below this node into the aggregate"""
+        self.count += 1
+        self.sum_lat += lat
+        self.sum_lng += lng
+        if price is not None and (self.min_price is None or price < self.min_price):
+            self.min_price = price
+
+    def exclude(self, lat, lng, price):
+        """Take out one point that has already left this node's points or children"""
+        self.count -= 1
+        if not self.count:
+            self.sum_lat = self.sum_lng = 0.0
+            self.min_price = None
+            return
+        self.sum_lat -= lat
+        self.sum_lng -= lng
+        if price is not None and price == self.min_price:
+            # Only losing the cheapest point needs a rescan
+            if self.children is None:
+                prices = [point[2] for point in self.points.values() if point[2] is not None]
+            else:
+                prices = [child.min_price for child in self.children if child.min_price is not None]
+            self.min_price = min(prices) if prices else None
+
+    def refresh(self):
+        """Recompute the aggregate from this node's points or children"""
+        if self.children is None:
+            parts = [(1, lat, lng, price) for lat, lng, price, _ in self.points.values()]
+        else:
+            parts = [
+                (child.count, child.sum_lat, child.sum_lng, child.min_price)
+                for child in self.children if child.count
+            ]
+        self.count = sum(part[0] for part in parts)
+        self.sum_lat = sum(part[1] for part in parts)
+        self.sum_lng = sum(part[2] for part in parts)
+        prices = [part[3] for part in parts if part[3] is not None]
+        self.min_price = min(prices) if prices else None
+
+
+class _Bucket:
+    __slots__ = ('count', 'sum_lat', 'sum_lng', 'min_price', 'point')
+
+    def __init__(self):
+        self.count = 0
+        self.sum_lat = 0.0
+        self.sum_lng = 0.0
+        self.min_price = None
+        self.point = None
+
+    def merge(self, count, sum_lat, sum_lng, min_price, point=None):
+        self.count += count
+        self.sum_lat += sum_lat
+        self.sum_lng += sum_lng
+        if min_price is not None and (self.min_price is None or min_price < self.min_price):
+            self.min_price = min_price
+        self.point = point if self.count == 1 else None
+
+
+class QuadTree:
+    """
+    Point quadtree over the whole lat/lng plane with per-node aggregates.
+
+    Every node keeps the count, coordinate sums and minimum price of the points
+    below it, so clustering a viewport only has to visit nodes down to the
+    cluster depth: nodes lying entirely inside the viewport contribute their
+    aggregate in O(1), and only nodes cut by the viewport edge are opened up.
+    A node at depth d is one cell of a 2^d x 2^d grid over the plane.
+    """
+
+    ROOT_BOUNDS = (-90.0, -180.0, 90.0, 180.0)
+
+    def __init__(self, capacity=16, max_depth=24):
+        self.capacity = capacity
+        self.max_depth = max_depth
+        self._root = _QuadNode(self.ROOT_BOUNDS, 0)
+        self._locations = {}
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self._locations)
+
+    def add(self, item_id, lat, lng, price=None, data=None):
+        """Insert or move a point carrying an optional price and marker payload"""
+        with self._lock:
+            self.remove(item_id)
+            lat = min(90.0, max(-90.0, lat))
+            lng = min(180.0, max(-180.0, lng))
+
+            node = self._root
+            path = [node]
+            while node.children is not None:
+                node = node.child_for(lat, lng)
+                path.append(node)
+
+            node.points[item_id] = (lat, lng, price, data)
+            self._locations[item_id] = (lat, lng)
+
+            # O(depth): leaves at max_depth can hold any number of co-located points
+            for visited in path:
+                visited.include(lat, lng, price)
+            self._split_if_full(node)
+
+    def _split_if_full(self, node):
+        if len(node.points) <= self.capacity or node.depth >= self.max_depth:
+            return
+        points = node.points
+        node.points = {}
+        node.split()
+        for point_id, point in points.items():
+            node.child_for(point[0], point[1]).points[point_id] = point
+        for child in node.children:
+            self._split_if_full(child)
+            child.refresh()
+
+    def remove(self, item_id):
+        """Remove a point if present"""
+        with self._lock:
+            location = self._locations.pop(item_id, None)
+            if location is None:
+                return
+
+            node = self._root
+            path = [node]
+            while node.children is not None:
+                node = node.child_for(*location)
+                path.append(node)
+            lat, lng, price, _ = node.points.pop(item_id)
+
+            for visited in reversed(path):
+                # Fold children back into a leaf once they fit in one again
+                if (visited.children is not None and
+                        all(child.children is None for child in visited.children) and
+                        sum(len(child.points) for child in visited.children) <= self.capacity):
+                    for child in visited.children:
+                        visited.points.update(child.points)
+                    visited.children = None
+                visited.exclude(lat, lng, price)
+
+    def _cell_key(self, lat, lng, depth):
+        cells = 1 << depth
+        row = min(cells - 1, int((lat + 90.0) / 180.0 * cells))
+        col = min(cells - 1, int((lng + 180.0) / 360.0 * cells))
+        return row, col
+
+    def _collect_points(self, node, box, visit):
+        min_lat, min_lng, max_lat, max_lng = box
+        stack = [node]
+        while stack:
+            current = stack.pop()
+            n_min_lat, n_min_lng, n_max_lat, n_max_lng = current.bounds
+            if n_min_lat > max_lat or n_max_lat < min_lat or n_min_lng > max_lng or n_max_lng < min_lng:
+                continue
+            if current.children is not None:
+                stack.extend(current.children)
+                continue
+            for item_id, (lat, lng, price, data) in current.points.items():
+                if min_lat <= lat <= max_lat and min_lng <= lng <= max_lng:
+                    visit(item_id, lat, lng, price, data)
+
+    def query_bbox(self, min_lat, min_lng, max_lat, max_lng):
+        """Return [(id, lat, lng, price, data)] for every point inside the box"""
+        results = []
+        with self._lock:
+            self._collect_points(
+                self._root, (min_lat, min_lng, max_lat, max_lng),
+                lambda *point: results.append(point)
+            )
+        return results
+
+    def clusters(self, min_lat, min_lng, max_lat, max_lng, depth):
+        """
+        Group the points inside the box into the grid cells of the given depth.
+
+        Returns (clusters, points): clusters as [{'lat', 'lng', 'count', 'min_price'}]
+        with the centroid of their points, and cells holding a single point as
+        [(id, lat, lng, price, data)].
+        """
+        box = (min_lat, min_lng, max_lat, max_lng)
+        buckets = {}
+
+        def bucket(key):
+            if key not in buckets:
+                buckets[key] = _Bucket()
+            return buckets[key]
+
+        def visit_point(item_id, lat, lng, price, data):
+            bucket(self._cell_key(lat, lng, depth)).merge(1, lat, lng, price, (item_id, lat, lng, price, data))
+
+        with self._lock:
+            stack = [self._root]
+            while stack:
+                node = stack.pop()
+                if not node.count:
+                    continue
+                n_min_lat, n_min_lng, n_max_lat, n_max_lng = node.bounds
+                if n_min_lat > max_lat or n_max_lat < min_lat or n_min_lng > max_lng or n_max_lng < min_lng:
+                    continue
+
+                inside = (min_lat <= n_min_lat and n_max_lat <= max_lat and
+                          min_lng <= n_min_lng and n_max_lng <= max_lng)
+                if node.depth >= depth and inside:
+                    # The whole subtree falls into one cell: use the aggregate
+                    if node.count == 1:
+                        self._collect_points(node, box, visit_point)
+                    else:
+                        key = self._cell_key(node.sum_lat / node.count, node.sum_lng / node.count, depth)
+                        bucket(key).merge(node.count, node.sum_lat, node.sum_lng, node.min_price)
+                elif node.children is not None:
+                    stack.extend(node.children)
+                else:
+                    self._collect_points(node, box, visit_point)
+
+        clusters = []
+        points = []
+        for entry in buckets.values():
+            if entry.count == 1 and entry.point is not None:
+                points.append(entry.point)
+            else:
+                clusters.append({
+                    'lat': entry.sum_lat / entry.count,
+                    'lng': entry.sum_lng / entry.count,
+                    'count': entry.count,
+                    'min_price': entry.min_price
+                })
+        return clusters, points
@@ -0,0 +1,129 @@
+import socketserver
+import threading
+from email import message_from_bytes
+
+
+class _SMTPHandler(socketserver.StreamRequestHandler):
+    """Just enough SMTP (HELO/EHLO, MAIL, RCPT, DATA, RSET, NOOP, QUIT) for smtplib and Flask-Mail"""
+
+    def reply(self, line):
+        self.wfile.write(line.encode('ascii') + b"\r\n")
+
+    def handle(self):
+        sink = self.server.sink
+        self.reply("220 hostel-hunt smtp sink ready")
+        sender, recipients = None, []
+
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode('utf-8', 'replace').strip()
+            verb = command[:4].upper()
+
+            if verb == 'EHLO':
+                self.reply("250-hostel-hunt")
+                self.reply("250 8BITMIME")
+            elif verb == 'HELO':
+                self.reply("250 hostel-hunt")
+            elif verb == 'MAIL':
+                sender, recipients = command[10:].strip('<> '), []
+                self.reply("250 OK")
+            elif verb == 'RCPT':
+                if sink.should_fail():
+                    self.reply("451 Temporary failure, try again later")
+                    continue
+                recipients.append(command[8:].strip('<> '))
+                self.reply("250 OK")
+            elif verb == 'DATA':
+                self.reply("354 End data with <CR><LF>.<CR><LF>")
+                lines = []
+                while True:
+                    data = self.rfile.readline()
+                    if not data or data in (b".\r\n", b".\n"):
+                        break
+                    lines.append(data[1:] if data.startswith(b"..") else data)
+                sink.record(sender, recipients, b"".join(lines))
+                sender, recipients = None, []
+                self.reply("250 OK queued")
+            elif verb == 'RSET':
+                sender, recipients = None, []
+                self.reply("250 OK")
+            elif verb == 'NOOP':
+                self.reply("250 OK")
+            elif verb == 'QUIT':
+                self.reply("221 Bye")
+                return
+            else:
+                self.reply("502 Command not implemented")
+
+
+class _Server(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def process_request(self, request, client_address):
+        self.sink.opened()
+        super().process_request(request, client_address)
+
+
+class SMTPSink:
+    """
+    Local SMTP stand-in for development and tests: accepts every message
+    and keeps it in memory instead of delivering it. Point MAIL_SERVER /
+    MAIL_PORT at it with MAIL_USE_TLS=False and no MAIL_USERNAME.
+
+    fail_every=n answers every n-th recipient with a temporary 451 error,
+    to exercise retry paths.
+    """
+
+    def __init__(self, host='127.0.0.1', port=0, fail_every=0):
+        self.messages = []
+        self.connections = 0
+        self.fail_every = fail_every
+        self._attempts = 0
+        self._lock = threading.Lock()
+        self._server = _Server((host, port), _SMTPHandler)
+        self._server.sink = self
+        self._thread = None
+
+    @property
+    def address(self):
+        return self._server.server_address
+
+    def should_fail(self):
+        with self._lock:
+            self._attempts += 1
+            return bool(self.fail_every) and self._attempts % self.fail_every == 0
+
+    def opened(self):
+        with self._lock:
+            self.connections += 1
+
+    def record(self, sender, recipients, data):
+        with self._lock:
+            self.messages.append({
+                'sender': sender,
+                'recipients': recipients,
+                'message': message_from_bytes(data)
+            })
+
+    def start(self):
+        """Serve in a background thread; returns (host, port)"""
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self.address
+
+    def serve_forever(self):
+        self._server.serve_forever()
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
@@ -0,0 +1,153 @@
+import bisect
+import math
+import re
+import threading
+from .trigram_index import TrigramIndex
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text):
+    """Lower-case alphanumeric tokens of a string"""
+    if not text:
+        return []
+    return TOKEN_RE.findall(str(text).lower())
+
+
+class InvertedIndex:
+    """
+    Token -> {id: weight} postings with a sorted vocabulary for prefix lookups.
+
+    Each document is a list of (text, weight) fields; a token's weight for a
+    document is the sum of the weights of the fields it appears in. Queries are
+    AND-ed across terms and every term matches as a token prefix, so partially
+    typed words still hit. The vocabulary is also trigram-indexed, so misspelled
+    terms can fall back to their closest indexed words.
+    """
+
+    def __init__(self):
+        self._postings = {}
+        self._vocabulary = []
+        self._trigrams = TrigramIndex()
+        self._documents = {}
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self._documents)
+
+    def add(self, doc_id, fields):
+        """Index (or re-index) a document given as [(text, weight), ...]"""
+        weights = {}
+        for text, weight in fields:
+            for token in set(tokenize(text)):
+                weights[token] = weights.get(token, 0) + weight
+
+        with self._lock:
+            self.remove(doc_id)
+            for token, weight in weights.items():
+                postings = self._postings.get(token)
+                if postings is None:
+                    postings = self._postings[token] = {}
+                    bisect.insort(self._vocabulary, token)
+                    self._trigrams.add(token)
+                postings[doc_id] = weight
+            self._documents[doc_id] = tuple(weights)
+
+    def remove(self, doc_id):
+        """Remove a document if present"""
+        with self._lock:
+            for token in self._documents.pop(doc_id, ()):
+                postings = self._postings.get(token)
+                if postings is None:
+                    continue
+                postings.pop(doc_id, None)
+                if not postings:
+                    del self._postings[token]
+                    i = bisect.bisect_left(self._vocabulary, token)
+                    if i < len(self._vocabulary) and self._vocabulary[i] == token:
+                        del self._vocabulary[i]
+                    self._trigrams.remove(token)
+
+    def _expand(self, term):
+        i = bisect.bisect_left(self._vocabulary, term)
+        while i < len(self._vocabulary) and self._vocabulary[i].startswith(term):
+            yield self._vocabulary[i]
+            i += 1
+
+    def search(self, query):
+        """
+        Return [(id, score)] of documents matching every term, best first.
+
+        Scores are field-weighted and scaled by inverse document frequency, so
+        a rare term in a hostel name outranks a common word in a description.
+        """
+        terms = list(dict.fromkeys(tokenize(query)))
+        with self._lock:
+            return self._score([[(token, 1.0) for token in self._expand(term)] for term in terms])
+
+    def fuzzy_search(self, query, threshold=0.3, max_expansions=3, deadline=None):
+        """
+        Like search, but a term with no prefix match is replaced by up to
+        `max_expansions` vocabulary words whose trigram similarity is at least
+        `threshold`, each scored in proportion to its similarity.
+
+        Returns (results, corrections) where corrections maps every replaced
+        term to its closest word.
+        """
+        terms = list(dict.fromkeys(tokenize(query)))
+        corrections = {}
+        groups = []
+        with self._lock:
+            for term in terms:
+                tokens = [(token, 1.0) for token in self._expand(term)]
+                if not tokens:
+                    tokens = self._trigrams.similar(term, threshold, max_expansions, deadline)
+                    if not tokens:
+                        return [], {}
+                    corrections[term] = tokens[0][0]
+                groups.append(tokens)
+
+            return self._score(groups), corrections
+
+    def correct(self, term, threshold=0.3, deadline=None):
+        """Closest vocabulary word to a term with no prefix match, the term itself if it has one, or None"""
+        term = term.lower()
+        with self._lock:
+            if next(self._expand(term), None) is not None:
+                return term
+            similar = self._trigrams.similar(term, threshold, 1, deadline)
+        return similar[0][0] if similar else None
+
+    def _score(self, groups):
+        # groups: one [(token, factor), ...] list per query term; documents must match every group
+        if not groups:
+            return []
+
+        total = max(1, len(self._documents))
+        scores = None
+
+        for tokens in groups:
+            term_scores = {}
+            for token, factor in tokens:
+                postings = self._postings.get(token, {})
+                if not postings:
+                    continue
+                idf = math.log(1 + total / len(postings))
+                for doc_id, weight in postings.items():
+                    score = weight * idf * factor
+                    if score > term_scores.get(doc_id, 0):
+                        term_scores[doc_id] = score
+
+            if scores is None:
+                scores = term_scores
+            else:
+                scores = {
+                    doc_id: score + term_scores[doc_id]
+                    for doc_id, score in scores.items()
+                    if doc_id in term_scores
+                }
+
+            if not scores:
+                return []
+
+        return sorted(scores.items(), key=lambda item: (-item[1], item[0]))
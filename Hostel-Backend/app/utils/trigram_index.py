@@ -0,0 +1,71 @@
+import threading
+import time
+
+
+def trigrams(word):
+    """Padded character trigrams of a word, as pg_trgm builds them ("  ju", " ju", "juj", ...)"""
+    padded = f"  {word} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class TrigramIndex:
+    """
+    Trigram -> words postings for fuzzy word lookups.
+
+    Similarity is the pg_trgm measure: shared trigrams over the union of both
+    words' trigrams. A lookup only touches the words sharing at least one
+    trigram with the query, and stops early once its deadline passes.
+    """
+
+    def __init__(self):
+        self._postings = {}
+        self._sizes = {}
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self._sizes)
+
+    def add(self, word):
+        with self._lock:
+            if word in self._sizes:
+                return
+            grams = trigrams(word)
+            for gram in grams:
+                self._postings.setdefault(gram, set()).add(word)
+            self._sizes[word] = len(grams)
+
+    def remove(self, word):
+        with self._lock:
+            if self._sizes.pop(word, None) is None:
+                return
+            for gram in trigrams(word):
+                words = self._postings.get(gram)
+                if words is not None:
+                    words.discard(word)
+                    if not words:
+                        del self._postings[gram]
+
+    def similar(self, word, threshold=0.3, limit=5, deadline=None):
+        """
+        Return up to `limit` [(word, similarity)] with similarity >= threshold,
+        most similar first. With a time.monotonic() deadline, the search returns
+        whatever it has ranked by then.
+        """
+        grams = trigrams(word)
+        shared = {}
+        with self._lock:
+            # Rare trigrams first, so a cut-off search has already seen the most telling ones
+            for gram in sorted(grams, key=lambda g: len(self._postings.get(g, ()))):
+                if deadline is not None and time.monotonic() > deadline:
+                    break
+                for other in self._postings.get(gram, ()):
+                    shared[other] = shared.get(other, 0) + 1
+
+            results = []
+            for other, count in shared.items():
+                similarity = count / (len(grams) + self._sizes[other] - count)
+                if similarity >= threshold:
+                    results.append((other, similarity))
+
+        results.sort(key=lambda item: (-item[1], item[0]))
+        return results[:limit]
@@ -18,6 +18,46 @@ class Config:
     MAIL_USE_TLS = os.getenv('MAIL_USE_TLS', 'True') == 'True'
     MAIL_USERNAME = os.getenv('MAIL_USERNAME')
     MAIL_PASSWORD = os.getenv('MAIL_PASSWORD')
+    MAIL_DEFAULT_SENDER = os.getenv('MAIL_DEFAULT_SENDER', MAIL_USERNAME)
+    EMAIL_TEMPLATE_FOLDER = os.getenv('EMAIL_TEMPLATE_FOLDER')  # defaults to app/templates/email; compiled once at startup
+    EMAIL_BULK_BATCH_SIZE = int(os.getenv('EMAIL_BULK_BATCH_SIZE', 100))  # messages sent per pooled SMTP connection
+    NOTIFICATION_CHUNK_SIZE = int(os.getenv('NOTIFICATION_CHUNK_SIZE', 500))  # bookings fetched per round trip by the reminder jobs
+
+    # Email outbox worker (flask email-worker)
+    EMAIL_OUTBOX_MAX_ATTEMPTS = int(os.getenv('EMAIL_OUTBOX_MAX_ATTEMPTS', 6))  # sends tried before a row is marked failed
+    EMAIL_OUTBOX_BACKOFF_SECONDS = int(os.getenv('EMAIL_OUTBOX_BACKOFF_SECONDS', 30))  # first retry delay, doubled each attempt
+    EMAIL_OUTBOX_BACKOFF_MAX_SECONDS = int(os.getenv('EMAIL_OUTBOX_BACKOFF_MAX_SECONDS', 3600))
+    EMAIL_OUTBOX_LEASE_SECONDS = int(os.getenv('EMAIL_OUTBOX_LEASE_SECONDS', 300))  # claimed rows are retried after this if the worker dies
+    EMAIL_OUTBOX_POLL_SECONDS = float(os.getenv('EMAIL_OUTBOX_POLL_SECONDS', 5))  # worker sleep when nothing is due
+
+    # Periodic maintenance jobs
+    SCHEDULER_ENABLED = os.getenv('SCHEDULER_ENABLED', 'False') == 'True'  # start the scheduler thread in each web worker; one leader runs jobs
+    SCHEDULER_POLL_SECONDS = int(os.getenv('SCHEDULER_POLL_SECONDS', 30))  # how often the leader checks for due jobs
+
+    # In-memory search indexes
+    SEARCH_INDEX_TTL = int(os.getenv('SEARCH_INDEX_TTL', 300))  # seconds before a background rebuild
+    GEO_INDEX_CELL_SIZE = float(os.getenv('GEO_INDEX_CELL_SIZE', 0.05))  # grid cell size in degrees
+    SEARCH_ID_FILTER_MAX = int(os.getenv('SEARCH_ID_FILTER_MAX', 900))  # index hits sent to SQL as an IN list (SQLite allows 999); more are intersected in Python
+    SUGGEST_INDEX_TOP_K = int(os.getenv('SUGGEST_INDEX_TOP_K', 20))  # completions cached per prefix
+    FUZZY_SEARCH_THRESHOLD = float(os.getenv('FUZZY_SEARCH_THRESHOLD', 0.3))  # min trigram similarity for typo fallback
+    FUZZY_SEARCH_BUDGET_MS = int(os.getenv('FUZZY_SEARCH_BUDGET_MS', 20))  # time allowed for the typo fallback lookup
+    FACET_CACHE_TTL = int(os.getenv('FACET_CACHE_TTL', 300))  # seconds /search/filters stays cached
+    CAMPUS_DATA_FILE = os.getenv('CAMPUS_DATA_FILE', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'campuses.json'))
+    CAMPUS_DISTANCE_MAX_KM = float(os.getenv('CAMPUS_DISTANCE_MAX_KM', 30))  # hostel-campus pairs further apart are not stored
+    CAMPUS_SEARCH_RADIUS_KM = float(os.getenv('CAMPUS_SEARCH_RADIUS_KM', 5))  # default campus_radius for /search/hostels
+    GEOCODER_BACKEND = os.getenv('GEOCODER_BACKEND')  # "module:factory", e.g. app.utils.geocoding:nominatim_geocoder
+    GEOCODER_GAZETTEER_FILE = os.getenv('GEOCODER_GAZETTEER_FILE', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'gazetteer.json'))
+    GEOCODER_WORKERS = int(os.getenv('GEOCODER_WORKERS', 4))  # concurrent geocoder lookups per batch
+    SIMILAR_HOSTELS_K = int(os.getenv('SIMILAR_HOSTELS_K', 6))  # neighbours stored per hostel
+    SAVED_SEARCH_LIMIT = int(os.getenv('SAVED_SEARCH_LIMIT', 20))  # saved searches per user
+    MAP_CLUSTER_MAX_ZOOM = int(os.getenv('MAP_CLUSTER_MAX_ZOOM', 15))  # /search/map returns plain markers from this zoom
+    MAP_CLUSTER_PRECISION = int(os.getenv('MAP_CLUSTER_PRECISION', 2))  # cluster cells per tile side = 2 ** precision
+    SEARCH_PRICE_BUCKETS = os.getenv('SEARCH_PRICE_BUCKETS', '5000,10000,15000,20000')  # price_bucket facet boundaries
+
+    # Search result cache
+    SEARCH_CACHE_TTL = int(os.getenv('SEARCH_CACHE_TTL', 60))
+    SEARCH_CACHE_SIZE = int(os.getenv('SEARCH_CACHE_SIZE', 1024))  # max cached result pages per worker
+    SEARCH_CACHE_BACKEND = os.getenv('SEARCH_CACHE_BACKEND')  # "module:factory" for a shared backend
 
     # CORS Configuration
     CORS_HEADERS = 'Content-Type'
@@ -0,0 +1,143 @@
+import os
+import tempfile
+import threading
+
+# Config reads the environment at import time, so point it at a throwaway database first.
+# Never the DATABASE_URL from the environment: every test drops all tables.
+os.environ['DATABASE_URL'] = os.getenv(
+    'TEST_DATABASE_URL', 'sqlite:///' + os.path.join(tempfile.mkdtemp(prefix='hostel-hunt-tests-'), 'test.db')
+)
+os.environ.setdefault('MAIL_DEFAULT_SENDER', 'noreply@hostelhunt.test')
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app import create_app
+from app.extensions import db
+from app.models.user import User
+from app.models.landlord import Landlord
+from app.models.hostel import Hostel
+from app.services.cache_service import CacheService
+from app.services.index_service import IndexService
+from app.services.saved_search_service import SavedSearchService
+from app.services.search_service import SearchService
+from app.utils.smtp_sink import SMTPSink
+
+
+def pytest_collection_modifyitems(config, items):
+    if os.getenv('RUN_BENCHMARKS') == '1':
+        return
+    skip = pytest.mark.skip(reason="benchmark: set RUN_BENCHMARKS=1 to run")
+    for item in items:
+        if 'benchmark' in item.keywords:
+            item.add_marker(skip)
+
+
+def _reset_process_state():
+    """Drop the per-process indexes and caches so tests don't see each other's hostels"""
+    IndexService.reset()
+    SearchService.invalidate_facets()
+    CacheService._backend = None
+    CacheService._generations = None
+    SavedSearchService._percolator = None
+    SavedSearchService._predicates = {}
+
+
+@pytest.fixture
+def app():
+    app = create_app()
+    app.config.update(TESTING=True)
+    app.extensions['mail'].suppress = True
+    _reset_process_state()
+
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+    _reset_process_state()
+
+
+@pytest.fixture
+def landlord(app):
+    user = User(email='landlord@hostelhunt.test', role='landlord', name='Land Lord')
+    user.set_password('secret')
+    db.session.add(user)
+    db.session.flush()
+    landlord = Landlord(user_id=user.id, business_name='Lord Lettings', contact_email='lettings@hostelhunt.test')
+    db.session.add(landlord)
+    db.session.commit()
+    return landlord
+
+
+@pytest.fixture
+def make_user(app):
+    def make_user(email, role='student', name='Student'):
+        user = User(email=email, role=role, name=name)
+        user.set_password('secret')
+        db.session.add(user)
+        db.session.commit()
+        return user
+    return make_user
+
+
+@pytest.fixture
+def make_hostel(landlord):
+    def make_hostel(**fields):
+        values = dict(
+            name='Sunrise Hostel', location='Juja, Kiambu', description='Quiet rooms near campus',
+            latitude=-1.10, longitude=37.01, price=8000, capacity=4, room_type='single',
+            landlord_id=landlord.id, amenities=[], features={}
+        )
+        values.update(fields)
+        hostel = Hostel(**values)
+        db.session.add(hostel)
+        db.session.commit()
+        return hostel
+    return make_hostel
+
+
+@pytest.fixture
+def smtp_sink(app):
+    """Deliver the app's mail to an in-process SMTPSink instead of suppressing it"""
+    state = app.extensions['mail']
+    with SMTPSink() as sink:
+        state.server, state.port = sink.address
+        state.use_tls = state.use_ssl = False
+        state.username = None
+        state.suppress = False
+        yield sink
+
+
+@pytest.fixture
+def row_locks(app):
+    """
+    SQLite ignores SELECT ... FOR UPDATE. For concurrency tests, make every
+    FOR UPDATE query take one process-wide lock held until that session's
+    transaction ends, which is what the hostel row lock guarantees on PostgreSQL.
+    """
+    if db.engine.dialect.name != 'sqlite':
+        yield
+        return
+
+    lock = threading.Lock()
+    holder = threading.local()
+
+    def acquire(state):
+        if state.is_select and state.statement._for_update_arg is not None and not getattr(holder, 'held', False):
+            lock.acquire()
+            holder.held = True
+
+    def release(session):
+        if getattr(holder, 'held', False):
+            holder.held = False
+            lock.release()
+
+    event.listen(Session, 'do_orm_execute', acquire)
+    event.listen(Session, 'after_commit', release)
+    event.listen(Session, 'after_rollback', release)
+    yield
+    event.remove(Session, 'do_orm_execute', acquire)
+    event.remove(Session, 'after_commit', release)
+    event.remove(Session, 'after_rollback', release)
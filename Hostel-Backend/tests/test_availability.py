@@ -0,0 +1,98 @@
+import os
+import random
+import time
+from datetime import date, timedelta
+
+import pytest
+from sqlalchemy import and_, or_
+
+from app.extensions import db
+from app.models.booking import Booking
+from app.models.hostel import Hostel
+from app.services.booking_service import BookingService
+from app.services.search_service import SearchService
+
+
+def available(check_in, check_out, guests=1):
+    params = {'check_in': check_in.isoformat(), 'check_out': check_out.isoformat(), 'guests': str(guests)}
+    return sorted(hostel['id'] for hostel in SearchService._execute_search(params, 1, 50)['hostels'])
+
+
+def test_availability_counts_free_beds_on_every_night(app, make_hostel, make_user):
+    guest = make_user('guest@hostelhunt.test')
+    hostels = [make_hostel(name=f'Hostel {capacity}', capacity=capacity).id for capacity in (2, 4, 1, 6)]
+    start = date.today() + timedelta(days=1)
+    for hostel_id in hostels[:2]:
+        BookingService.create_booking(guest.id, hostel_id, start.isoformat(), (start + timedelta(days=9)).isoformat(), 2)
+
+    nights = (start + timedelta(days=4), start + timedelta(days=11))
+    assert available(*nights, guests=1) == [hostels[1], hostels[2], hostels[3]]
+    assert available(*nights, guests=2) == [hostels[1], hostels[3]]
+    assert available(*nights, guests=3) == [hostels[3]]
+    # Check-out night is free again
+    assert available(start + timedelta(days=9), start + timedelta(days=11)) == hostels
+
+
+@pytest.mark.benchmark
+def test_benchmark_availability_search_on_a_million_bookings(app, make_user, landlord):
+    """Ledger range scan vs the old NOT IN over overlapping bookings (BENCHMARK_BOOKINGS, default 1M)"""
+    n_bookings = int(os.getenv('BENCHMARK_BOOKINGS', 1000000))
+    n_hostels = max(10, n_bookings // 500)
+    rng = random.Random(7)
+    today = date.today()
+    guest = make_user('bench@hostelhunt.test')
+
+    db.session.execute(Hostel.__table__.insert(), [
+        dict(name=f'Hostel {i}', location='Juja, Kiambu', price=8000, capacity=rng.randint(20, 60),
+             room_type='single', landlord_id=landlord.id, amenities=[], features={})
+        for i in range(n_hostels)
+    ])
+    hostel_ids = [hostel_id for (hostel_id,) in db.session.query(Hostel.id)]
+    for offset in range(0, n_bookings, 50000):
+        rows = []
+        for _ in range(min(50000, n_bookings - offset)):
+            check_in = today + timedelta(days=rng.randrange(365))
+            rows.append(dict(
+                user_id=guest.id, hostel_id=rng.choice(hostel_ids), check_in=check_in,
+                check_out=check_in + timedelta(days=rng.randint(1, 7)), guests=rng.randint(1, 2),
+                total_price=8000, status='confirmed' if rng.random() < 0.9 else 'cancelled'
+            ))
+        db.session.execute(Booking.__table__.insert(), rows)
+    db.session.commit()
+
+    started = time.perf_counter()
+    ledger_rows = BookingService.rebuild_ledger()
+    build = time.perf_counter() - started
+
+    check_in, check_out = today + timedelta(days=100), today + timedelta(days=107)
+
+    def before():
+        conflicting = db.session.query(Booking.hostel_id).filter(
+            Booking.status.in_(['confirmed', 'upcoming']),
+            or_(
+                and_(Booking.check_in <= check_in, Booking.check_out > check_in),
+                and_(Booking.check_in < check_out, Booking.check_out >= check_out),
+                and_(Booking.check_in >= check_in, Booking.check_out <= check_out)
+            )
+        ).subquery()
+        query = Hostel.query.filter(~Hostel.id.in_(db.session.query(conflicting)))
+        return query.order_by(Hostel.created_at.desc()).paginate(page=1, per_page=20, error_out=False).total
+
+    def after():
+        return SearchService._execute_search(
+            {'check_in': check_in.isoformat(), 'check_out': check_out.isoformat(), 'guests': '2'}, 1, 20
+        )['total']
+
+    timings = {}
+    for name, search in (('before (NOT IN bookings)', before), ('after (occupancy ledger)', after)):
+        search()
+        best = float('inf')
+        for _ in range(3):
+            started = time.perf_counter()
+            total = search()
+            best = min(best, time.perf_counter() - started)
+        timings[name] = best
+        print(f"\n{name}: {best * 1000:.1f} ms, {total} of {n_hostels} hostels")
+    print(f"ledger rebuild: {ledger_rows} rows from {n_bookings} bookings in {build:.1f}s")
+
+    assert timings['after (occupancy ledger)'] < timings['before (NOT IN bookings)']
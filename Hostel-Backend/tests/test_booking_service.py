@@ -0,0 +1,84 @@
+import random
+import threading
+from datetime import date, timedelta
+
+from app.extensions import db
+from app.models.booking import Booking
+from app.models.hostel import Hostel
+from app.models.occupancy import HostelOccupancy
+from app.services.booking_service import BookingService, ACTIVE_STATUSES
+
+
+def ledger(hostel_id):
+    return {
+        row.day: row.guests
+        for row in HostelOccupancy.query.filter_by(hostel_id=hostel_id) if row.guests
+    }
+
+
+def expected_ledger(hostel_id):
+    nights = {}
+    for booking in Booking.query.filter(Booking.hostel_id == hostel_id, Booking.status.in_(ACTIVE_STATUSES)):
+        day = booking.check_in
+        while day < booking.check_out:
+            nights[day] = nights.get(day, 0) + booking.guests
+            day += timedelta(days=1)
+    return nights
+
+
+def test_cancel_and_create_on_the_same_nights_keep_the_ledger_consistent(app, make_hostel, make_user):
+    hostel = make_hostel(capacity=3)
+    guest = make_user('guest@hostelhunt.test')
+    start = date.today() + timedelta(days=10)
+
+    first = BookingService.create_booking(guest.id, hostel.id, start.isoformat(), (start + timedelta(days=10)).isoformat(), 2)
+    BookingService.create_booking(guest.id, hostel.id, (start + timedelta(days=5)).isoformat(), (start + timedelta(days=15)).isoformat(), 1)
+    BookingService.cancel_booking(first['id'], guest.id)
+    # The cancelled booking's beds are free again
+    BookingService.create_booking(guest.id, hostel.id, start.isoformat(), (start + timedelta(days=10)).isoformat(), 2)
+
+    assert ledger(hostel.id) == expected_ledger(hostel.id)
+    assert max(ledger(hostel.id).values()) == 3
+    assert db.session.get(Hostel, hostel.id).occupied_guests == 3
+    assert BookingService.check_occupancy() == []
+
+
+def test_concurrent_creates_and_cancels_never_overbook(app, make_hostel, make_user, row_locks):
+    hostel = make_hostel(capacity=4)
+    guests = [make_user(f'guest{i}@hostelhunt.test').id for i in range(6)]
+    hostel_id = hostel.id
+    start = date.today() + timedelta(days=30)
+    errors = []
+
+    def worker(user_id, seed):
+        rng = random.Random(seed)
+        with app.app_context():
+            mine = []
+            for _ in range(15):
+                try:
+                    if mine and rng.random() < 0.4:
+                        BookingService.cancel_booking(mine.pop(rng.randrange(len(mine))), user_id)
+                    else:
+                        check_in = start + timedelta(days=rng.randrange(5))
+                        booking = BookingService.create_booking(
+                            user_id, hostel_id, check_in.isoformat(),
+                            (check_in + timedelta(days=rng.randrange(1, 6))).isoformat(), rng.randint(1, 2)
+                        )
+                        mine.append(booking['id'])
+                except ValueError:
+                    pass  # fully booked (or already cancelled): expected under contention
+                except Exception as e:
+                    errors.append(e)
+            db.session.remove()
+
+    threads = [threading.Thread(target=worker, args=(user_id, seed)) for seed, user_id in enumerate(guests)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    db.session.expire_all()
+    assert errors == []
+    assert ledger(hostel_id) == expected_ledger(hostel_id)
+    assert max(ledger(hostel_id).values(), default=0) <= 4
+    assert BookingService.check_occupancy() == []
@@ -0,0 +1,15 @@
+from app.extensions import db
+from app.models.job_run import JobRun
+
+
+def test_list_jobs_shows_sent_and_failed_for_email_jobs(app):
+    db.session.add(JobRun(job='checkin-reminders', status='success', sent=4, failed=1))
+    db.session.add(JobRun(job='complete-bookings', status='success', rows=7))
+    db.session.commit()
+
+    output = app.test_cli_runner().invoke(args=['list-jobs']).output
+    lines = {line.split()[0]: line for line in output.splitlines()}
+
+    assert '(4 sent, 1 failed)' in lines['checkin-reminders']
+    assert '(7 row(s))' in lines['complete-bookings']
+    assert 'None' not in output
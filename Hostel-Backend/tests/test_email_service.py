@@ -0,0 +1,86 @@
+import time
+from datetime import date, timedelta
+
+import pytest
+
+from app.extensions import db
+from app.models.booking import Booking
+from app.services.email_service import EmailService
+from app.services.notification_service import NotificationService
+
+
+def messages(count, prefix='guest'):
+    return ((f'{prefix}{i}@hostelhunt.test', 'Hello', '<p>Hello</p>') for i in range(count))
+
+
+def test_send_bulk_opens_one_connection_per_batch(app, smtp_sink):
+    batches = []
+    stats = EmailService.send_bulk(messages(250), batch_size=100, on_batch=batches.append)
+
+    assert (stats['sent'], stats['failed'], stats['batches'], stats['reconnects']) == (250, 0, 3, 0)
+    assert smtp_sink.connections == 3
+    assert len(smtp_sink.messages) == 250
+    assert [batch['sent'] for batch in batches] == [100, 100, 50]
+    assert all(batch['per_second'] > 0 for batch in batches)
+
+
+def test_send_bulk_counts_rejected_messages_and_keeps_the_connection(app, smtp_sink):
+    smtp_sink.fail_every = 4
+    stats = EmailService.send_bulk(messages(12), batch_size=100)
+
+    assert (stats['sent'], stats['failed'], stats['reconnects']) == (9, 3, 0)
+    assert smtp_sink.connections == 1
+
+
+def test_send_bulk_reconnects_after_a_dropped_connection(app, smtp_sink, monkeypatch):
+    record = smtp_sink.record
+    seen = []
+
+    def drop_third(sender, recipients, data):
+        seen.append(recipients)
+        if len(seen) == 3:
+            raise ConnectionResetError("connection dropped")  # ends the handler: the socket closes
+        record(sender, recipients, data)
+
+    monkeypatch.setattr(smtp_sink, 'record', drop_third)
+    stats = EmailService.send_bulk(messages(10), batch_size=100)
+
+    assert (stats['sent'], stats['failed'], stats['reconnects']) == (10, 0, 1)
+    assert smtp_sink.connections == 2
+    assert len(smtp_sink.messages) == 10
+
+
+def test_checkin_reminders_go_out_over_one_pooled_connection(app, smtp_sink, make_hostel, make_user):
+    hostel = make_hostel()
+    tomorrow = date.today() + timedelta(days=1)
+    for i in range(3):
+        guest = make_user(f'guest{i}@hostelhunt.test')
+        db.session.add(Booking(user_id=guest.id, hostel_id=hostel.id, check_in=tomorrow,
+                               check_out=tomorrow + timedelta(days=5), guests=1, total_price=8000))
+    db.session.commit()
+
+    stats = NotificationService.notify_upcoming_checkins(batch_size=100)
+
+    assert (stats['sent'], stats['failed']) == (3, 0)
+    assert smtp_sink.connections == 1
+    assert {message['recipients'][0] for message in smtp_sink.messages} == {
+        f'guest{i}@hostelhunt.test' for i in range(3)
+    }
+
+
+@pytest.mark.benchmark
+def test_benchmark_pooled_sends_against_one_connection_per_message(app, smtp_sink):
+    count = 500
+    started = time.perf_counter()
+    for to, subject, html_body in messages(count, 'single'):
+        EmailService.send_email(to, subject, html_body)
+    before = count / (time.perf_counter() - started)
+
+    started = time.perf_counter()
+    stats = EmailService.send_bulk(messages(count, 'pooled'), batch_size=100)
+    after = count / (time.perf_counter() - started)
+
+    print(f"\nbefore (connection per message): {before:.0f} msg/s")
+    print(f"after (pooled, 100 per batch): {after:.0f} msg/s over {stats['batches']} connections")
+    assert stats['sent'] == count
+    assert after > before
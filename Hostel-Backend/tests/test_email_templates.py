@@ -0,0 +1,73 @@
+import os
+import time
+from datetime import date
+from types import SimpleNamespace
+
+import pytest
+
+from app.extensions import email_templates
+
+USER_NAME = '<script>alert(1)</script> & Co'
+
+
+def booking(**fields):
+    values = dict(
+        id=42, check_in=date(2026, 3, 1), check_out=date(2026, 3, 8), guests=2, total_price=16000, currency='KES',
+        user=SimpleNamespace(name=USER_NAME, email='guest@hostelhunt.test'),
+        hostel=SimpleNamespace(name='Sunrise Hostel', location='Juja, Kiambu')
+    )
+    values.update(fields)
+    return SimpleNamespace(**values)
+
+
+def test_every_template_is_compiled_at_startup(app, monkeypatch):
+    assert len(email_templates) == len([name for name in os.listdir(email_templates.folder) if name.endswith('.html')])
+
+    def compile_again(*args, **kwargs):
+        raise AssertionError("template compiled at render time")
+
+    monkeypatch.setattr(email_templates._env, 'compile', compile_again)
+    assert 'Sunrise Hostel' in email_templates.render('checkin_reminder.html', booking=booking())
+
+    with pytest.raises(KeyError):
+        email_templates.render('missing.html')
+
+
+@pytest.mark.parametrize('name', ['checkin_reminder.html', 'checkout_reminder.html', 'review_reminder.html'])
+def test_reminders_escape_user_names_and_share_the_layout(app, name):
+    html = email_templates.render(name, booking=booking())
+
+    assert '<script>' not in html
+    assert '&lt;script&gt;alert(1)&lt;/script&gt; &amp; Co' in html
+    assert 'Sunrise Hostel' in html
+    assert 'The Hostel Hunt Team' in html
+
+
+def test_reminder_keeps_the_booking_details(app):
+    html = email_templates.render('checkin_reminder.html', booking=booking())
+
+    for value in ('Check-in Reminder', 'Juja, Kiambu', '2026-03-01', '2026-03-08', '42'):
+        assert value in html
+
+
+@pytest.mark.benchmark
+def test_benchmark_rendering_reminders_from_compiled_templates(app):
+    """Tens of thousands of reminders: compiled registry vs compiling the source on every send"""
+    count = 20000  # one daily reminder run
+    with open(os.path.join(email_templates.folder, 'checkin_reminder.html')) as f:
+        source = f.read()
+    reminder = booking()
+
+    started = time.perf_counter()
+    for _ in range(count):
+        email_templates._env.from_string(source).render(booking=reminder)
+    before = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for _ in range(count):
+        email_templates.render('checkin_reminder.html', booking=reminder)
+    after = time.perf_counter() - started
+
+    print(f"\nbefore (compile per send): {count / before:.0f} renders/s")
+    print(f"after (compiled registry): {count / after:.0f} renders/s")
+    assert after < before
@@ -0,0 +1,47 @@
+from contextlib import contextmanager
+
+from sqlalchemy import event
+
+from app.extensions import db
+from app.models.landlord import Landlord
+from app.services.hostel_service import HostelService
+
+
+@contextmanager
+def count_queries():
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', record)
+    try:
+        yield statements
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', record)
+
+
+def test_listing_pages_take_the_same_number_of_queries_however_many_landlords(app, make_hostel, make_user):
+    make_hostel(name='Only Hostel')
+    db.session.expire_all()
+    with count_queries() as one_landlord:
+        page = HostelService.get_all_hostels(per_page=20)
+    assert len(page['hostels']) == 1
+
+    for i in range(3):
+        user = make_user(f'owner{i}@hostelhunt.test', role='landlord')
+        owner = Landlord(user_id=user.id, business_name=f'Owner {i}')
+        db.session.add(owner)
+        db.session.commit()
+        for j in range(5):
+            make_hostel(name=f'Hostel {i}-{j}', landlord_id=owner.id)
+
+    db.session.expire_all()
+    with count_queries() as many_landlords:
+        page = HostelService.get_all_hostels(per_page=20)
+
+    assert len(page['hostels']) == 16
+    assert len(many_landlords) == len(one_landlord)
+    assert {hostel['landlord']['business_name'] for hostel in page['hostels']} == {
+        'Lord Lettings', 'Owner 0', 'Owner 1', 'Owner 2'
+    }
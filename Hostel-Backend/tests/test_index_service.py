@@ -0,0 +1,39 @@
+import threading
+import time
+
+from app.services.index_service import IndexService
+
+
+def test_stale_index_is_served_while_rebuilt_in_the_background(app, make_hostel):
+    make_hostel(name='Sunrise Hostel')
+    stale = IndexService.get_text_index()
+    IndexService._built_at['text'] = time.monotonic() - app.config['SEARCH_INDEX_TTL'] - 1
+
+    built = threading.Event()
+    release = threading.Event()
+
+    def slow_build():
+        index = IndexService.build_text_index()
+        built.set()
+        release.wait(5)
+        return index
+
+    started = time.perf_counter()
+    assert IndexService._get('text', slow_build) is stale
+    assert time.perf_counter() - started < 0.5
+    assert built.wait(5)
+
+    # Written after the new index read the table: must be replayed before the swap
+    late = make_hostel(name='Moonlight Hostel')
+    IndexService.on_hostel_saved(late)
+    assert IndexService._get('text', slow_build) is stale
+
+    release.set()
+    for thread in threading.enumerate():
+        if thread.name == 'index-rebuild-text':
+            thread.join(5)
+
+    fresh = IndexService.get_text_index()
+    assert fresh is not stale
+    assert IndexService.search_text('moonlight') == [late.id]
+    assert 'text' not in IndexService._rebuilding
@@ -0,0 +1,19 @@
+from app.models.hostel import Hostel
+from app.utils.pagination import MAX_PER_PAGE, keyset_paginate
+
+
+def test_keyset_paginate_clamps_per_page_and_ends_on_an_empty_page(app, make_hostel):
+    for i in range(3):
+        make_hostel(name=f'Hostel {i}', price=5000 + i)
+
+    page = keyset_paginate(Hostel.query, Hostel.price, Hostel.id, None, 0, descending=False)
+    assert [hostel.price for hostel in page.items] == [5000]
+    assert page.per_page == 1 and page.has_more
+
+    page = keyset_paginate(Hostel.query, Hostel.price, Hostel.id, page.next_cursor, 5000, descending=False)
+    assert [hostel.price for hostel in page.items] == [5001, 5002]
+    assert page.per_page == MAX_PER_PAGE and not page.has_more
+
+    empty = keyset_paginate(Hostel.query.filter(Hostel.price > 9000), Hostel.price, Hostel.id, None, -3,
+                            include_total=True)
+    assert empty.items == [] and empty.next_cursor is None and empty.total == 0
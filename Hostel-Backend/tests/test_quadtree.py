@@ -0,0 +1,67 @@
+import random
+import time
+
+import pytest
+
+from app.utils.quadtree import QuadTree
+
+
+def check_aggregates(node):
+    """Recompute every node's aggregate from scratch and compare with the incremental one"""
+    if node.children is None:
+        points = list(node.points.values())
+        count = len(points)
+        sum_lat = sum(point[0] for point in points)
+        sum_lng = sum(point[1] for point in points)
+        prices = [point[2] for point in points if point[2] is not None]
+    else:
+        count = sum_lat = sum_lng = 0
+        prices = []
+        for child in node.children:
+            check_aggregates(child)
+            count += child.count
+            sum_lat += child.sum_lat
+            sum_lng += child.sum_lng
+            if child.min_price is not None:
+                prices.append(child.min_price)
+    assert node.count == count
+    assert abs(node.sum_lat - sum_lat) < 1e-6
+    assert abs(node.sum_lng - sum_lng) < 1e-6
+    assert node.min_price == (min(prices) if prices else None)
+
+
+def test_aggregates_stay_exact_through_adds_moves_and_removes():
+    rng = random.Random(7)
+    tree = QuadTree(capacity=4)
+    for hostel_id in range(500):
+        tree.add(hostel_id, rng.uniform(-1.3, -1.0), rng.uniform(36.8, 37.1), rng.choice([None, 5000, 8000, 12000]))
+    for hostel_id in rng.sample(range(500), 200):
+        tree.add(hostel_id, rng.uniform(-1.3, -1.0), rng.uniform(36.8, 37.1), rng.randint(3000, 15000))
+    for hostel_id in rng.sample(range(500), 250):
+        tree.remove(hostel_id)
+
+    assert len(tree) == 250
+    check_aggregates(tree._root)
+
+    clusters, points = tree.clusters(-1.3, 36.8, -1.0, 37.1, 10)
+    assert sum(cluster['count'] for cluster in clusters) + len(points) == 250
+
+
+def test_co_located_points_build_in_linear_time():
+    # Leaves at max_depth never split, so thousands of hostels can share one leaf
+    tree = QuadTree()
+    started = time.perf_counter()
+    for hostel_id in range(5000):
+        tree.add(hostel_id, -1.1, 37.01, 8000 - hostel_id % 100)
+    assert time.perf_counter() - started < 1.0
+
+    check_aggregates(tree._root)
+    clusters, points = tree.clusters(-2, 36, 0, 38, 8)
+    assert points == []
+    assert clusters == [{'lat': pytest.approx(-1.1), 'lng': pytest.approx(37.01), 'count': 5000, 'min_price': 7901}]
+
+    tree.remove(99)  # one of the cheapest
+    assert tree._root.min_price == 7901
+    for hostel_id in range(99, 5000, 100):
+        tree.remove(hostel_id)
+    assert tree._root.min_price == 7902
@@ -0,0 +1,65 @@
+import pytest
+
+from app.extensions import db
+from app.models.saved_search import SavedSearch, SavedSearchMatch
+from app.services.notification_service import NotificationService
+from app.services.saved_search_service import SavedSearchService
+from app.utils.jwt_utils import generate_tokens
+
+
+def test_saved_searches_only_accept_search_endpoint_params(app, make_user):
+    user = make_user('saver@hostelhunt.test')
+    with pytest.raises(ValueError, match='location'):
+        SavedSearchService.create_saved_search(user.id, {'params': {'location': 'Juja'}})
+
+    search = SavedSearchService.create_saved_search(user.id, {'params': {'q': 'Juja', 'page': '2'}})
+    assert search['params'] == {'q': 'Juja'}
+
+
+def test_failing_digests_back_off_instead_of_starving_later_users(app, make_user, make_hostel, monkeypatch):
+    hostel = make_hostel()
+    users = [make_user(f'alert{i}@hostelhunt.test') for i in range(3)]
+    for user in users:
+        search = SavedSearch(user_id=user.id, params={'q': 'sunrise'})
+        db.session.add(search)
+        db.session.flush()
+        db.session.add(SavedSearchMatch(saved_search_id=search.id, hostel_id=hostel.id))
+    db.session.commit()
+
+    failing = {users[0].email, users[1].email}
+    delivered_to = []
+
+    def notify(email, name, searches):
+        if email in failing:
+            return False
+        delivered_to.append(email)
+        return True
+
+    monkeypatch.setattr(NotificationService, 'notify_saved_search_matches', staticmethod(notify))
+
+    # The first batch is taken up by the two failing users...
+    assert SavedSearchService.send_pending_alerts(batch_size=2) == (0, 0)
+    # ...who then wait out their backoff, so the next batch reaches the third
+    assert SavedSearchService.send_pending_alerts(batch_size=2) == (1, 1)
+    assert delivered_to == [users[2].email]
+
+    failed = SavedSearchMatch.query.filter(SavedSearchMatch.notified_at.is_(None)).all()
+    assert [match.attempts for match in failed] == [1, 1]
+    assert all(match.next_attempt_at is not None for match in failed)
+
+
+def test_saved_search_routes_only_404_when_the_search_is_missing(app, make_user, monkeypatch):
+    user = make_user('router@hostelhunt.test')
+    headers = {'Authorization': f"Bearer {generate_tokens(user.id)['access_token']}"}
+    client = app.test_client()
+
+    assert client.get('/search/saved/999/matches', headers=headers).status_code == 404
+    assert client.delete('/search/saved/999', headers=headers).status_code == 404
+
+    def broken(*args):
+        raise RuntimeError('database went away')
+
+    monkeypatch.setattr(SavedSearchService, 'get_matches', staticmethod(broken))
+    monkeypatch.setattr(SavedSearchService, 'delete_saved_search', staticmethod(broken))
+    assert client.get('/search/saved/1/matches', headers=headers).status_code == 500
+    assert client.delete('/search/saved/1', headers=headers).status_code == 500
@@ -0,0 +1,115 @@
+import random
+import time
+
+import pytest
+from sqlalchemy import event
+
+from app.extensions import db
+from app.models.hostel import Hostel
+from app.services.cache_service import CacheService
+from app.services.hostel_service import HostelService
+from app.services.search_service import SearchService
+from app.utils.geo_index import geodesic_km, haversine_km
+
+
+def search(app, params, limit):
+    app.config['SEARCH_ID_FILTER_MAX'] = limit
+    CacheService._backend = None
+    CacheService._generations = None
+    return SearchService.search_hostels(dict(params), page=2, per_page=3)
+
+
+def test_large_index_hit_sets_stay_out_of_the_sql_in_list(app, make_hostel):
+    for i in range(12):
+        make_hostel(
+            name=f'Sunrise Hostel {i}', price=5000 + 250 * i, room_type=['single', 'double'][i % 2],
+            latitude=-1.10 + i * 0.001, longitude=37.01, is_verified=bool(i % 3)
+        )
+    make_hostel(name='Green Court', latitude=-1.10, longitude=37.01)
+
+    bound = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        bound.append(len(parameters))
+
+    searches = [
+        {'q': 'sunrise', 'facets': 'room_type,verified'},
+        {'q': 'sunrise', 'sort_by': 'price_asc', 'facets': 'price_bucket'},
+        {'lat': '-1.10', 'lng': '37.01', 'radius': '5', 'sort_by': 'distance'},
+        {'lat': '-1.10', 'lng': '37.01', 'radius': '5', 'room_type': 'double', 'sort_by': 'price_desc'}
+    ]
+    for params in searches:
+        in_sql = search(app, params, 1000)
+
+        event.listen(db.engine, 'before_cursor_execute', record)
+        try:
+            in_python = search(app, params, 2)
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', record)
+
+        assert in_python['total'] == in_sql['total'] > 3
+        assert [hostel['id'] for hostel in in_python['hostels']] == [hostel['id'] for hostel in in_sql['hostels']]
+        assert in_python.get('facets') == in_sql.get('facets')
+
+    # The hit sets (12+ ids) were never bound, only pages of 3 and scalar filters
+    assert max(bound) < 12
+
+
+def test_distance_sort_pages_nearest_first_with_distances(app, make_hostel):
+    rng = random.Random(3)
+    offsets = list(range(1, 25))
+    rng.shuffle(offsets)
+    for offset in offsets:
+        make_hostel(name=f'Hostel {offset}', latitude=-1.10 + offset * 0.002, longitude=37.01)
+    far = make_hostel(name='Far Hostel', latitude=-0.5, longitude=37.01)
+
+    params = {'lat': '-1.10', 'lng': '37.01', 'radius': '10', 'sort_by': 'distance'}
+    pages = [SearchService.search_hostels(dict(params), page=page, per_page=10) for page in (1, 2, 3)]
+    results = [hostel for page in pages for hostel in page['hostels']]
+
+    assert pages[0]['total'] == 24
+    assert far.id not in [hostel['id'] for hostel in results]
+    assert [hostel['latitude'] for hostel in results] == sorted(hostel['latitude'] for hostel in results)
+    for hostel in results:
+        assert hostel['distance_km'] == round(haversine_km(-1.10, 37.01, hostel['latitude'], hostel['longitude']), 2)
+
+    with pytest.raises(ValueError):
+        SearchService.search_hostels({'sort_by': 'distance'})
+    assert HostelService.get_hostel_by_id(far.id, lat=-1.10, lng=37.01)['location']['distance'] == '66.7 km away'
+
+
+@pytest.mark.benchmark
+def test_benchmark_distance_page_against_the_geodesic_loop(app, landlord):
+    """First nearest-first page from the grid index + heap vs loading and sorting every hostel"""
+    rng = random.Random(11)
+    db.session.execute(Hostel.__table__.insert(), [
+        dict(name=f'Hostel {i}', location='Juja, Kiambu', price=rng.choice([5000, 8000, 12000]), capacity=4,
+             room_type='single', landlord_id=landlord.id, amenities=[], features={},
+             latitude=-1.1 + rng.uniform(-0.3, 0.3), longitude=37.0 + rng.uniform(-0.3, 0.3))
+        for i in range(10000)
+    ])
+    db.session.commit()
+    params = {'lat': '-1.1', 'lng': '37.0', 'radius': '15', 'sort_by': 'distance', 'min_price': '6000'}
+
+    def before():
+        hostels = Hostel.query.filter(Hostel.latitude.isnot(None), Hostel.price >= 6000).all()
+        nearby = sorted(
+            (distance, hostel.id) for distance, hostel in
+            ((geodesic_km(-1.1, 37.0, hostel.latitude, hostel.longitude), hostel) for hostel in hostels)
+            if distance <= 15
+        )
+        return [hostel_id for _, hostel_id in nearby[:20]]
+
+    def after():
+        return [hostel['id'] for hostel in SearchService._execute_search(dict(params), 1, 20)['hostels']]
+
+    after()  # build the geo index
+    timings = {}
+    for name, search in (('before (geodesic loop)', before), ('after (grid index + heap)', after)):
+        started = time.perf_counter()
+        ids = search()
+        timings[name] = time.perf_counter() - started
+        print(f"\n{name}: {timings[name] * 1000:.1f} ms")
+
+    assert len(ids) == 20
+    assert timings['after (grid index + heap)'] < timings['before (geodesic loop)']